@@ -0,0 +1,305 @@
+# admission.py
+# -*- coding: utf-8 -*-
+"""
+Ağır endpoint-lər üçün qəbul nəzarəti (admission control).
+
+İki sinif var:
+  - "interactive" – ticket-status, bbox sürüşdürmə, kiçik by-geom;
+  - "batch"       – attach-ticket üzrə TEKUİS, böyük by-geom, validasiya / save.
+
+Hər sinfin öz eyni-vaxtlılıq limiti, məhdud gözləmə növbəsi və gözləmə müddəti var;
+əlavə olaraq istifadəçi (kimlik yoxdursa IP) və ticket başına limitlər tətbiq olunur. Doyma halında sorğu
+gözləmədən rədd edilir: limit aşımı → 429, növbə dolu / gözləmə bitdi → 503
+(hər ikisi Retry-After ilə). Limitlər proses daxilindədir (worker başına).
+
+View sync və ya async ola bilər; slot thread-lər və event loop-lar arasında ötürülür.
+"""
+
+import asyncio
+import ipaddress
+import logging
+import threading
+from collections import Counter, deque
+from functools import lru_cache, wraps
+
+from django.conf import settings
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+_LOCK = threading.Lock()
+_LANES = {}
+_HOLDERS = Counter()  # ("user", id) / ("ip", ip) / ("ticket", t) -> aktiv sorğu sayı
+
+_DEFAULT_CLASSES = {
+    "interactive": {"limit": 32, "queue": 64, "wait_s": 2.0, "retry_after": 1},
+    "batch": {"limit": 4, "queue": 8, "wait_s": 30.0, "retry_after": 10},
+}
+
+
+def _set_done(fut):
+    if not fut.done():
+        fut.set_result(True)
+
+
+class _Waiter:
+    """Növbədə gözləyən sorğu: sync üçün threading.Event, async üçün loop future."""
+
+    __slots__ = ("granted", "event", "loop", "fut")
+
+    def __init__(self, loop=None):
+        self.granted = False
+        self.loop = loop
+        self.event = None if loop else threading.Event()
+        self.fut = loop.create_future() if loop else None
+
+    def wake(self):
+        # _LOCK altında çağırılır
+        self.granted = True
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_set_done, self.fut)
+
+
+class _Lane:
+    def __init__(self, name: str, limit: int, queue: int, wait_s: float, retry_after: int):
+        self.name = name
+        self.limit = int(limit)
+        self.queue = int(queue)
+        self.wait_s = float(wait_s)
+        self.retry_after = int(retry_after)
+        self.active = 0
+        self.waiters = deque()
+        self.rejected = 0
+
+    def enter(self, waiter: _Waiter):
+        """True → slot alındı, False → növbəyə düşdü, None → növbə dolu. (_LOCK altında)"""
+        if self.active < self.limit and not self.waiters:
+            self.active += 1
+            return True
+        if len(self.waiters) >= self.queue:
+            self.rejected += 1
+            return None
+        self.waiters.append(waiter)
+        return False
+
+    def leave_queue(self, waiter: _Waiter) -> bool:
+        """Gözləmə bitdi/cancel: slot artıq verilibsə True (çağıran release etməlidir). (_LOCK altında)"""
+        if waiter.granted:
+            return True
+        try:
+            self.waiters.remove(waiter)
+        except ValueError:
+            pass
+        self.rejected += 1
+        return False
+
+    def release(self):
+        with _LOCK:
+            if self.waiters:
+                # slot birbaşa növbədəki ilk sorğuya ötürülür
+                self.waiters.popleft().wake()
+            else:
+                self.active -= 1
+
+
+def _lane(name: str) -> _Lane:
+    lane = _LANES.get(name)
+    if lane is None:
+        conf = dict(_DEFAULT_CLASSES.get(name, _DEFAULT_CLASSES["interactive"]))
+        conf.update((getattr(settings, "ADMISSION_CLASSES", {}) or {}).get(name, {}))
+        with _LOCK:
+            lane = _LANES.setdefault(name, _Lane(name, **conf))
+    return lane
+
+
+@lru_cache(maxsize=1)
+def _trusted_proxies(raw: tuple):
+    nets = []
+    for item in raw:
+        try:
+            nets.append(ipaddress.ip_network(item, strict=False))
+        except ValueError:
+            logger.warning("[ADMISSION] invalid ADMISSION_TRUSTED_PROXIES entry: %r", item)
+    return tuple(nets)
+
+
+def _is_trusted(addr: str, nets) -> bool:
+    try:
+        ip = ipaddress.ip_address(addr)
+    except ValueError:
+        return False
+    return any(ip in n for n in nets)
+
+
+def _client_ip(request) -> str:
+    """
+    REMOTE_ADDR; yalnız o ADMISSION_TRUSTED_PROXIES-dədirsə X-Forwarded-For nəzərə alınır —
+    sağdan ilk etibarlı olmayan ünvan (klientin özü yaza biləcəyi sol hissəyə inanılmır).
+    """
+    remote = (request.META.get("REMOTE_ADDR") or "").strip()
+    nets = _trusted_proxies(tuple(getattr(settings, "ADMISSION_TRUSTED_PROXIES", ()) or ()))
+    if not nets or not _is_trusted(remote, nets):
+        return remote
+    hops = [h.strip() for h in (request.META.get("HTTP_X_FORWARDED_FOR") or "").split(",") if h.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted(hop, nets):
+            return hop
+    return hops[0] if hops else remote
+
+
+def _user_ident(request):
+    """Doğrulanmış kimlik: token-dəki user id, Django istifadəçisi, və ya ticket-in fk_metadata-sı."""
+    uid = getattr(request, "user_id_from_token", None)
+    if uid is not None:
+        return str(uid)
+    user = getattr(request, "user", None)
+    if user is not None and getattr(user, "is_authenticated", False):
+        return f"auth:{user.pk}"
+    fk = getattr(request, "fk_metadata", None)
+    if fk:
+        return f"fk:{fk}"
+    return None
+
+
+def _client_keys(request):
+    keys = []
+    ident = _user_ident(request)
+    if ident:
+        keys.append(("user", ident, int(getattr(settings, "ADMISSION_PER_USER", 6))))
+    else:
+        # kimlik yoxdursa IP üzrə (NAT arxasındakı bir neçə istifadəçi üçün daha geniş limit)
+        ip = _client_ip(request)
+        if ip:
+            keys.append(("ip", ip, int(getattr(settings, "ADMISSION_PER_IP", 24))))
+    ticket = (request.GET.get("ticket") or request.headers.get("X-Ticket") or "").strip()
+    if not ticket and getattr(request, "fk_metadata", None):
+        ticket = f"fk:{request.fk_metadata}"
+    if ticket:
+        keys.append(("ticket", ticket, int(getattr(settings, "ADMISSION_PER_TICKET", 4))))
+    return keys
+
+
+def _take_caps(keys):
+    """İstifadəçi/ticket limitlərini götürür; aşılıbsa aşılan scope adını qaytarır."""
+    with _LOCK:
+        for scope, ident, cap in keys:
+            if cap > 0 and _HOLDERS[(scope, ident)] >= cap:
+                return scope
+        for scope, ident, _cap in keys:
+            _HOLDERS[(scope, ident)] += 1
+    return None
+
+
+def _drop_caps(keys):
+    with _LOCK:
+        for scope, ident, _cap in keys:
+            k = (scope, ident)
+            _HOLDERS[k] -= 1
+            if _HOLDERS[k] <= 0:
+                del _HOLDERS[k]
+
+
+def _reject(status: int, lane: _Lane, **extra):
+    resp = JsonResponse(
+        {"ok": False, "error": "too_many_requests" if status == 429 else "overloaded", "class": lane.name, **extra},
+        status=status,
+    )
+    resp["Retry-After"] = str(lane.retry_after)
+    return resp
+
+
+def _pick_class(request, cls: str, heavy_body: bool) -> str:
+    if heavy_body and len(request.body or b"") > int(getattr(settings, "ADMISSION_HEAVY_BODY_BYTES", 256 * 1024)):
+        return "batch"
+    return cls
+
+
+def admit(cls: str = "interactive", heavy_body: bool = False):
+    """
+    View dekoratoru.
+    cls        – "interactive" | "batch";
+    heavy_body – True olarsa, body ADMISSION_HEAVY_BODY_BYTES-dan böyük olduqda sorğu "batch" sinfinə keçir.
+    """
+
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+
+            @wraps(view)
+            async def _async_wrapped(request, *args, **kwargs):
+                lane = _lane(_pick_class(request, cls, heavy_body))
+                keys = _client_keys(request)
+                scope = _take_caps(keys)
+                if scope:
+                    return _reject(429, lane, scope=scope)
+                try:
+                    waiter = _Waiter(asyncio.get_running_loop())
+                    with _LOCK:
+                        state = lane.enter(waiter)
+                    if state is None:
+                        return _reject(503, lane)
+                    if state is False:
+                        try:
+                            await asyncio.wait_for(asyncio.shield(waiter.fut), lane.wait_s)
+                        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                            with _LOCK:
+                                granted = lane.leave_queue(waiter)
+                            if isinstance(e, asyncio.CancelledError):
+                                if granted:
+                                    lane.release()
+                                raise
+                            if not granted:
+                                return _reject(503, lane)
+                    try:
+                        return await view(request, *args, **kwargs)
+                    finally:
+                        lane.release()
+                finally:
+                    _drop_caps(keys)
+
+            return _async_wrapped
+
+        @wraps(view)
+        def _wrapped(request, *args, **kwargs):
+            lane = _lane(_pick_class(request, cls, heavy_body))
+            keys = _client_keys(request)
+            scope = _take_caps(keys)
+            if scope:
+                return _reject(429, lane, scope=scope)
+            try:
+                waiter = _Waiter()
+                with _LOCK:
+                    state = lane.enter(waiter)
+                if state is None:
+                    return _reject(503, lane)
+                if state is False and not waiter.event.wait(lane.wait_s):
+                    with _LOCK:
+                        granted = lane.leave_queue(waiter)
+                    if not granted:
+                        return _reject(503, lane)
+                try:
+                    return view(request, *args, **kwargs)
+                finally:
+                    lane.release()
+            finally:
+                _drop_caps(keys)
+
+        return _wrapped
+
+    return decorator
+
+
+def admission_stats() -> dict:
+    """Monitorinq üçün siniflərin cari vəziyyəti."""
+    with _LOCK:
+        return {
+            name: {
+                "active": lane.active,
+                "limit": lane.limit,
+                "queued": len(lane.waiters),
+                "queue": lane.queue,
+                "rejected": lane.rejected,
+            }
+            for name, lane in _LANES.items()
+        }
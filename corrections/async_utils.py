@@ -0,0 +1,316 @@
+# async_utils.py
+# -*- coding: utf-8 -*-
+"""
+Async (ASGI) view-lar üçün ortaq köməkçilər:
+  - oracledb async bağlantıları (ASGI-də event loop başına async pool, WSGI-də proses
+    üzrə sinxron pool + thread körpüsü),
+  - ID siyahıları üçün kolleksiya (array) bind-ları,
+  - bloklayan kitabxanalar (pyodbc, requests, Django DB) üçün thread körpüsü,
+  - klient bağlantını qırdıqda (ASGI http.disconnect → Django view task-ı cancel edir)
+    Oracle/PostgreSQL sorğularının serverdə dayandırılması.
+"""
+
+import asyncio
+import logging
+import threading
+import weakref
+from contextlib import asynccontextmanager
+
+import oracledb
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .breakers import breaker, oracle_outage
+
+logger = logging.getLogger(__name__)
+
+# event loop -> {ad: AsyncConnectionPool}
+# Async pool loop-a bağlıdır; WSGI-də hər sorğu öz loop-unu yaradır, ona görə o yalnız
+# ORACLE_ASYNC_POOL=1 (ASGI deploy) olduqda istifadə olunur. Əks halda proses üzrə
+# sinxron pool (thread-safe) işlənir, çağırışlar thread körpüsü ilə gedir.
+_ASYNC_POOLS = weakref.WeakKeyDictionary()
+# ad -> _ThreadedPool
+_SYNC_POOLS = {}
+_SYNC_POOLS_LOCK = threading.Lock()
+
+
+def _lob_as_text(cursor, metadata):
+    """CLOB-ları birbaşa str kimi oxu (async LOB.read() əlavə round-trip tələb edir)."""
+    if metadata.type_code is oracledb.DB_TYPE_CLOB:
+        return cursor.var(oracledb.DB_TYPE_LONG, arraysize=cursor.arraysize)
+    if metadata.type_code is oracledb.DB_TYPE_NCLOB:
+        return cursor.var(oracledb.DB_TYPE_LONG_NVARCHAR, arraysize=cursor.arraysize)
+
+
+def _pool_limits() -> dict:
+    return {
+        "min": int(getattr(settings, "ORACLE_ASYNC_POOL_MIN", 1)),
+        "max": int(getattr(settings, "ORACLE_ASYNC_POOL_MAX", 16)),
+        "increment": 1,
+    }
+
+
+def _configure(conn) -> None:
+    conn.outputtypehandler = _lob_as_text
+    conn.call_timeout = int(getattr(settings, "ORACLE_CALL_TIMEOUT_MS", 0) or 0)
+
+
+class _ThreadedCursor:
+    """Sinxron cursor üzərində async fasad (execute/fetch* thread-də)."""
+
+    def __init__(self, cur):
+        self._cur = cur
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cur.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+    async def execute(self, sql, params=None):
+        return await run_blocking(self._cur.execute, sql, params)
+
+    async def fetchone(self):
+        return await run_blocking(self._cur.fetchone)
+
+    async def fetchmany(self, size=None):
+        return await run_blocking(self._cur.fetchmany, size or self._cur.arraysize)
+
+    async def fetchall(self):
+        return await run_blocking(self._cur.fetchall)
+
+    async def _rows(self):
+        while True:
+            rows = await self.fetchmany()
+            if not rows:
+                return
+            for row in rows:
+                yield row
+
+    def __aiter__(self):
+        return self._rows()
+
+
+class _ThreadedConnection:
+    """Pool-dan alınmış sinxron bağlantı; API async bağlantı ilə eynidir (cancel() – sinxron)."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    @property
+    def call_timeout(self):
+        return self._conn.call_timeout
+
+    @call_timeout.setter
+    def call_timeout(self, value):
+        self._conn.call_timeout = value  # fasadda yox, real bağlantıda
+
+    def cursor(self):
+        return _ThreadedCursor(self._conn.cursor())
+
+    async def gettype(self, name: str):
+        return await run_blocking(self._conn.gettype, name)
+
+
+class _ThreadedPool:
+    """oracledb.ConnectionPool → async acquire/release/drop (WSGI rejimi)."""
+
+    def __init__(self, pool):
+        self._pool = pool
+
+    def _acquire(self):
+        conn = self._pool.acquire()
+        _configure(conn)
+        return _ThreadedConnection(conn)
+
+    async def acquire(self):
+        return await run_blocking(self._acquire)
+
+    async def release(self, conn):
+        await run_blocking(self._pool.release, conn._conn)
+
+    async def drop(self, conn):
+        await run_blocking(self._pool.drop, conn._conn)
+
+
+class _GuardedCursor:
+    """
+    Hər execute ayrıca breaker çağırışıdır (view-un qalan işi ölçülmür). Bağlantıya Deadline
+    tətbiq olunubsa, büdcə bitdiyi üçün yaranan call timeout breaker xətası sayılmır.
+    """
+
+    def __init__(self, cur, br, owner):
+        self._cur = cur
+        self._br = br
+        self._owner = owner
+
+    def __enter__(self):
+        self._cur.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._cur.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+    def __aiter__(self):
+        return self._cur.__aiter__()
+
+    async def execute(self, sql, params=None):
+        async with self._br.aguard(exempt=self._owner.deadline_hit):
+            return await self._cur.execute(sql, params)
+
+
+class _GuardedConnection:
+    def __init__(self, conn, br):
+        self._conn = conn
+        self._br = br
+        self.deadline = None  # Deadline.apply təyin edir
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    @property
+    def call_timeout(self):
+        return self._conn.call_timeout
+
+    @call_timeout.setter
+    def call_timeout(self, value):
+        self._conn.call_timeout = value
+
+    def deadline_hit(self, exc) -> bool:
+        return self.deadline is not None and self.deadline.hit_by(exc)
+
+    def cursor(self):
+        return _GuardedCursor(self._conn.cursor(), self._br, self)
+
+    async def gettype(self, name: str):
+        async with self._br.aguard(exempt=self.deadline_hit):
+            return await self._conn.gettype(name)
+
+
+def _get_sync_pool(name: str, params: dict) -> _ThreadedPool:
+    with _SYNC_POOLS_LOCK:
+        pool = _SYNC_POOLS.get(name)
+        if pool is None:
+            pool = _ThreadedPool(oracledb.create_pool(**_pool_limits(), **params))
+            _SYNC_POOLS[name] = pool
+        return pool
+
+
+def _get_async_pool(name: str, params: dict):
+    loop = asyncio.get_running_loop()
+    pools = _ASYNC_POOLS.setdefault(loop, {})
+    pool = pools.get(name)
+    if pool is None:
+        pool = oracledb.create_pool_async(**_pool_limits(), **params)
+        pools[name] = pool
+    return pool
+
+
+async def _abandon_oracle(conn, pool) -> None:
+    """
+    Ləğv olunmuş sorğunun sessiyasını dayandırır: break göndərir, sonra bağlantını
+    pool-dan atır (protokol yarımçıq oxunmuş ola bilər → geri qaytarmaq təhlükəlidir).
+    """
+    try:
+        conn.cancel()
+    except Exception:
+        pass
+    try:
+        await asyncio.wait_for(pool.drop(conn), timeout=1.0)
+    except BaseException as e:
+        logger.debug("[ORACLE] abandoned connection cleanup: %s", e)
+
+
+@asynccontextmanager
+async def oracle_connection_async(name: str, params: dict):
+    """
+    Async Oracle bağlantısı.
+    name   – pool açarı ("tekuis", "necas"),
+    params – user/password/dsn.
+
+    Hər round-trip ORACLE_CALL_TIMEOUT_MS ilə məhdudlaşır. Klient getdikdə view task-ı
+    CancelledError alır → sorğu serverdə cancel() olunur və sessiya dərhal azad edilir.
+    "oracle_<name>" breaker-i yalnız bağlantının alınmasını və ayrı-ayrı execute/gettype
+    çağırışlarını ölçür (view gövdəsini yox); açıqdırsa CircuitOpen.
+    """
+    br = breaker(f"oracle_{name}", oracle_outage)
+    async with br.aguard():
+        if getattr(settings, "ORACLE_ASYNC_POOL", False):
+            pool = _get_async_pool(name, params)
+            conn = await pool.acquire()
+            _configure(conn)
+        else:
+            pool = _get_sync_pool(name, params)
+            conn = await pool.acquire()
+
+    abandoned = False
+    try:
+        yield _GuardedConnection(conn, br)
+    except asyncio.CancelledError:
+        abandoned = True
+        logger.info("[ORACLE] %s query cancelled (client disconnected)", name)
+        await _abandon_oracle(conn, pool)
+        raise
+    finally:
+        if not abandoned:
+            try:
+                await pool.release(conn)
+            except Exception as e:
+                # deadline call timeout-dan sonra sessiya artıq bağlı ola bilər
+                logger.debug("[ORACLE] %s connection cleanup: %s", name, e)
+
+
+async def oracle_id_list(conn, values, numeric: bool):
+    """
+    ID siyahısı → SYS.ODCINUMBERLIST / SYS.ODCIVARCHAR2LIST obyekti (tək bind).
+    SQL-də: ... IN (SELECT x.COLUMN_VALUE FROM TABLE(:ids) x) — siyahı uzunluğundan
+    asılı olmayaraq eyni SQL mətni (shared pool-da bir cursor), IN-siyahı limiti yoxdur.
+    """
+    typ = await conn.gettype("SYS.ODCINUMBERLIST" if numeric else "SYS.ODCIVARCHAR2LIST")
+    return typ.newobject(list(values))
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """
+    Bloklayan I/O (pyodbc, requests) üçün thread körpüsü.
+    Django DB (connection.cursor) çağırışları üçün sync_to_async-in default
+    (thread_sensitive=True) rejimini istifadə edin.
+    """
+    return await sync_to_async(fn, thread_sensitive=False)(*args, **kwargs)
+
+
+async def run_db_cancellable(fn, *args, **kwargs):
+    """
+    Django DB (PostgreSQL) işini thread_sensitive rejimdə icra edir.
+    Task cancel olunarsa (klient getdi), icra olunan SQL psycopg2 cancel() ilə
+    serverdə dayandırılır — thread boşalır, bağlantı növbəti sorğu üçün azad olur.
+    """
+    from django.db import connection
+
+    holder = {}
+
+    def _call():
+        connection.ensure_connection()
+        holder["pg"] = connection.connection
+        return fn(*args, **kwargs)
+
+    task = asyncio.ensure_future(sync_to_async(_call)())
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        pg = holder.get("pg")
+        if pg is not None:
+            try:
+                pg.cancel()  # psycopg2: thread-safe, serverə CancelRequest göndərir
+            except Exception:
+                pass
+        raise
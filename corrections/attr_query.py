@@ -0,0 +1,105 @@
+# attr_query.py
+# -*- coding: utf-8 -*-
+"""
+Parsel endpoint-ləri üçün atribut proyeksiyası (fields=) və sadə filtrlər.
+
+GET:
+  ?fields=ID,LAND_CATEGORY_ENUM          – yalnız bu sütunlar seçilir
+  ?f_LAND_CATEGORY_ENUM=101,102          – IN (...)
+  ?f_RAYON_ADI=Abşeron                   – =
+POST (JSON):
+  {"fields": ["ID"], "filters": {"LAND_CATEGORY_ENUM": [101, 102], "RAYON_ADI": "Abşeron"}}
+
+Sütun adları icazə verilən siyahı (TEKUIS_ATTRS / NECAS_ATTRS) ilə yoxlanır,
+dəyərlər həmişə bind kimi ötürülür — SQL-ə yalnız whitelist-dən gələn ad düşür.
+"""
+
+import hashlib
+
+_MAX_IN_VALUES = 200
+
+
+class AttrQuery:
+    def __init__(self, fields: tuple, filters: dict, alias: str):
+        self.fields = fields
+        self.filters = filters  # COL -> tuple(values)
+        self.alias = alias
+
+    @property
+    def select_sql(self) -> str:
+        return ", ".join(f"{self.alias}.{c}" for c in self.fields)
+
+    @property
+    def where_sql(self) -> str:
+        """Məs. ' AND t.X IN (:fq0, :fq1) AND t.Y = :fq2'; filtr yoxdursa boş sətir."""
+        parts, n = [], 0
+        for col, values in self.filters.items():
+            names = [f":fq{n + i}" for i in range(len(values))]
+            n += len(values)
+            if len(names) == 1:
+                parts.append(f" AND {self.alias}.{col} = {names[0]}")
+            else:
+                parts.append(f" AND {self.alias}.{col} IN ({', '.join(names)})")
+        return "".join(parts)
+
+    @property
+    def binds(self) -> dict:
+        flat = [v for values in self.filters.values() for v in values]
+        return {f"fq{i}": v for i, v in enumerate(flat)}
+
+    @property
+    def digest(self) -> str:
+        """Koalessensiya / cursor / continuation açarları üçün qısa imza."""
+        raw = repr((self.fields, sorted(self.filters.items())))
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def _resolve(name, allowed_upper: dict) -> str:
+    col = allowed_upper.get(str(name).strip().upper())
+    if not col:
+        raise ValueError(f"naməlum sahə: {name}")
+    return col
+
+
+def _split(raw) -> list:
+    if isinstance(raw, (list, tuple)):
+        return [v for v in raw if v not in (None, "")]
+    return [v.strip() for v in str(raw).split(",") if v.strip()]
+
+
+def _build(fields_raw, filters_raw: dict, allowed: tuple, alias: str) -> AttrQuery:
+    allowed_upper = {c.upper(): c for c in allowed}
+
+    fields = allowed
+    wanted = _split(fields_raw) if fields_raw not in (None, "") else []
+    if wanted:
+        picked = {_resolve(f, allowed_upper) for f in wanted}
+        fields = tuple(c for c in allowed if c in picked)  # sıra sabit qalır
+
+    filters = {}
+    for name, raw in filters_raw.items():
+        col = _resolve(name, allowed_upper)
+        values = tuple(_split(raw))
+        if not values:
+            continue
+        if len(values) > _MAX_IN_VALUES:
+            raise ValueError(f"{col}: ən çox {_MAX_IN_VALUES} dəyər")
+        filters[col] = filters.get(col, ()) + values
+    return AttrQuery(fields, dict(sorted(filters.items())), alias)
+
+
+def attr_query_from_get(params, allowed: tuple, alias: str) -> AttrQuery:
+    """QueryDict-dən; səhv sahə adı → ValueError."""
+    filters = {}
+    for key in params.keys():
+        if key.startswith("f_"):
+            filters[key[2:]] = [v for raw in params.getlist(key) for v in _split(raw)]
+    return _build(params.get("fields"), filters, allowed, alias)
+
+
+def attr_query_from_payload(payload: dict, allowed: tuple, alias: str) -> AttrQuery:
+    """JSON payload-dan ("fields", "filters"); səhv sahə adı → ValueError."""
+    filters = payload.get("filters") or {}
+    if not isinstance(filters, dict):
+        raise ValueError("filters obyekt olmalıdır")
+    return _build(payload.get("fields"), filters, allowed, alias)
@@ -0,0 +1,255 @@
+# breakers.py
+# -*- coding: utf-8 -*-
+"""
+Xarici asılılıqlar üçün circuit breaker-lər: Oracle (TEKUİS, NECAS), MSSQL, SMB, Node redeem.
+
+Asılılıq çökəndə hər sorğu tam connect/read timeout gözləyir və worker-lər tez tükənir.
+Breaker son window_s saniyədəki çağırışlara baxır:
+  - xəta payı failure_rate-dən, və ya yavaş çağırış payı slow_rate-dən çox olarsa → OPEN;
+  - OPEN müddətində çağırışlar dərhal CircuitOpen atır (fast-fail);
+  - open_s keçəndən sonra HALF_OPEN: bir neçə sınaq çağırışı buraxılır,
+    uğurlu olsa → CLOSED, uğursuz olsa → yenidən OPEN.
+
+CircuitOpen view-dan yuxarı çıxarsa, CircuitOpenMiddleware onu 503 + Retry-After cavabına çevirir.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.deprecation import MiddlewareMixin
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+_DEFAULTS = {
+    "window_s": 30.0,  # statistikanın pəncərəsi
+    "min_calls": 5,  # bu saydan az çağırışla trip olunmur
+    "failure_rate": 0.5,
+    "slow_call_s": 10.0,
+    "slow_rate": 0.8,
+    "open_s": 20.0,  # OPEN → HALF_OPEN
+    "half_open_calls": 1,  # HALF_OPEN-da eyni anda buraxılan sınaq sayı
+}
+
+# Asılılığa görə default fərqlər (settings.CIRCUIT_BREAKERS ilə üstələnir)
+_PRESETS = {
+    "node": {"slow_call_s": 5.0},
+    "mssql": {"slow_call_s": 5.0},
+    "smb": {"slow_call_s": 15.0, "min_calls": 3},
+    "oracle_tekuis": {"slow_call_s": 30.0},
+    "oracle_necas": {"slow_call_s": 30.0},
+}
+
+
+class CircuitOpen(Exception):
+    """Breaker açıqdır — asılılıq çağırılmadan sorğu dərhal rədd edilir."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} circuit is open")
+        self.name = name
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+
+class _Call:
+    """guard() daxilində istisnasız uğursuzluğu (məs. HTTP 5xx) qeyd etmək üçün."""
+
+    __slots__ = ("failed",)
+
+    def __init__(self):
+        self.failed = False
+
+    def fail(self):
+        self.failed = True
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, is_failure=None, **conf):
+        self.name = name
+        self.is_failure = is_failure or (lambda exc: isinstance(exc, Exception))
+        for k, v in _DEFAULTS.items():
+            setattr(self, k, type(v)(conf.get(k, v)))
+        self._lock = threading.Lock()
+        self._calls = deque()  # (ts, failed, slow)
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self.trips = 0
+        self.rejected = 0
+
+    # --- vəziyyət ---
+    def _prune(self, now):
+        edge = now - self.window_s
+        while self._calls and self._calls[0][0] < edge:
+            self._calls.popleft()
+
+    def _open(self, now):
+        self.state = OPEN
+        self._opened_at = now
+        self._probes = 0
+        self.trips += 1
+        logger.warning("[BREAKER] %s → OPEN", self.name)
+
+    def before(self):
+        """Çağırışdan əvvəl: OPEN-dırsa CircuitOpen atır. HALF_OPEN-da sınaq slotu götürür."""
+        now = time.monotonic()
+        with self._lock:
+            if self.state == OPEN:
+                if now - self._opened_at < self.open_s:
+                    self.rejected += 1
+                    raise CircuitOpen(self.name, self.open_s - (now - self._opened_at))
+                self.state = HALF_OPEN
+                self._probes = 0
+                logger.info("[BREAKER] %s → HALF_OPEN", self.name)
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_calls:
+                    self.rejected += 1
+                    raise CircuitOpen(self.name, 1)
+                self._probes += 1
+
+    def abort(self):
+        """Çağırış nəticəsiz bitdi (cancel): statistika dəyişmir, sınaq slotu qaytarılır."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+
+    def after(self, failed: bool, elapsed: float):
+        now = time.monotonic()
+        slow = elapsed >= self.slow_call_s
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                if failed or slow:
+                    self._open(now)
+                else:
+                    self.state = CLOSED
+                    self._calls.clear()
+                    logger.info("[BREAKER] %s → CLOSED", self.name)
+                return
+            if self.state == OPEN:
+                return
+            self._calls.append((now, failed, slow))
+            self._prune(now)
+            n = len(self._calls)
+            if n < self.min_calls:
+                return
+            n_fail = sum(1 for c in self._calls if c[1])
+            n_slow = sum(1 for c in self._calls if c[2])
+            if n_fail / n >= self.failure_rate or n_slow / n >= self.slow_rate:
+                self._open(now)
+
+    # --- istifadə ---
+    @contextmanager
+    def guard(self, exempt=None):
+        """exempt(exc) True olarsa xəta statistikaya düşmür (məs. klientin büdcəsi bitib)."""
+        self.before()
+        call = _Call()
+        t0 = time.monotonic()
+        try:
+            yield call
+        except Exception as e:
+            if exempt is not None and exempt(e):
+                self.abort()
+            else:
+                self.after(self.is_failure(e), time.monotonic() - t0)
+            raise
+        except BaseException:
+            self.abort()
+            raise
+        self.after(call.failed, time.monotonic() - t0)
+
+    @asynccontextmanager
+    async def aguard(self, exempt=None):
+        self.before()
+        call = _Call()
+        t0 = time.monotonic()
+        try:
+            yield call
+        except Exception as e:
+            if exempt is not None and exempt(e):
+                self.abort()
+            else:
+                self.after(self.is_failure(e), time.monotonic() - t0)
+            raise
+        except BaseException:
+            # cancel (klient getdi) asılılığın xətası sayılmır
+            self.abort()
+            raise
+        self.after(call.failed, time.monotonic() - t0)
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            n = len(self._calls)
+            return {
+                "state": self.state,
+                "calls": n,
+                "failures": sum(1 for c in self._calls if c[1]),
+                "slow": sum(1 for c in self._calls if c[2]),
+                "trips": self.trips,
+                "rejected": self.rejected,
+                "retry_after_s": round(max(0.0, self.open_s - (now - self._opened_at)), 1) if self.state == OPEN else 0,
+            }
+
+
+_REGISTRY = {}
+_REG_LOCK = threading.Lock()
+
+
+def breaker(name: str, is_failure=None) -> CircuitBreaker:
+    """Ada görə paylaşılan breaker (proses daxilində bir dənə)."""
+    br = _REGISTRY.get(name)
+    if br is None:
+        with _REG_LOCK:
+            br = _REGISTRY.get(name)
+            if br is None:
+                conf = dict(_PRESETS.get(name, {}))
+                conf.update((getattr(settings, "CIRCUIT_BREAKERS", {}) or {}).get(name, {}))
+                br = _REGISTRY[name] = CircuitBreaker(name, is_failure=is_failure, **conf)
+    return br
+
+
+def breaker_states() -> dict:
+    return {name: br.snapshot() for name, br in sorted(_REGISTRY.items())}
+
+
+def oracle_outage(exc) -> bool:
+    """
+    Oracle xətası asılılığın özünün problemidirmi? SQL/SDE xətaları (zəhərli WKT və s.)
+    breaker üçün sayılmır; bağlantı, sessiya ölümü və call timeout sayılır. Sorğu büdcəsinin
+    (Deadline) yaratdığı call timeout-u çağıran exempt= ilə ayırır (async_utils._GuardedCursor).
+    """
+    import oracledb
+
+    if isinstance(exc, (OSError, TimeoutError, oracledb.OperationalError, oracledb.InterfaceError)):
+        return True
+    if isinstance(exc, oracledb.DatabaseError) and exc.args:
+        err = exc.args[0]
+        if getattr(err, "is_session_dead", False):
+            return True
+        return getattr(err, "full_code", "") in ("DPY-4011", "DPY-4024")
+    return False
+
+
+def circuit_open_response(exc: CircuitOpen):
+    resp = JsonResponse(
+        {"ok": False, "error": "dependency_unavailable", "dependency": exc.name},
+        status=503,
+    )
+    resp["Retry-After"] = str(exc.retry_after)
+    return resp
+
+
+class CircuitOpenMiddleware(MiddlewareMixin):
+    """View-dan çıxan CircuitOpen → 503 + Retry-After (sync və async view-lar üçün)."""
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, CircuitOpen):
+            return circuit_open_response(exception)
+        return None
@@ -0,0 +1,104 @@
+# coalescing.py
+# -*- coding: utf-8 -*-
+"""
+Eyni vaxtda gələn eyni sorğuların birləşdirilməsi (in-flight coalescing).
+
+Bir neçə operator eyni rayona baxanda və ya bir klient eyni sorğunu təkrar göndərəndə
+yalnız birinci sorğu (leader) Oracle-a gedir; qalanları onun cavabının hazır
+serializasiya olunmuş gövdəsini (bytes) paylaşır.
+
+Açar normallaşdırılmış imzadır: mənbə, snap olunmuş extent və ya geometriya hash-i,
+buffer və SRID. Leader klient getdiyi üçün cancel olunarsa, gözləyənlərdən biri yeni
+leader olur (onların sorğusu itmir).
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+_LOCK = threading.Lock()
+# açar -> concurrent.futures.Future[(status, content_type, body)]
+# (asyncio.Future yox: WSGI-də hər sorğunun öz event loop-u var)
+_INFLIGHT = {}
+
+
+class _LeaderGone(Exception):
+    """Leader cancel olundu — gözləyən sorğu özü icra etməlidir."""
+
+
+def snap_bbox(minx: float, miny: float, maxx: float, maxy: float):
+    """
+    Extent-i PARCELS_BBOX_SNAP_DEG torunda xaricə doğru yuvarlaqlaşdırır:
+    nəticə orijinal extent-i tam örtür, yaxın extent-lər isə eyni açara düşür.
+    """
+    step = float(getattr(settings, "PARCELS_BBOX_SNAP_DEG", 0) or 0)
+    if step <= 0:
+        return minx, miny, maxx, maxy
+    return (
+        round(math.floor(minx / step) * step, 9),
+        round(math.floor(miny / step) * step, 9),
+        round(math.ceil(maxx / step) * step, 9),
+        round(math.ceil(maxy / step) * step, 9),
+    )
+
+
+def geom_signature(wkts) -> str:
+    """Sanitizasiya olunmuş WKT siyahısının sıradan asılı olmayan hash-i."""
+    h = hashlib.sha1()
+    for w in sorted(wkts):
+        h.update(w.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _rebuild(shared) -> HttpResponse:
+    status, content_type, body = shared
+    return HttpResponse(body, status=status, content_type=content_type)
+
+
+async def coalesced(key: tuple, make_response):
+    """
+    make_response – arqumentsiz async funksiya, HttpResponse qaytarır.
+    Eyni açarla artıq icra olunan sorğu varsa onun cavabı paylaşılır.
+    """
+    while True:
+        with _LOCK:
+            fut = _INFLIGHT.get(key)
+            leader = fut is None
+            if leader:
+                fut = Future()
+                fut.set_running_or_notify_cancel()  # gözləyənlər onu cancel edə bilməsin
+                _INFLIGHT[key] = fut
+        if leader:
+            break
+        try:
+            # shield: gözləyən cancel olunsa da ortaq nəticə toxunulmaz qalır
+            shared = await asyncio.shield(asyncio.wrap_future(fut))
+        except _LeaderGone:
+            continue
+        logger.debug("[COALESCE] shared %s", key)
+        return _rebuild(shared)
+
+    try:
+        resp = await make_response()
+    except asyncio.CancelledError:
+        fut.set_exception(_LeaderGone())
+        raise
+    except BaseException as e:
+        fut.set_exception(e)
+        raise
+    else:
+        fut.set_result((resp.status_code, resp["Content-Type"], resp.content))
+        return resp
+    finally:
+        with _LOCK:
+            if _INFLIGHT.get(key) is fut:
+                del _INFLIGHT[key]
@@ -0,0 +1,113 @@
+# deadline.py
+# -*- coding: utf-8 -*-
+"""
+Sorğu başına vaxt büdcəsi (deadline) və qismən nəticələr üçün davam tokeni.
+
+Chunk-larla işləyən TEKUİS/NECAS sorğuları büdcə bitəndə dayanır, o ana qədər tam
+bitmiş chunk-ların nəticəsini "partial": true və "continuation" tokeni ilə qaytarır.
+Klient eyni payload-u tokenlə yenidən göndərərək qalan chunk-ları alır.
+
+Büdcə Oracle call_timeout-a ötürülür: tək bir ağır chunk da büdcəni keçə bilməz.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core import signing
+
+_TOKEN_SALT = "corrections.deadline.continuation"
+_TOKEN_MAX_AGE_S = 3600
+
+
+class Deadline:
+    def __init__(self, budget_s: float):
+        self.budget_s = float(budget_s)
+        self.expires_at = time.monotonic() + self.budget_s
+
+    @classmethod
+    def for_endpoint(cls, endpoint: str, requested_ms=None) -> "Deadline":
+        """
+        Büdcə: klientin istədiyi (budget_ms) və ya PARCELS_BUDGET_MS[endpoint];
+        hər iki halda PARCELS_BUDGET_MAX_MS ilə məhdudlaşır.
+        """
+        conf = getattr(settings, "PARCELS_BUDGET_MS", {}) or {}
+        cap_ms = int(getattr(settings, "PARCELS_BUDGET_MAX_MS", 60000))
+        budget_ms = int(conf.get(endpoint, cap_ms))
+        try:
+            if requested_ms not in (None, ""):
+                budget_ms = int(float(requested_ms))
+        except (TypeError, ValueError):
+            pass
+        return cls(max(0.5, min(budget_ms, cap_ms)) / 1000.0)
+
+    @property
+    def budget_ms(self) -> int:
+        return int(round(self.budget_s * 1000))
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    def expired(self, reserve_s: float = 0.0) -> bool:
+        return self.remaining() <= reserve_s
+
+    def call_timeout_ms(self) -> int:
+        """Qalan büdcə və ORACLE_CALL_TIMEOUT_MS-dən kiçiyi (ən azı 1 ms)."""
+        rem_ms = max(1, int(self.remaining() * 1000))
+        cap = int(getattr(settings, "ORACLE_CALL_TIMEOUT_MS", 0) or 0)
+        return min(rem_ms, cap) if cap > 0 else rem_ms
+
+    def apply(self, conn) -> None:
+        """
+        call_timeout real oracledb bağlantısına düşür (fasadlar onu ötürür). Bağlantı breaker
+        fasadıdırsa (async_utils._GuardedConnection) deadline ona bağlanır: büdcə bitdiyi üçün
+        yaranan DPY-4024 ortaq oracle_* breaker-ini açmır.
+        """
+        conn.call_timeout = self.call_timeout_ms()
+        if hasattr(conn, "deadline_hit"):
+            conn.deadline = self
+
+    def hit_by(self, exc) -> bool:
+        """Oracle call timeout (DPY-4024) büdcə bitdiyi üçün baş veribsə True."""
+        err = exc.args[0] if getattr(exc, "args", None) else None
+        return getattr(err, "full_code", "") == "DPY-4024" and self.expired(0.05)
+
+
+def wkt_list_digest(wkts) -> str:
+    """Sıradan asılı hash — offset-lər məhz bu sıraya aiddir."""
+    h = hashlib.sha1()
+    for w in wkts:
+        h.update(w.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def make_continuation(kind: str, digest: str, offsets: dict) -> str:
+    """offsets: {"tekuis": 400, "necas": None, ...} — None → həmin mənbə tamamlanıb."""
+    return signing.dumps({"k": kind, "d": digest, "o": offsets}, salt=_TOKEN_SALT, compress=True)
+
+
+def read_continuation(token: str, kind: str, digest: str) -> dict:
+    """Tokeni yoxlayır; başqa sorğuya / dəyişmiş payload-a aiddirsə ValueError."""
+    try:
+        data = signing.loads(token, salt=_TOKEN_SALT, max_age=_TOKEN_MAX_AGE_S)
+    except signing.BadSignature as e:
+        raise ValueError("continuation tokeni etibarsızdır və ya vaxtı keçib") from e
+    if data.get("k") != kind or data.get("d") != digest:
+        raise ValueError("continuation tokeni bu sorğuya aid deyil")
+    return data.get("o") or {}
+
+
+def continuation_fields(kind: str, digest: str, offsets: dict, total: int) -> dict:
+    """
+    Cavaba əlavə olunan sahələr: "partial", qismən olduqda "continuation" və "progress".
+    offsets – mənbə üzrə növbəti offset (None → mənbə tamamlanıb).
+    """
+    pending = {src: off for src, off in offsets.items() if off is not None}
+    if not pending:
+        return {"partial": False}
+    return {
+        "partial": True,
+        "continuation": make_continuation(kind, digest, offsets),
+        "progress": {src: {"done": off, "total": int(total)} for src, off in pending.items()},
+    }
@@ -0,0 +1,80 @@
+# feature_cache.py
+# -*- coding: utf-8 -*-
+"""
+TEKUİS parselləri üçün geometriya cache-i (iki fazalı oxuma).
+
+Parsellər nadir dəyişir, amma hər sürüşdürmədə eyni geometriya LOB-ları yenidən
+endirilirdi. İndi:
+  1-ci faza – ucuz sorğu yalnız (ROWID, ORA_ROWSCN) qaytarır;
+  2-ci faza – geometriya və atributlar yalnız cache-də olmayan və ya SCN-i dəyişmiş
+              ROWID-lər üçün oxunur;
+cavab cache + delta-dan yığılır.
+
+ORA_ROWSCN (ROWDEPENDENCIES olmadan) blok səviyyəsindədir: qonşu sətir dəyişəndə də
+artır → lazımsız təkrar oxuma ola bilər, köhnə geometriya qaytarılmır.
+
+Cache "parcel_geoms" Django cache alias-ındadır (settings.CACHES); hər sətir üçün
+(SCN, geometriya WKB, bütün atributlar) saxlanır — GeoJSON koordinat siyahılarından
+xeyli yığcamdır. fields= proyeksiyası cavab yığılarkən tətbiq olunur.
+"""
+
+import shapely
+from django.conf import settings
+from django.core.cache import caches
+from shapely.geometry import mapping, shape
+
+_ALIAS = "parcel_geoms"
+
+
+def two_phase_enabled() -> bool:
+    return bool(getattr(settings, "PARCELS_TWO_PHASE", True)) and _ALIAS in settings.CACHES
+
+
+def _key(source: str, rid: str) -> str:
+    return f"{source}:{rid}"
+
+
+def lookup(source: str, pairs):
+    """
+    pairs – [(rid, scn), ...].
+    Qaytarır: (hits {rid: feature}, missing [rid, ...]) — SCN-i dəyişənlər missing sayılır.
+    """
+    keys = {_key(source, rid): (rid, scn) for rid, scn in pairs}
+    found = caches[_ALIAS].get_many(list(keys))
+    fresh, missing = [], []
+    for k, (rid, scn) in keys.items():
+        entry = found.get(k)
+        if entry is not None and len(entry) == 3 and entry[0] == scn:
+            fresh.append((rid, entry[1], entry[2]))
+        else:
+            missing.append(rid)
+    geoms = shapely.from_wkb([wkb for _rid, wkb, _props in fresh])
+    hits = {
+        rid: {"type": "Feature", "geometry": mapping(g) if g is not None else None, "properties": props}
+        for (rid, _wkb, props), g in zip(fresh, geoms)
+    }
+    return hits, missing
+
+
+def _entry(scn, feature: dict):
+    geom = feature.get("geometry")
+    wkb = shapely.to_wkb(shape(geom)) if geom else None
+    return scn, wkb, feature.get("properties") or {}
+
+
+def store(source: str, items) -> None:
+    """items – [(rid, scn, feature), ...]."""
+    if items:
+        ttl = int(getattr(settings, "PARCELS_GEOM_CACHE_S", 6 * 3600))
+        caches[_ALIAS].set_many({_key(source, rid): _entry(scn, feat) for rid, scn, feat in items}, ttl)
+
+
+def project(feature: dict, fields, keep=("SOURCE",)) -> dict:
+    """Cache-dəki tam feature-dən yalnız istənilən atributlarla surət."""
+    props = feature.get("properties") or {}
+    wanted = set(fields) | set(keep)
+    return {
+        "type": "Feature",
+        "geometry": feature.get("geometry"),
+        "properties": {k: v for k, v in props.items() if k in wanted},
+    }
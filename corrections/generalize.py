@@ -0,0 +1,175 @@
+# generalize.py
+# -*- coding: utf-8 -*-
+"""
+Kiçik zoom-larda parsel cavablarının sadələşdirilməsi (generalization).
+
+Klient ?zoom=<web mercator zoom> və ya ?resolution=<m/px, EPSG:3857> göndərir.
+Dəyər tam zoom zolağına (band) yuvarlaqlaşdırılır; PARCELS_SIMPLIFY_MAX_ZOOM-dan
+böyük zoom-larda cavab dəyişmir.
+
+Sadələşdirmə Shapely coverage_simplify ilə bütün partiya üzərində aparılır: qonşu
+parsellərin ortaq sərhədləri eyni cür sadələşir, aralarında boşluq/üst-üstə düşmə
+yaranmır. Partiyanın xarici sərhədi (səhifə kənarı) toxunulmaz qalır ki, səhifələr
+də bir-birinə yapışsın. coverage_simplify girişi yoxlamır (üst-üstə düşən poliqonlarda
+xəta vermir, sürüşmüş/sliver nəticə qaytarır) — ona görə əvvəlcə coverage_is_valid,
+etibarsız partiya isə hər geometriya ayrıca sadələşdirilir. Tolerans çıxış SRID-inin
+vahidinə (dərəcə / metr / fut) çevrilir. Nəticə zolaq üzrə Django cache-də saxlanır.
+"""
+
+import hashlib
+import logging
+import math
+from functools import lru_cache
+
+import shapely
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from pyproj import CRS
+from shapely.geometry import mapping, shape
+
+logger = logging.getLogger(__name__)
+
+_RES0_M = 156543.03392804097  # zoom 0-da EPSG:3857 piksel ölçüsü (m)
+_M_PER_DEG = 111320.0
+_POLYGONAL = ("Polygon", "MultiPolygon")
+
+
+def zoom_band(params):
+    """
+    GET/payload parametrlərindən zoom zolağı. zoom və ya resolution yoxdursa,
+    yaxud zoom PARCELS_SIMPLIFY_MAX_ZOOM-dan böyükdürsə → None (tam detal).
+    """
+    try:
+        if params.get("zoom") not in (None, ""):
+            zoom = float(params.get("zoom"))
+        elif params.get("resolution") not in (None, ""):
+            res = float(params.get("resolution"))
+            if res <= 0:
+                return None
+            zoom = math.log2(_RES0_M / res)
+        else:
+            return None
+    except (TypeError, ValueError):
+        return None
+    band = max(0, int(math.floor(zoom)))
+    return band if band <= int(getattr(settings, "PARCELS_SIMPLIFY_MAX_ZOOM", 16)) else None
+
+
+@lru_cache(maxsize=32)
+def _units_per_m(srid: int) -> float:
+    """SRID-in koordinat vahidi: coğrafi → 1/111320 (°/m), proyeksiyalı → 1/(vahidin metrlə ölçüsü)."""
+    crs = CRS.from_epsg(int(srid))
+    if crs.is_geographic:
+        return 1.0 / _M_PER_DEG
+    factor = crs.axis_info[0].unit_conversion_factor if crs.axis_info else 1.0
+    return 1.0 / float(factor or 1.0)
+
+
+def band_tolerance(band: int, srid: int = 4326) -> float:
+    """Zolağın piksel ölçüsü × PARCELS_SIMPLIFY_PX, SRID-in vahidində."""
+    tol_m = _RES0_M / (2 ** band) * float(getattr(settings, "PARCELS_SIMPLIFY_PX", 0.5))
+    return tol_m * _units_per_m(srid)
+
+
+def simplify_features(features: list, band: int, srid: int = 4326) -> list:
+    """
+    GeoJSON feature-lərin poliqonlarını topologiyanı qoruyaraq sadələşdirir (yerində).
+    Partiya etibarlı coverage deyilsə (üst-üstə düşmə, etibarsız geometriya) hər geometriya
+    ayrıca sadələşdirilir.
+    """
+    idx, geoms = [], []
+    for i, f in enumerate(features):
+        g = f.get("geometry") or {}
+        if g.get("type") in _POLYGONAL:
+            try:
+                geoms.append(shape(g))
+                idx.append(i)
+            except Exception:
+                continue
+    if not geoms:
+        return features
+
+    tol = band_tolerance(band, srid)
+    n_before = int(shapely.get_num_coordinates(geoms).sum())
+    try:
+        coverage_ok = bool(shapely.is_valid(geoms).all() and shapely.coverage_is_valid(geoms))
+    except shapely.errors.GEOSException:
+        coverage_ok = False
+    if coverage_ok:
+        out = shapely.coverage_simplify(geoms, tol, simplify_boundary=False)
+    else:
+        logger.info("[SIMPLIFY] input is not a valid coverage → per-geometry simplify")
+        out = shapely.simplify(geoms, tol, preserve_topology=True)
+
+    for i, g in zip(idx, out):
+        if g is not None and not g.is_empty:
+            features[i]["geometry"] = mapping(g)
+    logger.debug("[SIMPLIFY] band=%d tol=%g vertices %d → %d",
+                 band, tol, n_before, int(shapely.get_num_coordinates(out).sum()))
+    return features
+
+
+def simplify_features_cached(scope: str, features: list, band: int, srid: int = 4326, versions=None) -> list:
+    """
+    Lokal cədvəllər (tekuis_parcel, gis_data) üçün.
+    versions – feature-lərlə eyni sırada sətir versiyaları (məs. PostgreSQL "ctid:xmin"):
+    açar onların hash-idir, yadda saxlanmış dəyişiklikdən sonra köhnə sadələşdirmə qaytarılmır
+    və geometriyalar serializasiya olunmur. Verilməyibsə açar geometriyaların WKB hash-idir.
+    """
+    h = hashlib.sha1(scope.encode("utf-8"))
+    if versions is not None:
+        for v in versions:
+            h.update(str(v).encode("utf-8"))
+            h.update(b"\0")
+    else:
+        for f in features:
+            try:
+                h.update(shapely.to_wkb(shape(f.get("geometry"))))
+            except Exception:
+                h.update(b"-")
+            h.update(b"\0")
+    key = _cache_key((scope, h.hexdigest(), band, srid))
+    geoms = cache.get(key)
+    if geoms is None or len(geoms) != len(features):
+        simplify_features(features, band, srid)
+        cache.set(key, [f.get("geometry") for f in features], int(getattr(settings, "PARCELS_SIMPLIFY_CACHE_S", 300)))
+        return features
+    for f, g in zip(features, geoms):
+        f["geometry"] = g
+    return features
+
+
+def _cache_key(key: tuple) -> str:
+    return "parcels:simplified:" + hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+
+def cached_band_response(key: tuple):
+    hit = cache.get(_cache_key(key))
+    if hit is None:
+        return None
+    status, content_type, body = hit
+    return HttpResponse(body, status=status, content_type=content_type)
+
+
+def store_band_response(key: tuple, resp) -> None:
+    """Yalnız uğurlu (200, mənbə xətası olmayan) sadələşdirilmiş cavablar saxlanır."""
+    if resp.status_code == 200 and not resp.has_header("X-Source-Errors"):
+        ttl = int(getattr(settings, "PARCELS_SIMPLIFY_CACHE_S", 300))
+        cache.set(_cache_key(key), (resp.status_code, resp["Content-Type"], resp.content), ttl)
+
+
+async def band_cached(key: tuple, band, make_response):
+    """
+    band None deyilsə cavabı (key, band) üzrə cache-dən verir, yoxdursa make_response()
+    icra olunur və nəticə saxlanır. make_response – arqumentsiz async funksiya.
+    """
+    if band is None:
+        return await make_response()
+    key = (*key, "band", band)
+    resp = cached_band_response(key)
+    if resp is not None:
+        return resp
+    resp = await make_response()
+    store_band_response(key, resp)
+    return resp
@@ -0,0 +1,165 @@
+# grid_agg.py
+# -*- coding: utf-8 -*-
+"""
+Kiçik zoom-lar üçün parsellərin grid üzrə aqreqasiyası.
+
+?agg=grid olduqda bbox endpoint-ləri ayrı-ayrı parsellər yerinə grid xanaları qaytarır:
+hər xana üçün parsel sayı (count), cəmi sahə (area_ha) və dominant kateqoriya (dominant).
+Parsel envelope-unun mərkəzi hansı xanaya düşürsə, o xanaya sayılır; hesablama DB-də
+(Oracle GROUP BY / PostGIS) aparılır, Python-a yalnız xana sətirləri gəlir.
+
+Xana ölçüsü (dərəcə): ?cell=<deg>, yoxdursa ?zoom/?resolution üzrə PARCELS_GRID_PX piksel.
+Grid qlobal olaraq 0-a bağlıdır (xana = floor(x / cell)) — xəritə sürüşəndə xanalar
+yerindən oynamır və cache açarları sabit qalır.
+"""
+
+import math
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.views.decorators.http import require_GET
+
+from .admission import admit
+from .coalescing import snap_bbox
+
+_RES0_M = 156543.03392804097
+_M_PER_DEG = 111320.0
+
+
+def grid_cell(params, bbox):
+    """
+    agg=grid deyilsə None. Əks halda xana ölçüsü (dərəcə); extent-də PARCELS_GRID_MAX_CELLS-dən
+    çox xana yaranarsa ölçü böyüdülür. Səhv parametr → ValueError.
+    """
+    if (params.get("agg") or "").strip().lower() != "grid":
+        return None
+    minx, miny, maxx, maxy = bbox
+    try:
+        if params.get("cell") not in (None, ""):
+            cell = float(params.get("cell"))
+        else:
+            if params.get("zoom") not in (None, ""):
+                res_m = _RES0_M / (2 ** float(params.get("zoom")))
+            elif params.get("resolution") not in (None, ""):
+                res_m = float(params.get("resolution"))
+            else:
+                res_m = max(maxx - minx, maxy - miny) * _M_PER_DEG / 1024.0  # ~1024 px ekran
+            cell = res_m * float(getattr(settings, "PARCELS_GRID_PX", 64)) / _M_PER_DEG
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("cell/zoom/resolution ədədi olmalıdır")
+    if not cell > 0:
+        raise ValueError("cell müsbət olmalıdır")
+
+    max_cells = int(getattr(settings, "PARCELS_GRID_MAX_CELLS", 10000))
+    n = _cell_count(bbox, cell)
+    if n > max_cells:
+        cell *= math.sqrt(n / max_cells)
+    # 2 əhəmiyyətli rəqəmə yuxarı yuvarlaqlaşdır: yaxın zoom-lar eyni grid-ə düşür
+    # (cache/koalessensiya), xana yalnız böyüyür → limit pozulmur
+    cell = _ceil_2sig(cell)
+    while _cell_count(bbox, cell) > max_cells:
+        cell = _ceil_2sig(cell * 1.01)
+    return cell
+
+
+def _ceil_2sig(x: float) -> float:
+    step = 10.0 ** (math.floor(math.log10(x)) - 1)
+    return round(math.ceil(round(x / step, 9)) * step, 12)
+
+
+def _cell_count(bbox, cell: float) -> int:
+    """Extent-in toxunduğu tor xanalarının sayı (SQL-dəki FLOOR(x / cell) ilə eyni)."""
+    minx, miny, maxx, maxy = bbox
+    nx = math.floor(maxx / cell) - math.floor(minx / cell) + 1
+    ny = math.floor(maxy / cell) - math.floor(miny / cell) + 1
+    return int(nx * ny)
+
+
+def cells_to_fc(rows, cell: float, source: str) -> dict:
+    """(gx, gy, count, area_ha, dominant) sətirləri → xana poliqonlarından FeatureCollection."""
+    features = []
+    total = 0
+    for gx, gy, n, area_ha, dominant in rows:
+        gx, gy, n = int(gx), int(gy), int(n)
+        x0, y0 = gx * cell, gy * cell
+        x1, y1 = x0 + cell, y0 + cell
+        features.append({
+            "type": "Feature",
+            "geometry": {"type": "Polygon", "coordinates": [[[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]]},
+            "properties": {
+                "gx": gx,
+                "gy": gy,
+                "count": n,
+                "area_ha": float(area_ha) if area_ha is not None else None,
+                "dominant": dominant,
+                "SOURCE": source,
+            },
+        })
+        total += n
+    return {
+        "type": "FeatureCollection",
+        "features": features,
+        "agg": {"mode": "grid", "cell": cell, "cells": len(features), "count": total},
+    }
+
+
+# ---------------------------
+# Lokal cədvəllər (PostGIS): tekuis_parcel, gis_data
+# ---------------------------
+_LOCAL_LAYERS = {
+    # layer: (cədvəl, aktivlik şərti, sahə ifadəsi, kateqoriya ifadəsi)
+    "tekuis": ("tekuis_parcel", "status = 1", "sahe_ha", "kateqoriya"),
+    "gis": ("gis_data", "COALESCE(status, 1) = 1", "ST_Area(geom::geography) / 10000.0", "NULL"),
+}
+
+
+def _local_grid_rows(layer: str, bbox, cell: float):
+    table, active, area_expr, cat_expr = _LOCAL_LAYERS[layer]
+    with connection.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT floor(ST_X(c) / %s) AS gx,
+                   floor(ST_Y(c) / %s) AS gy,
+                   COUNT(*),
+                   SUM(area_ha),
+                   mode() WITHIN GROUP (ORDER BY cat)
+              FROM (
+                    SELECT ST_Centroid(ST_Envelope(geom)) AS c,
+                           {area_expr} AS area_ha,
+                           {cat_expr} AS cat
+                      FROM {table}
+                     WHERE {active}
+                       AND geom && ST_MakeEnvelope(%s, %s, %s, %s, 4326)
+                   ) s
+             GROUP BY 1, 2
+            """,
+            [cell, cell, *bbox],
+        )
+        return cur.fetchall()
+
+
+@require_GET
+@admit("interactive")
+def local_grid_by_bbox(request):
+    """
+    GET /api/local/parcels/grid/?layer=tekuis|gis&minx&miny&maxx&maxy[&cell|&zoom|&resolution]
+    Lokal tekuis_parcel (status=1) və ya gis_data üzrə grid aqreqasiyası.
+    """
+    layer = (request.GET.get("layer") or "tekuis").strip().lower()
+    if layer not in _LOCAL_LAYERS:
+        return HttpResponseBadRequest("layer yalnız tekuis və ya gis ola bilər.")
+    try:
+        bbox = snap_bbox(*(float(request.GET.get(k)) for k in ("minx", "miny", "maxx", "maxy")))
+    except (TypeError, ValueError):
+        return HttpResponseBadRequest("minx/miny/maxx/maxy tələb olunur və ədədi olmalıdır.")
+
+    params = request.GET.copy()
+    params["agg"] = "grid"
+    try:
+        cell = grid_cell(params, bbox)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    rows = _local_grid_rows(layer, bbox, cell)
+    return JsonResponse(cells_to_fc(rows, cell, "LOCAL_TEKUIS" if layer == "tekuis" else "LOCAL_GIS"))
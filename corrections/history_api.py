@@ -3,8 +3,10 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_GET
 from django.db import connection
 
+from .admission import admit
+from .async_utils import run_db_cancellable
 # Redeem üçün öz mövcud utilinizi istifadə edirik (views.py-dən)
-from .views import _redeem_ticket
+from .views import _aredeem_ticket
 
 
 def _has_row(sql: str, params=()) -> bool:
@@ -85,8 +87,41 @@ def _format_history_msg(user_full_name: str | None, created_dt: str | None) -> s
 
 
 
+def _fill_history_items(out: dict, meta_id: int) -> None:
+    """Lokal DB yoxlamaları (sinxron; async view-dan run_db_cancellable ilə çağırılır)."""
+    has_row, ok = _check_attach(meta_id)
+    out["items"]["attach"] = {"ok": ok, "has_row": has_row}
+    if ok:
+        out["messages"]["attach"] = "Qoşma lay əlavə edildi"
+
+        # hm-msg üçün user + created_date
+    u, d = _get_last_active_info("attach_file", "meta_id", meta_id)
+    out["messages"]["attach"] = _format_history_msg(u, d)
+
+
+    has_row, ok = _check_gis(meta_id)
+    out["items"]["gis"] = {"ok": ok, "has_row": has_row}
+    if ok:
+        out["messages"]["gis"] = "Tədqiqat layı əlavə edildi"
+
+        # hm-msg üçün user + created_date
+    u, d = _get_last_active_info("gis_data", "fk_metadata", meta_id)
+    out["messages"]["gis"] = _format_history_msg(u, d)
+
+
+    has_row, ok = _check_tekuis(meta_id)
+    out["items"]["tekuis"] = {"ok": ok, "has_row": has_row}
+    if ok:
+        out["messages"]["tekuis"] = "TEKUİS parselləri local məlumat bazasına daxil edilib"
+
+        # hm-msg üçün user + created_date
+    u, d = _get_last_active_info("tekuis_parcel", "meta_id", meta_id)
+    out["messages"]["tekuis"] = _format_history_msg(u, d)
+
+
 @require_GET
-def history_status(request):
+@admit("interactive")
+async def history_status(request):
     """
     GET /api/history/status/?ticket=...&meta_id=...
 
@@ -116,7 +151,7 @@ def history_status(request):
 
     # 2) meta_id verilməyibsə, redeem ilə ticket → fk_metadata
     if meta_id is None and ticket:
-        meta_id = _redeem_ticket(ticket)  # valid deyilsə None qaytaracaq
+        meta_id = await _aredeem_ticket(ticket)  # valid deyilsə None qaytaracaq
 
     # Cavab skeleti
     out = {
@@ -140,34 +175,6 @@ def history_status(request):
         return JsonResponse({"ok": False, "error": "unauthorized", **out}, status=401)
 
     # Yoxlamalar
-    has_row, ok = _check_attach(meta_id)
-    out["items"]["attach"] = {"ok": ok, "has_row": has_row}
-    if ok:
-        out["messages"]["attach"] = "Qoşma lay əlavə edildi"
-
-        # hm-msg üçün user + created_date
-    u, d = _get_last_active_info("attach_file", "meta_id", meta_id)
-    out["messages"]["attach"] = _format_history_msg(u, d)
-
-
-    has_row, ok = _check_gis(meta_id)
-    out["items"]["gis"] = {"ok": ok, "has_row": has_row}
-    if ok:
-        out["messages"]["gis"] = "Tədqiqat layı əlavə edildi"
-
-        # hm-msg üçün user + created_date
-    u, d = _get_last_active_info("gis_data", "fk_metadata", meta_id)
-    out["messages"]["gis"] = _format_history_msg(u, d)
-
-
-    has_row, ok = _check_tekuis(meta_id)
-    out["items"]["tekuis"] = {"ok": ok, "has_row": has_row}
-    if ok:
-        out["messages"]["tekuis"] = "TEKUİS parselləri local məlumat bazasına daxil edilib"
-
-        # hm-msg üçün user + created_date
-    u, d = _get_last_active_info("tekuis_parcel", "meta_id", meta_id)
-    out["messages"]["tekuis"] = _format_history_msg(u, d)
-
+    await run_db_cancellable(_fill_history_items, out, meta_id)
 
     return JsonResponse(out)
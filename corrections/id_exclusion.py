@@ -0,0 +1,195 @@
+# id_exclusion.py
+# -*- coding: utf-8 -*-
+"""
+BBOX endpoint-ləri üçün klientdə artıq olan parsellərin çıxarılması (?have=).
+
+Xəritə əvvəlki extent-lərdən yüklənmiş feature-ləri vector source-da saxlayır; yeni
+sorğuda həmin ID-ləri kompakt şəkildə göndərir, server onları cavabdan çıxarır —
+üst-üstə düşən extent-lər arasında sürüşdürəndə yalnız yeni görünən parsellər gəlir.
+
+Formatlar (tam ədəd ID-lər):
+  ?have=1-50,60,70-80          – aralıqlar (sıra vacib deyil, üst-üstə düşə bilər)
+  ?have=b:<start>:<base64url>  – bitmap: i-ci bit (LSB-first) → ID = start + i
+
+Tam ədədə çevrilməyən açarlar heç vaxt çıxarılmır (həmişə göndərilir) — hash
+toqquşması ucbatından parselin itməsi mümkün deyil.
+
+parse_id_list / parse_rowid_list / order_by_ids – by-ids endpoint-ləri üçün ID siyahısı və cavab sırası.
+"""
+
+import base64
+import binascii
+import hashlib
+import re
+from bisect import bisect_right
+
+from django.conf import settings
+
+from .attr_query import AttrQuery
+
+
+class IdSet:
+    """Birləşdirilmiş, sıralı [lo, hi] aralıqları; üzvlük bisect ilə."""
+
+    def __init__(self, ranges):
+        merged = []
+        for lo, hi in sorted(ranges):
+            if merged and lo <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], hi)
+            else:
+                merged.append([lo, hi])
+        self._lo = [r[0] for r in merged]
+        self._hi = [r[1] for r in merged]
+
+    def __len__(self):
+        return sum(hi - lo + 1 for lo, hi in zip(self._lo, self._hi))
+
+    def __contains__(self, value) -> bool:
+        n = _as_int(value)
+        if n is None:
+            return False
+        i = bisect_right(self._lo, n) - 1
+        return i >= 0 and n <= self._hi[i]
+
+    @property
+    def digest(self) -> str:
+        """Koalessensiya / cache açarları üçün qısa imza (normallaşdırılmış aralıqlardan)."""
+        raw = repr((self._lo, self._hi))
+        return hashlib.sha1(raw.encode("ascii")).hexdigest()[:12]
+
+
+def _as_int(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else None
+    s = str(value).strip()
+    return int(s) if s.isdigit() else None
+
+
+def _max_ranges() -> int:
+    return int(getattr(settings, "PARCELS_HAVE_MAX_RANGES", 20000))
+
+
+def _parse_ranges(raw: str):
+    out = []
+    for part in raw.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        lo, sep, hi = part.partition("-")
+        lo = int(lo)
+        hi = int(hi) if sep else lo
+        if hi < lo:
+            raise ValueError(f"have: səhv aralıq {part}")
+        out.append((lo, hi))
+        if len(out) > _max_ranges():
+            raise ValueError(f"have: ən çox {_max_ranges()} aralıq")
+    return out
+
+
+def _parse_bitmap(raw: str):
+    start_s, _, data = raw.partition(":")
+    start = int(start_s)
+    try:
+        bits = base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+    except (binascii.Error, ValueError) as e:
+        raise ValueError("have: bitmap base64url olmalıdır") from e
+    out, run = [], None
+    for byte_i, byte in enumerate(bits):
+        for bit in range(8):
+            n = start + byte_i * 8 + bit
+            if byte >> bit & 1:
+                if run is not None and run[1] == n - 1:
+                    run[1] = n
+                else:
+                    run = [n, n]
+                    out.append(run)
+    if len(out) > _max_ranges():
+        raise ValueError(f"have: ən çox {_max_ranges()} aralıq")
+    return [tuple(r) for r in out]
+
+
+def parse_have(raw):
+    """have parametri → IdSet; boşdursa None. Səhv format → ValueError."""
+    raw = (raw or "").strip()
+    if not raw:
+        return None
+    try:
+        ranges = _parse_bitmap(raw[2:]) if raw.startswith("b:") else _parse_ranges(raw)
+    except ValueError as e:
+        if str(e).startswith("have:"):
+            raise
+        raise ValueError("have: ID-lər tam ədəd olmalıdır") from e
+    return IdSet(ranges) if ranges else None
+
+
+def with_key_field(q: AttrQuery, allowed: tuple, key: str) -> AttrQuery:
+    """fields= açar sütunu saxlamırsa, onu əlavə edir (çıxarma üçün lazımdır)."""
+    if key in q.fields:
+        return q
+    fields = tuple(c for c in allowed if c in q.fields or c == key)
+    return AttrQuery(fields, q.filters, q.alias)
+
+
+def exclude_known(features: list, have: IdSet, key: str):
+    """(qalan feature-lər, çıxarılanların sayı)."""
+    if have is None:
+        return features, 0
+    kept = [f for f in features if (f.get("properties") or {}).get(key) not in have]
+    return kept, len(features) - len(kept)
+
+
+def parse_id_list(raw, numeric: bool):
+    """
+    JSON siyahısı və ya vergüllə ayrılmış sətir → təkrarsız ID siyahısı (sıra saxlanır).
+    numeric=True → tam ədədlər. Boş, səhv və ya PARCELS_BY_ID_MAX-dan uzun → ValueError.
+    """
+    items = raw if isinstance(raw, (list, tuple)) else str(raw or "").split(",")
+    out, seen = [], set()
+    for v in items:
+        if v is None or str(v).strip() == "":
+            continue
+        v = _as_int(v) if numeric else str(v).strip()
+        if v is None:
+            raise ValueError("ids: ID-lər tam ədəd olmalıdır")
+        if v not in seen:
+            seen.add(v)
+            out.append(v)
+    cap = int(getattr(settings, "PARCELS_BY_ID_MAX", 5000))
+    if not out:
+        raise ValueError("ids boşdur")
+    if len(out) > cap:
+        raise ValueError(f"ids: ən çox {cap} ID")
+    return out
+
+
+# Oracle genişləndirilmiş ROWID: 18 simvol, base64 əlifbası (OOOOOO FFF BBBBBB RRR)
+_ROWID_RE = re.compile(r"[A-Za-z0-9+/]{18}")
+
+
+def parse_rowid_list(raw):
+    """parse_id_list(numeric=False) + hər element ROWID formatında olmalıdır (əks halda ValueError)."""
+    out = parse_id_list(raw, numeric=False)
+    bad = [v for v in out if not _ROWID_RE.fullmatch(v)]
+    if bad:
+        raise ValueError(f"rids: yanlış ROWID formatı: {bad[0][:32]!r}")
+    return out
+
+
+def order_by_ids(features: list, ids: list, key: str):
+    """
+    Feature-ləri sorğudakı ID sırası ilə düzür; (features, tapılmayan ID-lər).
+    Eyni ID-li bir neçə sətir (məs. NECAS-da) qonşu qalır.
+    """
+    def norm(v):
+        n = _as_int(v)
+        return str(n) if n is not None else str(v).strip()
+
+    pos = {norm(v): i for i, v in enumerate(ids)}
+    keyed = [(norm((f.get("properties") or {}).get(key)), f) for f in features]
+    found = {k for k, _f in keyed}
+    keyed.sort(key=lambda kf: pos.get(kf[0], len(ids)))
+    return [f for _k, f in keyed], [v for v in ids if norm(v) not in found]
@@ -0,0 +1,94 @@
+# bench_tekuis_validation.py
+# -*- coding: utf-8 -*-
+"""
+validate_tekuis üçün sintetik benchmark.
+
+  python manage.py bench_tekuis_validation --n 1000 --n 10000
+  python manage.py bench_tekuis_validation --meta-id 123 --engine overlay --engine coverage
+  python manage.py bench_tekuis_validation --n 10000 --workers 1 --workers 4 --workers 8
+  python manage.py bench_tekuis_validation --meta-id 123 --mode db
+
+Sintetik: Bakı ətrafında ~50 m-lik kvadrat parsellərdən grid qurulur; --overlap payı qədər
+parsel bir neçə metr böyüdülür (qonşuları ilə kəsişir). Boşluq (gap) yaradılmır —
+ignore cədvəlinə DB sorğusu getmir, ölçülən yalnız həndəsi işdir.
+Real: --meta-id üzrə tekuis_parcel-in aktiv (status=1) parselləri (DB lazımdır).
+"""
+
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from corrections.tekuis_validation import validate_tekuis
+
+_X0, _Y0 = 49.80, 40.40  # Bakı
+_STEP = 0.0005           # ~45 m
+
+
+def synthetic_fc(n: int, overlap: float, seed: int = 1) -> dict:
+    rnd = random.Random(seed)
+    cols = max(1, int(n ** 0.5))
+    features = []
+    for k in range(n):
+        cx, cy = k % cols, k // cols
+        x0, y0 = _X0 + cx * _STEP, _Y0 + cy * _STEP
+        x1, y1 = _X0 + (cx + 1) * _STEP, _Y0 + (cy + 1) * _STEP  # qonşu kənarları dəqiq üst-üstə
+        if rnd.random() < overlap:
+            grow = _STEP * rnd.uniform(0.02, 0.1)
+            x1, y1 = x1 + grow, y1 + grow
+        ring = [[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]
+        features.append({"type": "Feature", "properties": {}, "geometry": {"type": "Polygon", "coordinates": [ring]}})
+    return {"type": "FeatureCollection", "features": features}
+
+
+def ticket_fc(meta_id: int) -> dict:
+    with connection.cursor() as cur:
+        cur.execute(
+            "SELECT ST_AsGeoJSON(geom) FROM tekuis_parcel WHERE meta_id = %s AND COALESCE(status, 1) = 1",
+            [int(meta_id)],
+        )
+        rows = cur.fetchall()
+    features = [{"type": "Feature", "properties": {}, "geometry": json.loads(g)} for (g,) in rows if g]
+    return {"type": "FeatureCollection", "features": features}
+
+
+class Command(BaseCommand):
+    help = "validate_tekuis üçün sintetik benchmark (parsel sayı üzrə müddət)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--n", type=int, action="append", help="parsel sayı (bir neçə dəfə verilə bilər)")
+        parser.add_argument("--meta-id", type=int, action="append", help="real ticket (tekuis_parcel.meta_id)")
+        parser.add_argument("--engine", action="append", choices=("overlay", "coverage"),
+                            help="mühərrik (default: hər ikisi)")
+        parser.add_argument("--workers", type=int, action="append",
+                            help="bölmələrlə paralel rejim (proses sayı); verilməyibsə tək proses")
+        parser.add_argument("--mode", choices=("memory", "db"), default="memory",
+                            help="icra rejimi (db – PostGIS müvəqqəti cədvəl)")
+        parser.add_argument("--overlap", type=float, default=0.05, help="böyüdülən parsellərin payı")
+        parser.add_argument("--repeat", type=int, default=1)
+
+    def handle(self, *args, **opts):
+        cases = [(f"meta_id={m}", m, ticket_fc(m)) for m in opts["meta_id"] or []]
+        if not cases or opts["n"]:
+            cases += [(f"n={n}", 0, synthetic_fc(n, opts["overlap"])) for n in opts["n"] or [1000, 10000]]
+
+        runs = [(e, 0) for e in opts["engine"] or ["overlay", "coverage"]]
+        if opts["workers"]:
+            runs = [("overlay", w) for w in opts["workers"]]
+
+        for label, meta_id, fc in cases:
+            for engine, workers in runs:
+                best = None
+                for _ in range(max(1, opts["repeat"])):
+                    t0 = time.perf_counter()
+                    res = validate_tekuis(fc, meta_id, engine=engine, workers=workers, use_cache=False,
+                                          mode=opts["mode"])
+                    dt = time.perf_counter() - t0
+                    best = dt if best is None else min(best, dt)
+                st = res["stats"]
+                self.stdout.write(
+                    f"{label:>14} mode={opts['mode']:<6} engine={engine:<8} workers={workers:>2} features={st['n_features']:>6} "
+                    f"overlaps={st['overlap_count']:>5} gaps={st['gap_count']:>4} time={best:.2f}s"
+                )
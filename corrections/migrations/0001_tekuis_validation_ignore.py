@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+tekuis_validation_ignore – validasiyada "ignore" edilmiş boşluqlar (gap hash-ləri).
+Əvvəllər hər yoxlamada CREATE TABLE/INDEX IF NOT EXISTS ilə yaradılırdı; cədvəl artıq
+mövcud olan bazalarda da təhlükəsizdir (IF NOT EXISTS).
+"""
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.RunSQL(
+            sql=[
+                """
+                CREATE TABLE IF NOT EXISTS tekuis_validation_ignore (
+                  id BIGSERIAL PRIMARY KEY,
+                  meta_id INTEGER NOT NULL,
+                  kind VARCHAR(16) NOT NULL DEFAULT 'gap',
+                  hash TEXT NOT NULL,
+                  geom geometry(Geometry,4326),
+                  note TEXT,
+                  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                  UNIQUE(meta_id, kind, hash)
+                );
+                """,
+                """
+                CREATE INDEX IF NOT EXISTS tekuis_validation_ignore_geom_idx
+                ON tekuis_validation_ignore
+                USING GIST (geom);
+                """,
+            ],
+            reverse_sql=[
+                "DROP INDEX IF EXISTS tekuis_validation_ignore_geom_idx;",
+                "DROP TABLE IF EXISTS tekuis_validation_ignore;",
+            ],
+        ),
+    ]
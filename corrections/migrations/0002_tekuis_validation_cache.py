@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+tekuis_validation_cache – "validation" cache alias-ının cədvəli
+(django.core.cache.backends.db.DatabaseCache; sxem `createcachetable` ilə eynidir).
+Validasiya nəticələri bütün worker-lər arasında ortaqdır; cədvəl artıq varsa toxunulmur.
+"""
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("corrections", "0001_tekuis_validation_ignore"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=[
+                """
+                CREATE TABLE IF NOT EXISTS tekuis_validation_cache (
+                  cache_key VARCHAR(255) NOT NULL PRIMARY KEY,
+                  value TEXT NOT NULL,
+                  expires TIMESTAMPTZ NOT NULL
+                );
+                """,
+                """
+                CREATE INDEX IF NOT EXISTS tekuis_validation_cache_expires
+                ON tekuis_validation_cache (expires);
+                """,
+            ],
+            reverse_sql=[
+                "DROP TABLE IF EXISTS tekuis_validation_cache;",
+            ],
+        ),
+    ]
@@ -11,6 +11,19 @@ from shapely import wkb as _wkb
 from shapely.geometry import mapping
 import logging
 
+from .admission import admit
+from .attr_query import AttrQuery, attr_query_from_get, attr_query_from_payload
+from .async_utils import oracle_connection_async, oracle_id_list, run_blocking
+from .breakers import oracle_outage
+from .coalescing import coalesced, snap_bbox
+from .deadline import Deadline, continuation_fields, read_continuation, wkt_list_digest
+from .generalize import band_cached, simplify_features, zoom_band
+from .grid_agg import cells_to_fc, grid_cell
+from .id_exclusion import exclude_known, order_by_ids, parse_have, parse_id_list, parse_rowid_list, with_key_field
+from .paging import decode_cursor, page_fields, page_limit, want_total
+from .supersession import latest_wins
+from .views.geo_utils import _sanitize_input_wkts
+
 logger = logging.getLogger(__name__)
 
 # ---------------------------
@@ -31,20 +44,18 @@ NECAS_SRID   = int(ENV("NECAS_SRID", "4326"))
 ISDEL_PRED = ENV("NECAS_ISDEL_PRED", "NVL(p.IS_DELETE,0)=0")
 
 # ---------------------------
-# Oracle pool
+# Oracle bağlantısı (async; pool → async_utils.oracle_connection_async)
 # ---------------------------
-_POOL = None
-def get_pool():
-    global _POOL
-    if _POOL is None:
-        dsn = oracledb.makedsn(NECAS_HOST, NECAS_PORT, service_name=NECAS_SVC)
-        _POOL = oracledb.create_pool(
-            user=NECAS_USER,
-            password=NECAS_PASS,
-            dsn=dsn,
-            min=1, max=4, increment=1
-        )
-    return _POOL
+def _necas_connect_params() -> dict:
+    return {
+        "user": NECAS_USER,
+        "password": NECAS_PASS,
+        "dsn": oracledb.makedsn(NECAS_HOST, NECAS_PORT, service_name=NECAS_SVC),
+    }
+
+
+def _necas_connection():
+    return oracle_connection_async("necas", _necas_connect_params())
 
 def ql_table():
     return f'{NECAS_SCHEMA}.{NECAS_TABLE}'
@@ -53,10 +64,11 @@ def ql_table():
 # NECAS atributları
 # ---------------------------
 NECAS_ATTRS = ("CADASTER_NUMBER", "KATEQORIYA", "UQODIYA")
-ATTR_SQL = ", ".join([f"p.{c}" for c in NECAS_ATTRS])
+# fields= / f_* verilməyəndə: bütün atributlar, filtrsiz
+_NECAS_ALL = AttrQuery(NECAS_ATTRS, {}, "p")
 
-def _props_from_vals(vals, rid=None):
-    props = {k: v for k, v in zip(NECAS_ATTRS, vals)}
+def _props_from_vals(vals, rid=None, fields=NECAS_ATTRS):
+    props = {k: v for k, v in zip(fields, vals)}
     props["SOURCE"] = "NECAS"
     if rid:
         props["RID"] = rid
@@ -151,427 +163,692 @@ def _infer_srid(wkts: list[str], fallback: int) -> int:
     return fallback
 
 # ---------------------------
-# API: /api/necas/parcels/by-bbox/
+# BBOX nüvəsi
 # ---------------------------
-@require_GET
-def necas_parcels_by_bbox(request):
-    try:
-        minx = float(request.GET.get("minx"))
-        miny = float(request.GET.get("miny"))
-        maxx = float(request.GET.get("maxx"))
-        maxy = float(request.GET.get("maxy"))
-    except (TypeError, ValueError):
-        return HttpResponseBadRequest("minx/miny/maxx/maxy parametrləri tələb olunur")
-
-    # BBOX üçün WKT POLYGON
-    bbox_wkt = f"POLYGON(({minx} {miny}, {maxx} {miny}, {maxx} {maxy}, {minx} {maxy}, {minx} {miny}))"
-    
-    # Müxtəlif SQL variant-ları (TEKUIS pattern-i)
-    sql_variants = [
-        # Variant 1: Sadə SDO functions
+# (q geometriyasının konstruktoru, kəsişmə predikatı, geometriya sütunu) — TEKUIS pattern-i:
+# 1) sadə SDO funksiyaları, 2) SDE funksiyaları, 3) TO_GEOJSON (sonuncu GeoJSON qaytarır)
+_NECAS_BBOX_VARIANTS = (
+    ("SDO_GEOMETRY", "SDO_ANYINTERACT(p.shape, q.g) = 'TRUE'", "SDO_UTIL.TO_WKTGEOMETRY(p.shape) AS wkt"),
+    ("sde.st_geomfromtext", "sde.st_intersects(p.shape, q.g) = 1", "sde.st_astext(p.shape) AS wkt"),
+    ("sde.st_geomfromtext", "sde.st_intersects(p.shape, q.g) = 1", "MDSYS.SDO_UTIL.TO_GEOJSON(p.shape) AS geojson"),
+)
+
+
+def _necas_bbox_sql_variants(q: AttrQuery = None) -> list[str]:
+    """
+    Keyset səhifə SQL-ləri (variant başına bir): ROWID > :after, ROWID üzrə sıra, ən çox :lim sətir.
+    Sütun sırası hər variantda eynidir: rid, geometriya, atributlar (next_after rid-dən götürülür).
+    """
+    q = q or _NECAS_ALL
+    return [
         f"""
         WITH q AS (
-          SELECT SDO_GEOMETRY(:wkt, :srid) g FROM dual
+          SELECT {ctor}(:wkt, :srid) g FROM dual
         )
-        SELECT
-          ROWIDTOCHAR(p.ROWID) AS rid,
-          SDO_UTIL.TO_WKTGEOMETRY(p.shape) AS wkt,
-          {ATTR_SQL}
-        FROM {ql_table()} p, q
-        WHERE SDO_ANYINTERACT(p.shape, q.g) = 'TRUE'
-            AND {ISDEL_PRED}
-        """,
-        
-        # Variant 2: SDE functions
+        SELECT * FROM (
+          SELECT
+            ROWIDTOCHAR(p.ROWID) AS rid,
+            {geom},
+            {q.select_sql}
+          FROM {ql_table()} p, q
+          WHERE {pred}
+              AND {ISDEL_PRED}{q.where_sql}
+              AND (:after IS NULL OR p.ROWID > CHARTOROWID(:after))
+          ORDER BY p.ROWID
+        ) WHERE ROWNUM <= :lim
+        """
+        for ctor, pred, geom in _NECAS_BBOX_VARIANTS
+    ]
+
+
+def _necas_bbox_count_sql_variants(q: AttrQuery = None) -> list[str]:
+    """Yalnız ?total=1 ilə: eyni predikatlar, geometriya çevrilməsi olmadan."""
+    q = q or _NECAS_ALL
+    return [
         f"""
         WITH q AS (
-          SELECT sde.st_geomfromtext(:wkt, :srid) g FROM dual
+          SELECT {ctor}(:wkt, :srid) g FROM dual
         )
-        SELECT
-          ROWIDTOCHAR(p.ROWID) AS rid,
-          sde.st_astext(p.shape) AS wkt,
-          {ATTR_SQL}
+        SELECT COUNT(*)
         FROM {ql_table()} p, q
-        WHERE sde.st_intersects(p.shape, q.g) = 1
-            AND {ISDEL_PRED}
-        """,
-        
-        # Variant 3: TO_GEOJSON versiyası  
-        f"""
+        WHERE {pred}
+            AND {ISDEL_PRED}{q.where_sql}
+        """
+        for ctor, pred, _geom in _NECAS_BBOX_VARIANTS
+    ]
+
+
+def _necas_grid_sql_variants(q: AttrQuery = None) -> list[str]:
+    """
+    Grid aqreqasiyası (say, dominant KATEQORIYA; NECAS-da sahə sütunu yoxdur).
+    Variant 1: SDE ST_Geometry envelope atributları; variant 2: SDO_GEOMETRY MBR.
+    """
+    q = q or _NECAS_ALL
+
+    def _grid(ctor: str, cx: str, cy: str, where: str) -> str:
+        return f"""
         WITH q AS (
-          SELECT sde.st_geomfromtext(:wkt, :srid) g FROM dual
+          SELECT {ctor}(:wkt, :srid) g FROM dual
         )
+        SELECT gx, gy, COUNT(*), NULL, STATS_MODE(cat)
+          FROM (
+                SELECT FLOOR({cx} / :cell) AS gx,
+                       FLOOR({cy} / :cell) AS gy,
+                       p.KATEQORIYA AS cat
+                  FROM {ql_table()} p, q
+                 WHERE {where}
+                   AND {ISDEL_PRED}{q.where_sql}
+               )
+         GROUP BY gx, gy
+        """
+
+    return [
+        _grid(
+            "sde.st_geomfromtext",
+            "(p.shape.MINX + p.shape.MAXX) / 2",
+            "(p.shape.MINY + p.shape.MAXY) / 2",
+            "sde.st_envintersects(p.shape, q.g) = 1",
+        ),
+        _grid(
+            "SDO_GEOMETRY",
+            "(SDO_GEOM.SDO_MIN_MBR_ORDINATE(p.shape, 1) + SDO_GEOM.SDO_MAX_MBR_ORDINATE(p.shape, 1)) / 2",
+            "(SDO_GEOM.SDO_MIN_MBR_ORDINATE(p.shape, 2) + SDO_GEOM.SDO_MAX_MBR_ORDINATE(p.shape, 2)) / 2",
+            "SDO_ANYINTERACT(p.shape, q.g) = 'TRUE'",
+        ),
+    ]
+
+
+def _necas_ids_sql_variants(by: str, q: AttrQuery = None) -> list[str]:
+    """
+    ID siyahısı üzrə (kolleksiya bind :ids, indeksli axtarış); bbox ilə eyni 3 geometriya variantı.
+    by="cadaster" → CADASTER_NUMBER, by="rid" → ROWID.
+    """
+    q = q or _NECAS_ALL
+    if by == "rid":
+        pred = "p.ROWID IN (SELECT /*+ CARDINALITY(x 100) */ CHARTOROWID(x.COLUMN_VALUE) FROM TABLE(:ids) x)"
+    else:
+        pred = "p.CADASTER_NUMBER IN (SELECT /*+ CARDINALITY(x 100) */ x.COLUMN_VALUE FROM TABLE(:ids) x)"
+    geoms = (
+        "SDO_UTIL.TO_WKTGEOMETRY(p.shape) AS wkt",
+        "sde.st_astext(p.shape) AS wkt",
+        "MDSYS.SDO_UTIL.TO_GEOJSON(p.shape) AS geojson",
+    )
+    return [
+        f"""
         SELECT
           ROWIDTOCHAR(p.ROWID) AS rid,
-          MDSYS.SDO_UTIL.TO_GEOJSON(p.shape) AS geojson,
-          {ATTR_SQL}
-        FROM {ql_table()} p, q
-        WHERE sde.st_intersects(p.shape, q.g) = 1
-            AND {ISDEL_PRED}
+          {geom},
+          {q.select_sql}
+        FROM {ql_table()} p
+        WHERE {pred}
+            AND {ISDEL_PRED}{q.where_sql}
         """
+        for geom in geoms
     ]
 
-    binds = dict(wkt=bbox_wkt, srid=NECAS_SRID)
-    
-    for i, sql in enumerate(sql_variants, 1):
+
+def _necas_bbox_rows_to_features(rows, geojson_variant: bool, fields=NECAS_ATTRS) -> list[dict]:
+    features = []
+    for row in rows:
+        if geojson_variant:
+            rid, geojson_data, *attr_vals = row
+            geojson_text = geojson_data.read() if hasattr(geojson_data, "read") else geojson_data
+            try:
+                geometry = json.loads(geojson_text)
+            except:
+                continue
+        else:  # WKT variants
+            rid, wkt_data, *attr_vals = row
+            wkt_text = wkt_data.read() if hasattr(wkt_data, "read") else wkt_data
+            wkt_clean = _clean_wkt_text(wkt_text)
+            if not wkt_clean:
+                continue
+            try:
+                geom = _wkt.loads(_normalize_wkt_remove_m_dims(_clip_tail(wkt_clean)))
+                geometry = mapping(geom)
+            except:
+                continue
+
+        props = _props_from_vals(attr_vals, rid, fields)
+        features.append({
+            "type": "Feature",
+            "geometry": geometry,
+            "properties": props
+        })
+    return features
+
+
+async def _necas_features_by_bbox(
+    minx: float,
+    miny: float,
+    maxx: float,
+    maxy: float,
+    limit: int,
+    after: str | None = None,
+    with_total: bool = False,
+    q: AttrQuery = _NECAS_ALL,
+):
+    """
+    BBOX üzrə bir səhifə NECAS parseli: (features, next_after, total).
+    next_after None → başqa səhifə yoxdur; total yalnız with_total=True olduqda sayılır.
+    q – sütun proyeksiyası və atribut filtrləri (SQL-ə ötürülür).
+    Bütün SQL variant-ları uğursuz olarsa sonuncu oracledb.DatabaseError yuxarı ötürülür.
+    """
+    # BBOX üçün WKT POLYGON
+    bbox_wkt = f"POLYGON(({minx} {miny}, {maxx} {miny}, {maxx} {maxy}, {minx} {maxy}, {minx} {miny}))"
+    binds = dict(wkt=bbox_wkt, srid=NECAS_SRID, **q.binds)
+
+    sql_variants = _necas_bbox_sql_variants(q)
+    count_variants = _necas_bbox_count_sql_variants(q)
+    for i, (sql, count_sql) in enumerate(zip(sql_variants, count_variants), 1):
         try:
-            with get_pool().acquire() as con:
+            total = None
+            async with _necas_connection() as con:
                 with con.cursor() as cur:
-                    cur.execute(sql, binds)
-                    rows = cur.fetchall()
-                    
-                    features = []
-                    for row in rows:
-                        if len(sql_variants) == 3 and i == 3:  # GeoJSON variant
-                            rid, geojson_data, *attr_vals = row
-                            geojson_text = geojson_data.read() if hasattr(geojson_data, "read") else geojson_data
-                            try:
-                                geometry = json.loads(geojson_text)
-                            except:
-                                continue
-                        else:  # WKT variants
-                            rid, wkt_data, *attr_vals = row
-                            wkt_text = wkt_data.read() if hasattr(wkt_data, "read") else wkt_data
-                            wkt_clean = _clean_wkt_text(wkt_text)
-                            if not wkt_clean:
-                                continue
-                            try:
-                                geom = _wkt.loads(_normalize_wkt_remove_m_dims(_clip_tail(wkt_clean)))
-                                geometry = mapping(geom)
-                            except:
-                                continue
-                        
-                        props = _props_from_vals(attr_vals, rid)
-                        features.append({
-                            "type": "Feature", 
-                            "geometry": geometry, 
-                            "properties": props
-                        })
-                    
-                    logger.info("[NECAS][BBOX] variant%d returned=%d bbox=(%s,%s,%s,%s)",
-                                i, len(features), minx, miny, maxx, maxy)
-                    return JsonResponse({"type": "FeatureCollection", "features": features})
-                    
+                    if with_total:
+                        await cur.execute(count_sql, binds)
+                        total = int((await cur.fetchone())[0])
+                    # limit+1 sətir: artıq sətir növbəti səhifənin olduğunu göstərir
+                    await cur.execute(sql, {**binds, "after": after, "lim": int(limit) + 1})
+                    rows = await cur.fetchall()
+            next_after = rows[limit - 1][0] if len(rows) > limit else None
+            geojson_variant = _NECAS_BBOX_VARIANTS[i - 1][2].endswith("AS geojson")
+            features = _necas_bbox_rows_to_features(rows[:limit], geojson_variant=geojson_variant, fields=q.fields)
+            logger.info("[NECAS][BBOX] variant%d returned=%d bbox=(%s,%s,%s,%s) limit=%d more=%s",
+                        i, len(features), minx, miny, maxx, maxy, limit, next_after is not None)
+            return features, next_after, total
         except oracledb.DatabaseError as e:
             logger.warning("[NECAS][BBOX] variant%d failed: %s", i, str(e))
-            if i == len(sql_variants):
+            if i == len(sql_variants) or oracle_outage(e):
+                raise
+    return [], None, 0
+
+
+async def _necas_grid_by_bbox(bbox, cell: float, q: AttrQuery = _NECAS_ALL) -> dict:
+    """Grid aqreqasiyası (agg=grid); bütün variant-lar uğursuz olarsa sonuncu xəta ötürülür."""
+    minx, miny, maxx, maxy = bbox
+    bbox_wkt = f"POLYGON(({minx} {miny}, {maxx} {miny}, {maxx} {maxy}, {minx} {maxy}, {minx} {miny}))"
+    binds = dict(wkt=bbox_wkt, srid=NECAS_SRID, cell=float(cell), **q.binds)
+
+    sql_variants = _necas_grid_sql_variants(q)
+    for i, sql in enumerate(sql_variants, 1):
+        try:
+            async with _necas_connection() as con:
+                with con.cursor() as cur:
+                    await cur.execute(sql, binds)
+                    rows = await cur.fetchall()
+            logger.info("[NECAS][GRID] variant%d cells=%d cell=%s", i, len(rows), cell)
+            return cells_to_fc(rows, cell, "NECAS")
+        except oracledb.DatabaseError as e:
+            logger.warning("[NECAS][GRID] variant%d failed: %s", i, str(e))
+            if i == len(sql_variants) or oracle_outage(e):
+                raise
+
+
+async def _necas_features_by_ids(ids: list[str], by: str = "cadaster", q: AttrQuery = _NECAS_ALL) -> list[dict]:
+    """
+    CADASTER_NUMBER və ya ROWID siyahısı üzrə NECAS parselləri (bbox ilə eyni feature formatı).
+    Bütün SQL variant-ları uğursuz olarsa sonuncu oracledb.DatabaseError yuxarı ötürülür.
+    """
+    sql_variants = _necas_ids_sql_variants(by, q)
+    for i, sql in enumerate(sql_variants, 1):
+        try:
+            async with _necas_connection() as con:
+                with con.cursor() as cur:
+                    binds = {"ids": await oracle_id_list(con, ids, numeric=False), **q.binds}
+                    await cur.execute(sql, binds)
+                    rows = await cur.fetchall()
+            features = _necas_bbox_rows_to_features(rows, geojson_variant=(i == 3), fields=q.fields)
+            logger.info("[NECAS][IDS] variant%d by=%s requested=%d returned=%d", i, by, len(ids), len(features))
+            return features
+        except oracledb.DatabaseError as e:
+            logger.warning("[NECAS][IDS] variant%d failed: %s", i, str(e))
+            if i == len(sql_variants) or oracle_outage(e):
+                raise
+    return []
+
+
+# ---------------------------
+# API: /api/necas/parcels/by-bbox/
+# ---------------------------
+@require_GET
+@latest_wins("necas_bbox")
+@admit("interactive")
+async def necas_parcels_by_bbox(request):
+    try:
+        minx = float(request.GET.get("minx"))
+        miny = float(request.GET.get("miny"))
+        maxx = float(request.GET.get("maxx"))
+        maxy = float(request.GET.get("maxy"))
+    except (TypeError, ValueError):
+        return HttpResponseBadRequest("minx/miny/maxx/maxy parametrləri tələb olunur")
+
+    try:
+        q = attr_query_from_get(request.GET, NECAS_ATTRS, "p")
+        have = parse_have(request.GET.get("have"))
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    if have is not None:
+        q = with_key_field(q, NECAS_ATTRS, "CADASTER_NUMBER")
+
+    bbox = snap_bbox(minx, miny, maxx, maxy)
+    try:
+        cell = grid_cell(request.GET, bbox)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    if cell is not None:
+        # agg=grid: parsellər yerinə xanalar (səhifələmə yoxdur)
+        async def _grid():
+            try:
+                return JsonResponse(await _necas_grid_by_bbox(bbox, cell, q))
+            except oracledb.DatabaseError as e:
                 return JsonResponse({
                     "ok": False,
-                    "error": {
-                        "stage": "bbox_all_variants_failed",
-                        "message": "NECAS BBOX sorğusu uğursuz oldu - bütün variant-lar",
-                        "oracle": str(e)
-                    }
+                    "error": {"stage": "grid_all_variants_failed", "oracle": str(e)}
                 }, status=500)
 
+        return await coalesced(("necas", "grid", *bbox, cell, q.digest), _grid)
+
+    limit = page_limit(request.GET.get("limit"))
+    kind = f"necas_bbox:{q.digest}"  # cursor başqa fields/filtr ilə işlənə bilməz
+    token = (request.GET.get("cursor") or "").strip()
+    try:
+        state = decode_cursor(token, kind, bbox).get("necas") if token else None
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    after = (state or {}).get("after")
+    with_total = state is None and want_total(request.GET)
+    band = zoom_band(request.GET)
+
+    async def _produce():
+        try:
+            features, next_after, total = await _necas_features_by_bbox(
+                *bbox, limit, after, with_total=with_total, q=q
+            )
+        except oracledb.DatabaseError as e:
+            return JsonResponse({
+                "ok": False,
+                "error": {
+                    "stage": "bbox_all_variants_failed",
+                    "message": "NECAS BBOX sorğusu uğursuz oldu - bütün variant-lar",
+                    "oracle": str(e)
+                }
+            }, status=500)
+        if band is not None:
+            features = await run_blocking(simplify_features, features, band, NECAS_SRID)
+        # sadələşdirmədən sonra: qonşular tam partiya ilə sadələşsin
+        features, excluded = exclude_known(features, have, "CADASTER_NUMBER")
+        total = total if state is None else state.get("total")
+        out = {"type": "FeatureCollection", "features": features, "excluded": excluded}
+        out.update(page_fields(kind, bbox, limit, {"necas": {"after": next_after, "total": total}}))
+        return JsonResponse(out)
+
+    key = ("necas", "bbox", *bbox, limit, after, with_total, q.digest, have.digest if have else None)
+    return await band_cached(key, band, lambda: coalesced((*key, band), _produce))
+
 # ---------------------------
-# API: /api/necas/parcels/by-geom/
+# API: /api/necas/parcels/by-ids/
 # ---------------------------
 @csrf_exempt
 @require_POST
-def necas_parcels_by_geom(request):
-    # ---- input ----
+@admit("interactive")
+async def necas_parcels_by_ids(request):
+    """
+    POST {"ids": [CADASTER_NUMBER, ...]} və ya {"rids": [ROWID, ...]} (+ "fields"/"filters")
+    → FeatureCollection (sorğu sırası ilə) + "missing": tapılmayan ID-lər.
+    """
     try:
         payload = json.loads(request.body.decode("utf-8"))
     except Exception:
         return HttpResponseBadRequest("JSON gözlənilirdi")
+    if not isinstance(payload, dict):
+        return HttpResponseBadRequest("JSON obyekt gözlənilirdi")
 
-    srid_in_payload = int(payload.get("srid") or NECAS_SRID)
-    buffer_m = float(payload.get("buffer_m") or 0.0)
-
-    # WKT siyahısını topla
-    wkt_list = _payload_to_wkt_list(payload)
-    if not wkt_list:
-        w_single = _clean_wkt_text(payload.get("wkt")) if payload.get("wkt") else None
-        if not w_single:
-            return HttpResponseBadRequest("wkt və ya geojson tələb olunur")
-        wkt_list = [w_single]
-
-    # Input sanitizasiya (TEKUIS pattern-i)
-    safe_wkts, bad_empty, bad_curved, bad_parse = [], 0, 0, 0
-    for w in wkt_list:
-        s = _clean_wkt_text(w or "")
-        if not s:
-            bad_empty += 1
-            continue
-        if re.search(r'\b(CURVEPOLYGON|CIRCULARSTRING|COMPOUNDCURVE|ELLIPTICARC|MULTICURVE|MULTISURFACE|GEOMETRYCOLLECTION)\b', s, flags=re.I):
-            bad_curved += 1
-            continue
-        s = _clip_tail(_normalize_wkt_remove_m_dims(s))
+    by, key = ("rid", "RID") if payload.get("rids") else ("cadaster", "CADASTER_NUMBER")
+    try:
+        ids = parse_rowid_list(payload["rids"]) if by == "rid" else parse_id_list(payload.get("ids"), numeric=False)
+        q = attr_query_from_payload(payload, NECAS_ATTRS, "p")
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    if by == "cadaster":
+        q = with_key_field(q, NECAS_ATTRS, key)
+
+    async def _produce():
         try:
-            g = _wkt.loads(s)
-            if g.is_empty:
-                bad_empty += 1
-                continue
-            s = g.wkt  # kanonik 2D WKT
-        except Exception:
-            bad_parse += 1
-            continue
-        safe_wkts.append(s)
-
-    if not safe_wkts:
-        logger.info("[NECAS][GEOM] all invalid input. empty=%d, curved=%d, parse=%d", 
-                    bad_empty, bad_curved, bad_parse)
-        return JsonResponse({"type": "FeatureCollection", "features": []})
-
-    # SRID auto-detect
-    srid_in = _infer_srid(safe_wkts, srid_in_payload)
+            features = await _necas_features_by_ids(ids, by, q)
+        except oracledb.DatabaseError as e:
+            return JsonResponse({
+                "ok": False,
+                "error": {"stage": "ids_all_variants_failed", "oracle": str(e)}
+            }, status=500)
+        features, missing = order_by_ids(features, ids, key)
+        return JsonResponse({"type": "FeatureCollection", "features": features, "missing": missing})
 
-    logger.info("[NECAS][GEOM] input_sanitized=%d dropped=%d srid_in=%d buf_m=%.3f", 
-                len(safe_wkts), bad_empty + bad_curved + bad_parse, srid_in, buffer_m)
-
-    # SQL generator functions
-    def _make_sql_variants(n_items: int) -> list[tuple[str, dict]]:
-        bind_names = [f"w{i}" for i in range(n_items)]
-        g_raw_sql = " \nUNION ALL\n".join([f"  SELECT :{bn} AS wkt FROM dual" for bn in bind_names])
-        
-        params_base = {bn: safe_wkts[i] for i, bn in enumerate(bind_names)}
-        params_base.update({
-            "srid_in": int(srid_in), 
-            "bufm": float(buffer_m), 
-            "table_srid": int(NECAS_SRID)
-        })
+    return await coalesced(("necas", "ids", by, tuple(ids), q.digest), _produce)
 
-        variants = []
-        
-        # Variant 1: SDE functions with transform
-        if buffer_m > 0:
-            buffer_clause = """
-                sde.st_transform(
-                    sde.st_buffer(
-                        sde.st_transform(sde.st_geomfromtext(wkt, :srid_in), 3857), :bufm
-                    ),
-                    :table_srid
-                )
-            """
-        else:
-            buffer_clause = "sde.st_transform(sde.st_geomfromtext(wkt, :srid_in), :table_srid)"
-            
-        sql1 = f"""
-            WITH g_raw AS (
-        {g_raw_sql}
-            ),
-            g AS (
-                SELECT {buffer_clause} AS geom FROM g_raw
-            ),
-            ids AS (
-                SELECT DISTINCT p.ROWID AS rid
-                FROM {ql_table()} p, g
-                WHERE sde.st_envintersects(p.shape, g.geom) = 1
-                AND sde.st_intersects(p.shape, g.geom) = 1
-                AND {ISDEL_PRED}
-            )
-            SELECT p.ROWID AS rid,
-                sde.st_astext(p.shape) AS wkt,
-                {ATTR_SQL}
-            FROM {ql_table()} p
-            JOIN ids ON p.ROWID = ids.rid
-        """
-        variants.append((sql1, params_base.copy()))
-
-        # Variant 2: Simple SDO functions
-        if buffer_m > 0:
-            buffer_clause2 = "SDO_GEOM.SDO_BUFFER(SDO_GEOMETRY(wkt, :srid_in), :bufm, 0.005, 'unit=meter')"
-        else:
-            buffer_clause2 = "SDO_GEOMETRY(wkt, :srid_in)"
-            
-        sql2 = f"""
-            WITH g_raw AS (
-        {g_raw_sql}
-            ),
-            g AS (
-                SELECT {buffer_clause2} AS geom FROM g_raw
-            )
-            SELECT ROWIDTOCHAR(p.ROWID) AS rid,
-                SDO_UTIL.TO_WKTGEOMETRY(p.shape) AS wkt,
-                {ATTR_SQL}
-            FROM {ql_table()} p, g
-            WHERE SDO_ANYINTERACT(p.shape, g.geom) = 'TRUE'
-            AND {ISDEL_PRED}
-        """
-        variants.append((sql2, params_base.copy()))
-
-        return variants
-
-    def _make_single_wkt_sql() -> list[tuple[str, str]]:
-        """Single WKT fallback SQL variants"""
-        variants = []
-        
-        # SDE variant
-        if buffer_m > 0:
-            geom_clause = """
-                sde.st_transform(
-                    sde.st_buffer(
-                        sde.st_transform(sde.st_geomfromtext(:w, :srid_in), 3857), :bufm
-                    ),
-                    :table_srid
-                )
-            """
-        else:
-            geom_clause = "sde.st_transform(sde.st_geomfromtext(:w, :srid_in), :table_srid)"
-            
-        sql_sde = f"""
-            WITH g AS (
-                SELECT {geom_clause} AS geom FROM dual
-            )
-            SELECT p.ROWID AS rid,
-                   sde.st_astext(p.shape) AS wkt,
-                   {ATTR_SQL}
-            FROM {ql_table()} p, g
-            WHERE sde.st_intersects(p.shape, g.geom) = 1
-                AND {ISDEL_PRED}
-        """
-        variants.append(("sde", sql_sde))
-        
-        # SDO variant
-        if buffer_m > 0:
-            geom_clause2 = "SDO_GEOM.SDO_BUFFER(SDO_GEOMETRY(:w, :srid_in), :bufm, 0.005, 'unit=meter')"
-        else:
-            geom_clause2 = "SDO_GEOMETRY(:w, :srid_in)"
-            
-        sql_sdo = f"""
-            WITH g AS (
-                SELECT {geom_clause2} AS geom FROM dual
-            )
-            SELECT ROWIDTOCHAR(p.ROWID) AS rid,
-                   SDO_UTIL.TO_WKTGEOMETRY(p.shape) AS wkt,
-                   {ATTR_SQL}
-            FROM {ql_table()} p, g
-            WHERE SDO_ANYINTERACT(p.shape, g.geom) = 'TRUE'
-                AND {ISDEL_PRED}
-        """
-        variants.append(("sdo", sql_sdo))
-        
-        return variants
-
-    def _make_wkb_sql() -> str:
-        """WKB fallback SQL"""
-        if buffer_m > 0:
-            geom_clause = """
-                sde.st_transform(
-                    sde.st_buffer(
-                        sde.st_transform(sde.st_geomfromwkb(hextoraw(:wkb), :srid_in), 3857), :bufm
-                    ),
-                    :table_srid
-                )
-            """
-        else:
-            geom_clause = "sde.st_transform(sde.st_geomfromwkb(hextoraw(:wkb), :srid_in), :table_srid)"
-            
+# ---------------------------
+# GEOM nüvəsi
+# ---------------------------
+def _necas_geom_buffer_clause(src: str, buffer_m: float) -> str:
+    """SDE üçün giriş geometriyası (+ opsional metr buferi) ifadəsi."""
+    if buffer_m > 0:
         return f"""
-            WITH g AS (
-                SELECT {geom_clause} AS geom FROM dual
+            sde.st_transform(
+                sde.st_buffer(
+                    sde.st_transform({src}, 3857), :bufm
+                ),
+                :table_srid
             )
-            SELECT p.ROWID AS rid,
-                sde.st_astext(p.shape) AS wkt,
-                {ATTR_SQL}
-            FROM {ql_table()} p, g
-            WHERE sde.st_intersects(p.shape, g.geom) = 1
-                AND {ISDEL_PRED}
         """
-
-    # Main processing (TEKUIS pattern-i)
-    features, seen_rids = [], set()
-    out_skip_empty = out_skip_parse = out_skip_curved = out_tailfix = 0
-
-    def _consume_cursor(cur):
-        nonlocal out_skip_empty, out_skip_curved, out_skip_parse, out_tailfix
-        for row in cur:
+    return f"sde.st_transform({src}, :table_srid)"
+
+
+def _necas_sdo_buffer_clause(src: str, buffer_m: float) -> str:
+    if buffer_m > 0:
+        return f"SDO_GEOM.SDO_BUFFER(SDO_GEOMETRY({src}, :srid_in), :bufm, 0.005, 'unit=meter')"
+    return f"SDO_GEOMETRY({src}, :srid_in)"
+
+
+def _necas_geom_chunk_sql_variants(n_items: int, buffer_m: float, q: AttrQuery = None) -> list[str]:
+    q = q or _NECAS_ALL
+    bind_names = [f"w{i}" for i in range(n_items)]
+    g_raw_sql = " \nUNION ALL\n".join([f"  SELECT :{bn} AS wkt FROM dual" for bn in bind_names])
+
+    # Variant 1: SDE functions with transform
+    buffer_clause = _necas_geom_buffer_clause("sde.st_geomfromtext(wkt, :srid_in)", buffer_m)
+    sql1 = f"""
+        WITH g_raw AS (
+    {g_raw_sql}
+        ),
+        g AS (
+            SELECT {buffer_clause} AS geom FROM g_raw
+        ),
+        ids AS (
+            SELECT DISTINCT p.ROWID AS rid
+            FROM {ql_table()} p, g
+            WHERE sde.st_envintersects(p.shape, g.geom) = 1
+            AND sde.st_intersects(p.shape, g.geom) = 1
+            AND {ISDEL_PRED}{q.where_sql}
+        )
+        SELECT p.ROWID AS rid,
+            sde.st_astext(p.shape) AS wkt,
+            {q.select_sql}
+        FROM {ql_table()} p
+        JOIN ids ON p.ROWID = ids.rid
+    """
+
+    # Variant 2: Simple SDO functions
+    buffer_clause2 = _necas_sdo_buffer_clause("wkt", buffer_m)
+    sql2 = f"""
+        WITH g_raw AS (
+    {g_raw_sql}
+        ),
+        g AS (
+            SELECT {buffer_clause2} AS geom FROM g_raw
+        )
+        SELECT ROWIDTOCHAR(p.ROWID) AS rid,
+            SDO_UTIL.TO_WKTGEOMETRY(p.shape) AS wkt,
+            {q.select_sql}
+        FROM {ql_table()} p, g
+        WHERE SDO_ANYINTERACT(p.shape, g.geom) = 'TRUE'
+        AND {ISDEL_PRED}{q.where_sql}
+    """
+    return [sql1, sql2]
+
+
+def _necas_geom_single_sql_variants(buffer_m: float, q: AttrQuery = None) -> list[tuple[str, str]]:
+    """Single WKT fallback SQL variants"""
+    q = q or _NECAS_ALL
+    geom_clause = _necas_geom_buffer_clause("sde.st_geomfromtext(:w, :srid_in)", buffer_m)
+    sql_sde = f"""
+        WITH g AS (
+            SELECT {geom_clause} AS geom FROM dual
+        )
+        SELECT p.ROWID AS rid,
+               sde.st_astext(p.shape) AS wkt,
+               {q.select_sql}
+        FROM {ql_table()} p, g
+        WHERE sde.st_intersects(p.shape, g.geom) = 1
+            AND {ISDEL_PRED}{q.where_sql}
+    """
+
+    geom_clause2 = _necas_sdo_buffer_clause(":w", buffer_m)
+    sql_sdo = f"""
+        WITH g AS (
+            SELECT {geom_clause2} AS geom FROM dual
+        )
+        SELECT ROWIDTOCHAR(p.ROWID) AS rid,
+               SDO_UTIL.TO_WKTGEOMETRY(p.shape) AS wkt,
+               {q.select_sql}
+        FROM {ql_table()} p, g
+        WHERE SDO_ANYINTERACT(p.shape, g.geom) = 'TRUE'
+            AND {ISDEL_PRED}{q.where_sql}
+    """
+    return [("sde", sql_sde), ("sdo", sql_sdo)]
+
+
+def _necas_geom_wkb_sql(buffer_m: float, q: AttrQuery = None) -> str:
+    """WKB fallback SQL"""
+    q = q or _NECAS_ALL
+    geom_clause = _necas_geom_buffer_clause("sde.st_geomfromwkb(hextoraw(:wkb), :srid_in)", buffer_m)
+    return f"""
+        WITH g AS (
+            SELECT {geom_clause} AS geom FROM dual
+        )
+        SELECT p.ROWID AS rid,
+            sde.st_astext(p.shape) AS wkt,
+            {q.select_sql}
+        FROM {ql_table()} p, g
+        WHERE sde.st_intersects(p.shape, g.geom) = 1
+            AND {ISDEL_PRED}{q.where_sql}
+    """
+
+
+class _NecasRowCollector:
+    """(rid, wkt, attrs...) sətirlərini feature-lərə çevirir; ROWID üzrə təkrarları atır."""
+
+    def __init__(self, fields=NECAS_ATTRS):
+        self.fields = fields
+        self.features = []
+        self.seen_rids = set()
+        self.skip_empty = self.skip_parse = self.skip_curved = self.tailfix = 0
+
+    def consume(self, rows):
+        for row in rows:
             rid, wkt_lob, *attr_vals = row
             rid_key = str(rid) if rid is not None else None
-            if rid_key and rid_key in seen_rids:
+            if rid_key and rid_key in self.seen_rids:
                 continue
 
             raw = wkt_lob.read() if hasattr(wkt_lob, "read") else wkt_lob
             w = _clean_wkt_text(raw)
             if not w:
-                out_skip_empty += 1
+                self.skip_empty += 1
                 continue
             if re.search(r'\b(CURVEPOLYGON|CIRCULARSTRING|COMPOUNDCURVE|ELLIPTICARC|MULTICURVE|MULTISURFACE)\b', w, flags=re.I):
-                out_skip_curved += 1
+                self.skip_curved += 1
                 continue
 
             # tail kəs + M/ZM → 2D
             w2 = _clip_tail(w)
             if w2 != w:
-                out_tailfix += 1
+                self.tailfix += 1
             w2 = _normalize_wkt_remove_m_dims(w2)
-            
+
             try:
                 geom = _wkt.loads(w2)
             except Exception:
-                out_skip_parse += 1
+                self.skip_parse += 1
                 continue
 
-            props = _props_from_vals(attr_vals, rid_key)
-            features.append({"type": "Feature", "geometry": mapping(geom), "properties": props})
+            props = _props_from_vals(attr_vals, rid_key, self.fields)
+            self.features.append({"type": "Feature", "geometry": mapping(geom), "properties": props})
             if rid_key:
-                seen_rids.add(rid_key)
+                self.seen_rids.add(rid_key)
+
+    @property
+    def skipped(self) -> int:
+        return self.skip_empty + self.skip_curved + self.skip_parse
+
+
+async def _necas_fetch_geom_chunk(
+    con, cur, collector, sub: list[str], base_params: dict, buffer_m: float, deadline=None, q: AttrQuery = _NECAS_ALL
+):
+    """Bir chunk: chunk variant-ları → tək WKT variant-ları → WKB fallback."""
+    params = {f"w{i}": w for i, w in enumerate(sub)}
+    params.update(base_params)
+
+    for variant_name, sql in enumerate(_necas_geom_chunk_sql_variants(len(sub), buffer_m, q), 1):
+        try:
+            # CLOB input sizes
+            try:
+                cur.setinputsizes(**{k: oracledb.DB_TYPE_CLOB for k in params if k.startswith("w")})
+            except Exception:
+                pass
+            await cur.execute(sql, params)
+            collector.consume(await cur.fetchall())
+            logger.info("[NECAS][GEOM] chunk success with variant%d", variant_name)
+            return
+        except oracledb.DatabaseError as e:
+            if oracle_outage(e):
+                raise  # bağlantı/timeout — digər variant-lar da uğursuz olacaq
+            logger.warning("[NECAS][GEOM] chunk variant%d failed: %s", variant_name, str(e))
+
+    # Fallback: single WKT processing
+    logger.info("[NECAS][GEOM] falling back to single WKT processing for chunk")
+    single_sql_variants = _necas_geom_single_sql_variants(buffer_m, q)
+
+    for w in sub:
+        if deadline is not None:
+            deadline.apply(con)
+        processed = False
+        for variant_name, sql in single_sql_variants:
+            try:
+                await cur.execute(sql, {"w": w, **base_params})
+                collector.consume(await cur.fetchall())
+                processed = True
+                break
+            except Exception as e:
+                if oracle_outage(e):
+                    raise
+                continue
+
+        if not processed:
+            # Final WKB fallback
+            try:
+                g = _wkt.loads(w)
+                wkb_hex = _wkb.dumps(g, hex=True)
+                await cur.execute(_necas_geom_wkb_sql(buffer_m, q), {"wkb": wkb_hex, **base_params})
+                collector.consume(await cur.fetchall())
+            except Exception as e:
+                if oracle_outage(e):
+                    raise
+                head = (w[:220] + "…") if len(w) > 220 else w
+                logger.warning("[NECAS][GEOM] skipped WKT: %s, error: %s", head, str(e)[:240])
+
+
+async def _necas_features_by_geom(
+    safe_wkts: list[str], srid_in: int, buffer_m: float, deadline=None, start: int = 0, q: AttrQuery = _NECAS_ALL
+):
+    """
+    Sanitizasiya olunmuş WKT-lər üzrə NECAS parsellərini çəkir
+    (chunk variant-ları → tək WKT variant-ları → WKB fallback).
+    Qaytarır: (features, next_offset) — next_offset None → hamısı işlənib, əks halda deadline bitib.
+    """
+    base_params = {
+        "srid_in": int(srid_in),
+        "bufm": float(buffer_m),
+        "table_srid": int(NECAS_SRID),
+        **q.binds,
+    }
+    collector = _NecasRowCollector(q.fields)
+    next_offset = None
 
     # Execute queries
-    with get_pool().acquire() as con:
+    async with _necas_connection() as con:
         with con.cursor() as cur:
             CHUNK = 200
-            for start in range(0, len(safe_wkts), CHUNK):
-                sub = safe_wkts[start:start + CHUNK]
-                sql_variants = _make_sql_variants(len(sub))
-                
-                success = False
-                for variant_name, (sql, params) in enumerate(sql_variants, 1):
-                    try:
-                        # CLOB input sizes
-                        try:
-                            cur.setinputsizes(**{k: oracledb.DB_TYPE_CLOB for k in params if k.startswith("w")})
-                        except Exception:
-                            pass
-                        cur.execute(sql, params)
-                        _consume_cursor(cur)
-                        success = True
-                        logger.info("[NECAS][GEOM] chunk success with variant%d", variant_name)
+            for offset in range(int(start), len(safe_wkts), CHUNK):
+                if deadline is not None:
+                    if deadline.expired():
+                        next_offset = offset
                         break
-                    except oracledb.DatabaseError as e:
-                        logger.warning("[NECAS][GEOM] chunk variant%d failed: %s", variant_name, str(e))
-                
-                if not success:
-                    # Fallback: single WKT processing
-                    logger.info("[NECAS][GEOM] falling back to single WKT processing for chunk")
-                    single_sql_variants = _make_single_wkt_sql()
-                    
-                    for w in sub:
-                        processed = False
-                        for variant_name, sql in single_sql_variants:
-                            try:
-                                params_single = {
-                                    "w": w, 
-                                    "srid_in": int(srid_in), 
-                                    "bufm": float(buffer_m), 
-                                    "table_srid": int(NECAS_SRID)
-                                }
-                                cur.execute(sql, params_single)
-                                _consume_cursor(cur)
-                                processed = True
-                                break
-                            except Exception:
-                                continue
-                        
-                        if not processed:
-                            # Final WKB fallback
-                            try:
-                                g = _wkt.loads(w)
-                                wkb_hex = _wkb.dumps(g, hex=True)
-                                params_wkb = {
-                                    "wkb": wkb_hex, 
-                                    "srid_in": int(srid_in), 
-                                    "bufm": float(buffer_m), 
-                                    "table_srid": int(NECAS_SRID)
-                                }
-                                cur.execute(_make_wkb_sql(), params_wkb)
-                                _consume_cursor(cur)
-                            except Exception as e:
-                                head = (w[:220] + "…") if len(w) > 220 else w
-                                logger.warning("[NECAS][GEOM] skipped WKT: %s, error: %s", head, str(e)[:240])
-
-    logger.info("[NECAS][GEOM] returned=%d unique_rids=%d skipped_out=%d tailfix=%d", 
-                len(features), len(seen_rids), out_skip_empty + out_skip_curved + out_skip_parse, out_tailfix)
-
-    return JsonResponse({"type": "FeatureCollection", "features": features})
\ No newline at end of file
+                    deadline.apply(con)
+                mark = len(collector.features)
+                try:
+                    await _necas_fetch_geom_chunk(
+                        con, cur, collector, safe_wkts[offset:offset + CHUNK], base_params, buffer_m, deadline, q
+                    )
+                except oracledb.DatabaseError as e:
+                    if deadline is None or not deadline.hit_by(e):
+                        raise
+                    # yarımçıq chunk atılır — davam sorğusu onu yenidən işləyəcək
+                    del collector.features[mark:]
+                    next_offset = offset
+                    break
+
+    logger.info("[NECAS][GEOM] returned=%d unique_rids=%d skipped_out=%d tailfix=%d next_offset=%s",
+                len(collector.features), len(collector.seen_rids), collector.skipped, collector.tailfix, next_offset)
+    return collector.features, next_offset
+
+
+# ---------------------------
+# API: /api/necas/parcels/by-geom/
+# ---------------------------
+@csrf_exempt
+@require_POST
+@admit("interactive", heavy_body=True)
+async def necas_parcels_by_geom(request):
+    # ---- input ----
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+    except Exception:
+        return HttpResponseBadRequest("JSON gözlənilirdi")
+
+    srid_in_payload = int(payload.get("srid") or NECAS_SRID)
+    buffer_m = float(payload.get("buffer_m") or 0.0)
+
+    # WKT siyahısını topla
+    wkt_list = _payload_to_wkt_list(payload)
+    if not wkt_list:
+        w_single = _clean_wkt_text(payload.get("wkt")) if payload.get("wkt") else None
+        if not w_single:
+            return HttpResponseBadRequest("wkt və ya geojson tələb olunur")
+        wkt_list = [w_single]
+
+    # Input sanitizasiya (TEKUIS ilə ortaq)
+    safe_wkts, bad = _sanitize_input_wkts(wkt_list)
+    if not safe_wkts:
+        logger.info("[NECAS][GEOM] all invalid input. empty=%d, curved=%d, parse=%d",
+                    bad["empty"], bad["curved"], bad["parse"])
+        return JsonResponse({"type": "FeatureCollection", "features": []})
+
+    # SRID auto-detect
+    srid_in = _infer_srid(safe_wkts, srid_in_payload)
+
+    logger.info("[NECAS][GEOM] input_sanitized=%d dropped=%d srid_in=%d buf_m=%.3f",
+                len(safe_wkts), sum(bad.values()), srid_in, buffer_m)
+
+    try:
+        q = attr_query_from_payload(payload, NECAS_ATTRS, "p")
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    # Vaxt büdcəsi + davam tokeni (qismən nəticə)
+    deadline = Deadline.for_endpoint("necas_geom", payload.get("budget_ms"))
+    digest = wkt_list_digest(safe_wkts)
+    kind = f"necas_geom:{q.digest}"
+    try:
+        start = int(read_continuation(payload["continuation"], kind, digest).get("necas") or 0) if payload.get("continuation") else 0
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    async def _produce():
+        features, next_offset = await _necas_features_by_geom(safe_wkts, srid_in, buffer_m, deadline, start, q)
+        out = {"type": "FeatureCollection", "features": features}
+        out.update(continuation_fields(kind, digest, {"necas": next_offset}, len(safe_wkts)))
+        return JsonResponse(out)
+
+    return await coalesced(
+        ("necas", "geom", digest, round(buffer_m, 3), srid_in, start, q.digest, deadline.budget_ms), _produce
+    )
@@ -0,0 +1,65 @@
+# paging.py
+# -*- coding: utf-8 -*-
+"""
+BBOX endpoint-ləri üçün keyset səhifələmə.
+
+Sətirlər ROWID üzrə sıralanır; növbəti səhifə "ROWID > son ROWID" şərti ilə oxunur
+(OFFSET yox — dərin səhifələr də eyni qiymətə başa gəlir). Səhifə ölçüsü
+PARCELS_PAGE_MAX ilə serverdə məhdudlaşdırılır.
+
+Dəqiq say (COUNT) yalnız ?total=1 ilə ilk səhifədə hesablanır; əks halda klient
+"has_more" / "next" ilə kifayətlənir (hər pan/zoom-da ikinci sorğu getmir).
+
+Cursor imzalı tokendir: mənbə, extent və hər mənbə üzrə vəziyyət
+({"after": rid, "total": n}; None → mənbə bitib). Başqa extent-ə aid cursor rədd edilir.
+"""
+
+from django.conf import settings
+from django.core import signing
+
+_CURSOR_SALT = "corrections.paging.cursor"
+_CURSOR_MAX_AGE_S = 3600
+
+
+def page_limit(raw) -> int:
+    """limit parametri → [1, PARCELS_PAGE_MAX]; boşdursa PARCELS_PAGE_SIZE."""
+    cap = int(getattr(settings, "PARCELS_PAGE_MAX", 5000))
+    default = int(getattr(settings, "PARCELS_PAGE_SIZE", 2000))
+    try:
+        n = int(raw) if raw not in (None, "") else default
+    except (TypeError, ValueError):
+        n = default
+    return max(1, min(n, cap))
+
+
+def want_total(params) -> bool:
+    """?total=1 — ilk səhifədə dəqiq say (əlavə COUNT sorğusu); default-da yalnız has_more."""
+    return str(params.get("total") or "").strip().lower() in ("1", "true", "yes")
+
+
+def encode_cursor(kind: str, bbox: tuple, state: dict) -> str:
+    return signing.dumps({"k": kind, "b": list(bbox), "s": state}, salt=_CURSOR_SALT, compress=True)
+
+
+def decode_cursor(token: str, kind: str, bbox: tuple) -> dict:
+    """Cursor-u yoxlayır; etibarsızdırsa və ya başqa extent-ə aiddirsə ValueError."""
+    try:
+        data = signing.loads(token, salt=_CURSOR_SALT, max_age=_CURSOR_MAX_AGE_S)
+    except signing.BadSignature as e:
+        raise ValueError("cursor etibarsızdır və ya vaxtı keçib") from e
+    if data.get("k") != kind or [float(v) for v in data.get("b") or []] != [float(v) for v in bbox]:
+        raise ValueError("cursor bu extent-ə aid deyil")
+    return data.get("s") or {}
+
+
+def page_fields(kind: str, bbox: tuple, limit: int, state: dict) -> dict:
+    """
+    Cavaba əlavə olunan sahələr.
+    state – mənbə üzrə {"after": rid | None, "total": n}; after None → mənbə bitib,
+            state None → mənbə hələ başlamayıb (növbəti səhifə onu başdan oxuyur).
+    """
+    pending = {src: st for src, st in state.items() if st is None or st.get("after") is not None}
+    totals = {src: (st or {}).get("total") for src, st in state.items()}
+    out = {"limit": limit, "has_more": bool(pending), "next": encode_cursor(kind, bbox, state) if pending else None}
+    out["total_estimate"] = totals if len(totals) > 1 else next(iter(totals.values()), None)
+    return out
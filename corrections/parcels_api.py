@@ -0,0 +1,204 @@
+# parcels_api.py
+# -*- coding: utf-8 -*-
+"""
+TEKUIS + NECAS parsellərini bir sorğu ilə qaytaran endpoint-lər.
+Giriş bir dəfə sanitizasiya olunur, hər iki Oracle mənbəsi paralel sorğulanır,
+beləliklə cavab müddəti iki sorğunun cəmi yox, maksimumu olur.
+"""
+
+import asyncio
+import json
+import logging
+import os
+
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from .necas_api import NECAS_SRID, _necas_features_by_bbox, _necas_features_by_geom
+from .admission import admit
+from .async_utils import run_blocking
+from .coalescing import coalesced, snap_bbox
+from .deadline import Deadline, continuation_fields, read_continuation, wkt_list_digest
+from .generalize import band_cached, simplify_features, zoom_band
+from .paging import decode_cursor, page_fields, page_limit, want_total
+from .supersession import latest_wins
+from .views.geo_utils import _clean_wkt_text, _infer_wkt_srid, _payload_to_wkt_list, _sanitize_input_wkts
+from .views.tekuis import _tekuis_features_by_bbox, _tekuis_features_by_geom, _tekuis_srid
+
+logger = logging.getLogger(__name__)
+
+def _empty_fc():
+    return {"type": "FeatureCollection", "features": []}
+
+
+async def _run_both(tekuis_coro, necas_coro):
+    """
+    İki mənbəni eyni event loop-da paralel gözləyir. Bir tərəf yıxılsa, digərinin nəticəsi
+    yenə qaytarılır, xəta isə "errors" altında həmin mənbənin adı ilə göstərilir.
+    """
+    names = ("tekuis", "necas")
+    results = await asyncio.gather(tekuis_coro, necas_coro, return_exceptions=True)
+    out = {"ok": True, "tekuis": _empty_fc(), "necas": _empty_fc(), "errors": {}}
+    for name, res in zip(names, results):
+        if isinstance(res, BaseException):
+            if isinstance(res, asyncio.CancelledError):
+                raise res
+            logger.warning("[PARCELS] %s failed: %s", name.upper(), res)
+            out["errors"][name] = str(res)
+        else:
+            out[name] = {"type": "FeatureCollection", "features": res}
+    if len(out["errors"]) == len(names):
+        out["ok"] = False
+    return out
+
+
+def _source_status(errors: dict, pending) -> dict:
+    """Mənbə üzrə: "error" (təkrar sorğu ilə yenidən cəhd olunur), "partial" və ya "complete"."""
+    return {
+        name: "error" if name in errors else "partial" if name in pending else "complete"
+        for name in ("tekuis", "necas")
+    }
+
+
+def _combined_response(out: dict) -> JsonResponse:
+    resp = JsonResponse(out, status=200 if out["ok"] else 502)
+    if out["errors"]:
+        # qismən uğursuz cavab band cache-ə yazılmır (generalize.store_band_response)
+        resp["X-Source-Errors"] = ",".join(sorted(out["errors"]))
+    return resp
+
+
+# ---------------------------
+# API: /api/parcels/by-bbox/
+# ---------------------------
+@require_GET
+@latest_wins("parcels_bbox")
+@admit("interactive")
+async def parcels_by_bbox(request):
+    try:
+        minx = float(request.GET.get("minx"))
+        miny = float(request.GET.get("miny"))
+        maxx = float(request.GET.get("maxx"))
+        maxy = float(request.GET.get("maxy"))
+    except (TypeError, ValueError):
+        return HttpResponseBadRequest("minx/miny/maxx/maxy tələb olunur və ədədi olmalıdır.")
+
+    bbox = snap_bbox(minx, miny, maxx, maxy)
+    limit = page_limit(request.GET.get("limit"))
+    token = (request.GET.get("cursor") or "").strip()
+    try:
+        # ilk səhifə: hər iki mənbə başdan; sonrakı: yalnız bitməmiş mənbə(lər)
+        states = decode_cursor(token, "parcels_bbox", bbox) if token else {"tekuis": None, "necas": None}
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    with_total = want_total(request.GET)
+    band = zoom_band(request.GET)
+
+    async def _produce():
+        page_state = {}
+
+        async def _source(name, fetch, srid):
+            st = states.get(name)
+            if st is not None and st.get("after") is None:
+                page_state[name] = st  # bu mənbə əvvəlki səhifədə bitib
+                return []
+            features, next_after, total = await fetch(
+                *bbox, limit, (st or {}).get("after"), with_total=st is None and with_total
+            )
+            page_state[name] = {"after": next_after, "total": total if st is None else st.get("total")}
+            if band is not None:
+                features = await run_blocking(simplify_features, features, band, srid)
+            return features
+
+        out = await _run_both(
+            _source("tekuis", _tekuis_features_by_bbox, _tekuis_srid()),
+            _source("necas", _necas_features_by_bbox, NECAS_SRID),
+        )
+        # xəta verən mənbənin vəziyyəti dəyişmir → növbəti cursor onu həmin yerdən təkrarlayır
+        for name in out["errors"]:
+            page_state[name] = states.get(name)
+        out.update(page_fields("parcels_bbox", bbox, limit, page_state))
+        out["sources"] = _source_status(
+            out["errors"], {n for n, st in page_state.items() if st is None or st.get("after") is not None}
+        )
+        return _combined_response(out)
+
+    key = ("parcels", "bbox", *bbox, limit, token, with_total)
+    return await band_cached(key, band, lambda: coalesced((*key, band), _produce))
+
+
+# ---------------------------
+# API: /api/parcels/by-geom/
+# ---------------------------
+@csrf_exempt
+@require_POST
+@admit("interactive", heavy_body=True)
+async def parcels_by_geom(request):
+    """
+    Body: { wkt | geojson, srid?, buffer_m?, budget_ms?, continuation? }
+    Cavab: { ok, tekuis: FeatureCollection, necas: FeatureCollection, errors: {mənbə: mesaj}, partial,
+             sources: {mənbə: "complete" | "partial" | "error"} }
+    Hər feature-in properties.SOURCE sahəsi "TEKUIS" və ya "NECAS" olur.
+    Büdcə bitəndə "partial": true və "continuation" qaytarılır; davam sorğusu yalnız
+    tamamlanmamış mənbə(lər)i qalan chunk-dan davam etdirir.
+    """
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+    except Exception:
+        return HttpResponseBadRequest("Yanlış JSON.")
+
+    srid_in_payload = int(payload.get("srid") or os.getenv("TEKUIS_SRID", 4326))
+    buf_m = float(payload.get("buffer_m") or 0.0)
+
+    wkt_list = _payload_to_wkt_list(payload)
+    if not wkt_list:
+        w_single = _clean_wkt_text(payload.get("wkt")) if payload.get("wkt") else None
+        if not w_single:
+            return HttpResponseBadRequest("wkt və ya geojson verilməlidir.")
+        wkt_list = [w_single]
+
+    # Bir dəfə sanitizasiya — hər iki mənbə eyni siyahını alır
+    safe_wkts, bad = _sanitize_input_wkts(wkt_list)
+    if not safe_wkts:
+        logger.info("[PARCELS][GEOM] all invalid input. empty=%d, curved=%d, parse=%d",
+                    bad["empty"], bad["curved"], bad["parse"])
+        return JsonResponse({"ok": True, "tekuis": _empty_fc(), "necas": _empty_fc(), "errors": {}})
+
+    srid_in = _infer_wkt_srid(safe_wkts, srid_in_payload)
+    logger.info("[PARCELS][GEOM] input_sanitized=%d dropped=%d srid_in=%d buf_m=%.3f",
+                len(safe_wkts), sum(bad.values()), srid_in, buf_m)
+
+    deadline = Deadline.for_endpoint("parcels_geom", payload.get("budget_ms"))
+    digest = wkt_list_digest(safe_wkts)
+    starts = {"tekuis": 0, "necas": 0}
+    if payload.get("continuation"):
+        try:
+            starts = read_continuation(payload["continuation"], "parcels_geom", digest)
+        except ValueError as e:
+            return HttpResponseBadRequest(str(e))
+
+    async def _produce():
+        offsets = {"tekuis": None, "necas": None}
+
+        async def _source(name, fetch):
+            start = starts.get(name)
+            if start is None:
+                return []  # bu mənbə əvvəlki cavabda tamamlanıb
+            features, offsets[name] = await fetch(safe_wkts, srid_in, buf_m, deadline, int(start))
+            return features
+
+        out = await _run_both(
+            _source("tekuis", _tekuis_features_by_geom),
+            _source("necas", _necas_features_by_geom),
+        )
+        # xəta verən mənbə "tamamlanmış" sayılmır: continuation onu eyni offset-dən təkrarlayır
+        for name in out["errors"]:
+            offsets[name] = starts.get(name)
+        out.update(continuation_fields("parcels_geom", digest, offsets, len(safe_wkts)))
+        out["sources"] = _source_status(out["errors"], {n for n, off in offsets.items() if off is not None})
+        return _combined_response(out)
+
+    key = ("parcels", "geom", digest, round(buf_m, 3), srid_in, starts.get("tekuis"), starts.get("necas"),
+           deadline.budget_ms)
+    return await coalesced(key, _produce)
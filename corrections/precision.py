@@ -0,0 +1,98 @@
+# precision.py
+# -*- coding: utf-8 -*-
+"""
+Giriş geometriyaları üçün dəqiqlik şəbəkəsi (precision grid).
+
+Klientdə redaktə olunmuş geometriyalar 15 rəqəmli koordinatlarla və bir-birinə çox
+yaxın təpələrlə gəlir; validasiya vaxtının çoxu buffer(0) təmirlərinə və sonra
+MIN_AREA_SQM ilə atılan mikroskopik sliver-lərə gedirdi. İndi girişdə bir dəfə:
+  - yalnız etibarsız geometriyalar buffer(0) ilə təmir olunur;
+  - shapely.set_precision ilə koordinatlar şəbəkəyə salınır (nəticə həmişə etibarlıdır,
+    yaxın təpələr birləşir, sıfır ölçülü hissələr düşür) — massiv üzrə bir çağırış.
+
+TEKUIS_PRECISION_GRID: "1e-7deg" və ya "0.01m"; boş → söndürülüb.
+Şəbəkə həmişə EPSG:4326-da tətbiq olunur (validasiya, PostGIS rejimi və saxlama eyni
+koordinatları görsün); metr dərəcəyə 111320 m/° ilə çevrilir (şərqə doğru addım
+cos(enlik) qədər kiçikdir — yəni daha incədir).
+"""
+
+import logging
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+import shapely
+from django.conf import settings
+from shapely.geometry import mapping, shape as shapely_shape
+
+logger = logging.getLogger(__name__)
+
+_M_PER_DEG = 111320.0
+
+
+@lru_cache(maxsize=8)
+def _parse(raw: str) -> Optional[float]:
+    s = (raw or "").strip().lower().replace(" ", "")
+    if not s:
+        return None
+    if s.endswith("deg"):
+        size = float(s[:-3])
+    elif s.endswith("m"):
+        size = float(s[:-1]) / _M_PER_DEG
+    else:
+        raise ValueError(f"TEKUIS_PRECISION_GRID: '{raw}' – '…deg' və ya '…m' olmalıdır")
+    return size if size > 0 else None
+
+
+def grid_deg() -> Optional[float]:
+    """Şəbəkə addımı (dərəcə); söndürülübsə None."""
+    return _parse(str(getattr(settings, "TEKUIS_PRECISION_GRID", "") or ""))
+
+
+def repair(geoms):
+    """Yalnız etibarsız geometriyalara buffer(0) (etibarlılara toxunmur)."""
+    arr = np.asarray(geoms, dtype=object)
+    bad = ~shapely.is_valid(arr)
+    if bad.any():
+        arr = arr.copy()
+        arr[bad] = shapely.buffer(arr[bad], 0)
+    return arr
+
+
+def snap(geoms, grid_size: float):
+    """Təmir + şəbəkəyə salma (massiv). GEOS səhvində həmin geometriya yalnız təmir olunur."""
+    arr = repair(geoms)
+    try:
+        return shapely.set_precision(arr, grid_size)
+    except shapely.errors.GEOSException:
+        out = arr.copy()
+        for k, g in enumerate(arr):
+            try:
+                out[k] = shapely.set_precision(g, grid_size)
+            except shapely.errors.GEOSException as e:
+                logger.warning("[PRECISION] set_precision failed (%s) – unsnapped", e)
+        return out
+
+
+def snap_geojson(geometries: list) -> list:
+    """
+    GeoJSON geometriya siyahısı → şəbəkəyə salınmış GeoJSON (sıra saxlanır).
+    Parse olunmayanlar dəyişmədən qalır; tam çökənlər (boş) → None.
+    Şəbəkə söndürülübsə siyahı olduğu kimi qaytarılır.
+    """
+    size = grid_deg()
+    if not size:
+        return geometries
+    idx, shp = [], []
+    for k, gj in enumerate(geometries):
+        try:
+            shp.append(shapely_shape(gj))
+            idx.append(k)
+        except Exception:
+            continue
+    out = list(geometries)
+    if not shp:
+        return out
+    for k, g in zip(idx, snap(shp, size)):
+        out[k] = None if g.is_empty else mapping(g)
+    return out
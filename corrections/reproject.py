@@ -0,0 +1,77 @@
+# reproject.py
+# -*- coding: utf-8 -*-
+"""
+Ortaq proyeksiya qatı.
+
+  - Transformer-lər (src, dst) cütü üzrə bir dəfə qurulur və prosesdə saxlanır
+    (pyproj ≥ 3.1-də Transformer thread-safe-dir);
+  - koordinatlar NumPy massivləri ilə bir çağırışda çevrilir: geometriyalar üçün
+    shapely.transform (bütün massivin koordinatları birlikdə), nöqtələr üçün x/y massivləri;
+  - çağıran tərəf hər geometriyanı sorğu ərzində bir dəfə çevirir və nəticəni saxlayır.
+
+src / dst – EPSG kodu (int) və ya pyproj.CRS.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import shapely
+from pyproj import CRS, Transformer
+
+
+@lru_cache(maxsize=64)
+def _cached(src, dst) -> Transformer:
+    return Transformer.from_crs(CRS.from_user_input(src), CRS.from_user_input(dst), always_xy=True)
+
+
+def transformer(src, dst) -> Transformer:
+    """Keşlənmiş Transformer (always_xy=True)."""
+    return _cached(src, dst)
+
+
+def transform_xy(tr, xs, ys):
+    """x, y massivləri → (x', y') numpy massivləri; tr None → dəyişmədən."""
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    if tr is None or xs.size == 0:
+        return xs, ys
+    return tr.transform(xs, ys)
+
+
+def transform_geoms(geoms, src, dst):
+    """
+    Geometriya və ya geometriya massivi → eyni formada çevrilmiş nəticə.
+    Bütün koordinatlar bir transform çağırışı ilə (Python callback koordinat başına deyil).
+    """
+    tr = transformer(src, dst)
+
+    def _xy(coords):
+        x, y = tr.transform(coords[:, 0], coords[:, 1])
+        return np.column_stack((x, y))
+
+    return shapely.transform(geoms, _xy)
+
+
+def to_3857(geoms):
+    return transform_geoms(geoms, 4326, 3857)
+
+
+def to_4326(geoms):
+    return transform_geoms(geoms, 3857, 4326)
+
+
+def transform_grouped(xs, ys, transformers):
+    """
+    Hər nöqtənin öz transformer-i ola bilər (CSV-də sətir üzrə CRS sütunu).
+    Nöqtələr transformer üzrə qruplaşdırılır, hər qrup bir çağırışla çevrilir; sıra saxlanır.
+    """
+    xs = np.asarray(xs, dtype=float).copy()
+    ys = np.asarray(ys, dtype=float).copy()
+    groups = {}
+    for i, tr in enumerate(transformers):
+        if tr is not None:
+            groups.setdefault(id(tr), (tr, []))[1].append(i)
+    for tr, idx in groups.values():
+        idx = np.asarray(idx)
+        xs[idx], ys[idx] = tr.transform(xs[idx], ys[idx])
+    return xs, ys
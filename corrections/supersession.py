@@ -0,0 +1,120 @@
+# supersession.py
+# -*- coding: utf-8 -*-
+"""
+BBOX sorğuları üçün "son gələn qalib gəlir" (latest-wins) mexanizmi.
+
+Xəritə sürüşdürülərkən eyni tab bir neçə bbox sorğusu göndərir, amma yalnız sonuncusu
+lazımdır. Klient hər tab üçün sabit view açarı göndərir (?view_key=... və ya X-View-Key
+header-i, istəyə görə ?seq= / X-View-Seq ardıcıllıq nömrəsi). Eyni açarla yeni sorğu
+gələndə köhnə, hələ işləyən sorğu cancel olunur (Oracle sorğusu da dayandırılır,
+bax: async_utils.oracle_connection_async) və 409 {"superseded": true} qaytarır.
+"""
+
+import asyncio
+import itertools
+import logging
+import threading
+from functools import wraps
+
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+_LOCK = threading.Lock()
+_COUNTER = itertools.count(1)
+# açar -> _Claim (hər açar üçün yalnız ən son sorğu)
+_LATEST = {}
+
+
+class _Claim:
+    __slots__ = ("key", "seq", "order", "loop", "task", "superseded")
+
+    def __init__(self, key, seq, loop, task):
+        self.key = key
+        self.seq = seq
+        self.order = next(_COUNTER)
+        self.loop = loop
+        self.task = task
+        self.superseded = False
+
+    def newer_than(self, other: "_Claim") -> bool:
+        # Klient seq göndəribsə ona, yoxsa serverə çatma sırasına bax
+        if self.seq is not None and other.seq is not None:
+            return self.seq >= other.seq
+        return True
+
+
+def _view_key(request, scope: str):
+    vk = (request.GET.get("view_key") or request.headers.get("X-View-Key") or "").strip()
+    if not vk:
+        return None
+    ticket = (request.GET.get("ticket") or request.headers.get("X-Ticket") or "").strip()
+    return f"{scope}|{ticket}|{vk[:128]}"
+
+
+def _view_seq(request):
+    raw = (request.GET.get("seq") or request.headers.get("X-View-Seq") or "").strip()
+    try:
+        return int(raw)
+    except ValueError:
+        return None
+
+
+def _claim(key: str, seq):
+    """
+    Açarı bu sorğu üçün götürür. Daha yeni sorğu artıq varsa None qaytarır.
+    Köhnə sorğu öz loop-unda cancel olunur (WSGI-də hər sorğunun ayrı loop-u var).
+    """
+    me = _Claim(key, seq, asyncio.get_running_loop(), asyncio.current_task())
+    with _LOCK:
+        prev = _LATEST.get(key)
+        if prev is not None and not me.newer_than(prev):
+            return None
+        _LATEST[key] = me
+    if prev is not None and not prev.task.done():
+        prev.superseded = True
+        prev.loop.call_soon_threadsafe(prev.task.cancel)
+    return me
+
+
+def _release(claim: "_Claim") -> None:
+    with _LOCK:
+        if _LATEST.get(claim.key) is claim:
+            del _LATEST[claim.key]
+
+
+def _superseded_response():
+    return JsonResponse({"ok": False, "superseded": True}, status=409)
+
+
+def latest_wins(scope: str):
+    """
+    Async view dekoratoru. view_key verilməyibsə view olduğu kimi işləyir.
+    scope – endpoint adı ("tekuis_bbox", "necas_bbox", ...): fərqli endpoint-lər bir-birini əvəz etmir.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        async def _wrapped(request, *args, **kwargs):
+            key = _view_key(request, scope)
+            if key is None:
+                return await view(request, *args, **kwargs)
+
+            claim = _claim(key, _view_seq(request))
+            if claim is None:
+                logger.debug("[SUPERSEDE] %s rejected (newer seq in flight)", key)
+                return _superseded_response()
+            try:
+                return await view(request, *args, **kwargs)
+            except asyncio.CancelledError:
+                if not claim.superseded:
+                    raise  # klient getdi və ya server dayanır
+                asyncio.current_task().uncancel()
+                logger.debug("[SUPERSEDE] %s superseded", key)
+                return _superseded_response()
+            finally:
+                _release(claim)
+
+        return _wrapped
+
+    return decorator
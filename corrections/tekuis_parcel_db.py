@@ -4,6 +4,8 @@ from django.http import JsonResponse, HttpResponseBadRequest
 from django.db import connection
 from django.views.decorators.http import require_GET
 
+from .generalize import simplify_features_cached, zoom_band
+
 TEKUIS_DB_SELECT_COLUMNS = (
     ("tekuis_id", "id"),
     ("kateqoriya", "LAND_CATEGORY_ENUM"),
@@ -43,7 +45,8 @@ def _build_tekuis_select_sql(table_name: str):
     return f"""
         SELECT
             {column_sql},
-            ST_AsGeoJSON(geom, 7) AS geom_geojson
+            ST_AsGeoJSON(geom, 7) AS geom_geojson,
+            ctid::text || ':' || xmin::text AS row_ver
         FROM {table_name}
         WHERE meta_id = %s
           AND status = 1
@@ -59,6 +62,7 @@ def tekuis_parcels_by_db(request):
     - ?meta_id=XXX (üstün)
     - və ya ?ticket=ABC  -> helper ilə meta_id tapılır
     - status=1 filtrini tətbiq edir (cədvəldə status yoxdursa, şərti silmək olar)
+    - ?zoom=Z və ya ?resolution=m/px → kiçik zoom-larda topologiyanı qoruyan sadələşdirmə
     """
     meta_id = request.GET.get("meta_id")
     ticket  = request.GET.get("ticket")
@@ -82,21 +86,27 @@ def tekuis_parcels_by_db(request):
         return HttpResponseBadRequest("meta_id rəqəm olmalıdır.")
 
     sql = _build_tekuis_select_sql(table_name)
-    features = []
+    features, versions = [], []
     with connection.cursor() as cur:
         cur.execute(sql, [meta_id_int])
         cols = [c[0] for c in cur.description]
         for row in cur.fetchall():
             rec = dict(zip(cols, row))
             geom = rec.pop("geom_geojson", None)
+            row_ver = rec.pop("row_ver", None)
             if not geom:
                 continue
+            versions.append(row_ver)
             features.append({
                 "type": "Feature",
                 "geometry": json.loads(geom),
                 "properties": rec
             })
 
+    band = zoom_band(request.GET)
+    if band is not None:
+        features = simplify_features_cached(f"{table_name}:{meta_id_int}", features, band, versions=versions)
+
     return JsonResponse({
         "type": "FeatureCollection",
         "features": features
@@ -2,33 +2,49 @@
 # -*- coding: utf-8 -*-
 import json
 import hashlib
-from typing import List, Dict, Any, Tuple, Set, Optional
-
+import logging
+import math
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import shapely
 from django.conf import settings
-from django.db import connection
+from django.db import connection, transaction
 
 from shapely.geometry import shape as shapely_shape, mapping, Polygon, MultiPolygon
 from shapely.geometry.base import BaseGeometry
 from shapely.ops import unary_union
 from shapely.strtree import STRtree
-from shapely.ops import transform as shp_transform
-from pyproj import Transformer
 
-# numpy opsionaldır – Shapely 2-də STRtree bəzən indeks (numpy.int64) qaytara bilir
-try:
-    import numpy as _np
-    _NP_INT = (_np.integer,)
-except Exception:
-    _NP_INT = ()
+from . import precision, tekuis_validation_db, validation_cache
+from .reproject import to_3857, to_4326
 
 # === Parametrlər ===
 # Minimal sahə həddi (m²)
 MIN_AREA_SQM = float(getattr(settings, "TEKUIS_VALIDATION_MIN_AREA_SQM", 1.0))
 
-# Proyeksiya çeviriciləri
-# (Daxilə 4326 gəlir; hesablamalar 3857-də aparılır; çıxış 4326 qayıdır)
-_to_3857 = Transformer.from_crs(4326, 3857, always_xy=True).transform
-_to_4326 = Transformer.from_crs(3857, 4326, always_xy=True).transform
+# Validator mühərriki: "overlay" (default) və ya "coverage"
+ENGINE = str(getattr(settings, "TEKUIS_VALIDATION_ENGINE", "overlay")).strip().lower()
+
+# Bölmələrlə paralel rejim: yalnız PARTITIONED=True, WORKERS ≥ 1 və parsel sayı PARTITION_MIN-dən
+# çox olduqda coverage tile-lara bölünür, tile-lar proses pool-unda yoxlanılır.
+# Default söndürülüb; validate_tekuis(workers=N) açıq ötürülərsə (benchmark) bayraqdan asılı deyil.
+PARTITIONED = bool(getattr(settings, "TEKUIS_VALIDATION_PARTITIONED", False))
+WORKERS = int(getattr(settings, "TEKUIS_VALIDATION_WORKERS", 0))
+PARTITION_MIN = int(getattr(settings, "TEKUIS_VALIDATION_PARTITION_MIN", 3000))
+TILE_PARCELS = int(getattr(settings, "TEKUIS_VALIDATION_TILE_PARCELS", 1500))
+
+# PostGIS rejimi: feature sayı və ya təpə həcmi bu hədləri keçəndə avtomatik (0 → söndürülüb)
+DB_MIN_FEATURES = int(getattr(settings, "TEKUIS_VALIDATION_DB_MIN_FEATURES", 20000))
+DB_MIN_VERTICES = int(getattr(settings, "TEKUIS_VALIDATION_DB_MIN_VERTICES", 2000000))
+
+logger = logging.getLogger(__name__)
+
+# Proyeksiya: daxilə 4326 gəlir; hesablamalar 3857-də aparılır; çıxış 4326 qayıdır.
+# Çevirmələr corrections.reproject ilə massiv şəklində, hər geometriya üçün bir dəfə.
 
 
 # ---------------------------
@@ -42,8 +58,7 @@ def _geom_area_sqm(g: BaseGeometry) -> float:
     if not g or g.is_empty:
         return 0.0
     try:
-        g3857 = shp_transform(_to_3857, g)
-        return float(g3857.area)
+        return float(to_3857(g).area)
     except Exception:
         return 0.0
 
@@ -65,227 +80,445 @@ def _flatten_polys(g: BaseGeometry) -> List[Polygon]:
     return []
 
 
-def _gap_signature(g4326: BaseGeometry) -> str:
+def _gap_signature(g4326: BaseGeometry, area_sqm: Optional[float] = None) -> str:
     """
     'gap' üçün sabit imza.
     4326-də zərfə + kvantlaşdırılmış sahə istifadə olunur (stabil olsun deyə).
+    area_sqm – g4326-nın 3857-yə geri proyeksiyasının sahəsi (_geom_area_sqm ilə eyni; massivlə
+    əvvəlcədən hesablanır). Orijinal 3857 sahəsi ilə əvəz olunmamalıdır: yuvarlaqlaşdırma fərqi
+    ignore cədvəlindəki köhnə hash-ləri pozar.
     """
     minx, miny, maxx, maxy = g4326.envelope.bounds
-    sig = f"{round(minx,6)},{round(miny,6)},{round(maxx,6)},{round(maxy,6)}|{round(_geom_area_sqm(g4326),1)}"
+    if area_sqm is None:
+        area_sqm = _geom_area_sqm(g4326)
+    sig = f"{round(minx,6)},{round(miny,6)},{round(maxx,6)},{round(maxy,6)}|{round(area_sqm,1)}"
     return hashlib.md5(sig.encode("utf-8")).hexdigest()
 
 
-def _ensure_ignore_table():
-    with connection.cursor() as cur:
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS tekuis_validation_ignore (
-              id BIGSERIAL PRIMARY KEY,
-              meta_id INTEGER NOT NULL,
-              kind VARCHAR(16) NOT NULL DEFAULT 'gap',
-              hash TEXT NOT NULL,
-              geom geometry(Geometry,4326),
-              note TEXT,
-              created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
-              UNIQUE(meta_id, kind, hash)
-            );
-        """)
-        cur.execute("""
-            CREATE INDEX IF NOT EXISTS tekuis_validation_ignore_geom_idx
-            ON tekuis_validation_ignore
-            USING GIST (geom);
-        """)
-
-
-def _is_gap_ignored(meta_id: int, h: str) -> bool:
-    _ensure_ignore_table()
+# tekuis_validation_ignore cədvəli migrasiya ilə yaradılır (0001_tekuis_validation_ignore)
+_IGNORE_INSERT_CHUNK = 500
+
+
+def _ignored_gap_hashes(meta_id: int) -> set:
+    """meta_id üçün ignore edilmiş bütün gap hash-ləri — bir sorğu ilə."""
     with connection.cursor() as cur:
         cur.execute(
-            "SELECT 1 FROM tekuis_validation_ignore WHERE meta_id=%s AND kind='gap' AND hash=%s LIMIT 1",
-            [int(meta_id), h],
+            "SELECT hash FROM tekuis_validation_ignore WHERE meta_id=%s AND kind='gap'",
+            [int(meta_id)],
         )
-        return bool(cur.fetchone())
+        return {r[0] for r in cur.fetchall()}
+
+
+def ignore_gaps(meta_id: int, items) -> int:
+    """
+    Bir neçə gap-i birdən ignore edir: items – [(hash, geom_geojson | None), ...].
+    Çox sətirli INSERT (hissələrlə), bir tranzaksiyada. Yeni yazılan sətirlərin sayı.
+    """
+    rows = []
+    for h, geom in items:
+        h = str(h or "").strip()
+        if h:
+            rows.append((int(meta_id), h, json.dumps(geom) if geom else None))
+    inserted = 0
+    with transaction.atomic(), connection.cursor() as cur:
+        for k in range(0, len(rows), _IGNORE_INSERT_CHUNK):
+            chunk = rows[k:k + _IGNORE_INSERT_CHUNK]
+            values = ",".join(["(%s, 'gap', %s, ST_SetSRID(ST_GeomFromGeoJSON(%s::text), 4326))"] * len(chunk))
+            cur.execute(
+                f"""
+                INSERT INTO tekuis_validation_ignore (meta_id, kind, hash, geom)
+                VALUES {values}
+                ON CONFLICT (meta_id, kind, hash) DO NOTHING
+                """,
+                [v for row in chunk for v in row],
+            )
+            inserted += max(cur.rowcount, 0)
+    return inserted
 
 
 def ignore_gap(meta_id: int, h: str, geom_geojson: Optional[Dict[str, Any]] = None) -> bool:
     """
     Bir 'gap' üçün 'ignore' qeydini saxlayır. Geometriya verilirsə DB-yə də yazır.
     """
-    _ensure_ignore_table()
-    geom_json = json.dumps(geom_geojson) if geom_geojson else None
-    with connection.cursor() as cur:
-        try:
-            if geom_json:
-                cur.execute(
-                    """
-                    INSERT INTO tekuis_validation_ignore (meta_id, kind, hash, geom)
-                    VALUES (%s, 'gap', %s, ST_SetSRID(ST_GeomFromGeoJSON(%s), 4326))
-                    ON CONFLICT (meta_id, kind, hash) DO NOTHING
-                    """,
-                    [int(meta_id), h, geom_json],
-                )
-            else:
-                cur.execute(
-                    """
-                    INSERT INTO tekuis_validation_ignore (meta_id, kind, hash)
-                    VALUES (%s, 'gap', %s)
-                    ON CONFLICT (meta_id, kind, hash) DO NOTHING
-                    """,
-                    [int(meta_id), h],
-                )
-            return True
-        except Exception:
-            return False
+    try:
+        ignore_gaps(meta_id, [(h, geom_geojson)])
+        return True
+    except Exception:
+        return False
 
 
-def _collect_polys_from_geojson_3857(geojson: Dict[str, Any]) -> List[Polygon]:
+def _collect_polys_from_geojson_3857(geojson: Dict[str, Any], with_owner: bool = False):
     """
     Ekrandan gələn GeoJSON (EPSG:4326) daxil olur.
     Yalnız Polygon/MultiPolygon-ları **EPSG:3857**-yə çevirib qaytarır.
+    with_owner=True → (poliqonlar, hər poliqonun feature indeksi).
     """
-    out: List[Polygon] = []
+    geoms: List[BaseGeometry] = []
+    feat_idx: List[int] = []
     feats = (geojson or {}).get("features", [])
-    for f in feats:
+    for k, f in enumerate(feats):
         try:
-            g = shapely_shape(f.get("geometry"))
+            geoms.append(shapely_shape(f.get("geometry")))
+            feat_idx.append(k)
         except Exception:
             continue
-        # validity fix
-        g = g.buffer(0)
-        for p in _flatten_polys(g):
-            p3857 = shp_transform(_to_3857, p).buffer(0)
-            if not p3857.is_empty:
-                out.append(p3857)
+    if not geoms:
+        return ([], []) if with_owner else []
+    # validity fix (buffer(0) → Polygon/MultiPolygon) və ya dəqiqlik şəbəkəsi (TEKUIS_PRECISION_GRID:
+    # yalnız etibarsızlar təmir + set_precision); Multi-ləri hissələrə ayır; sıra saxlanır
+    grid = precision.grid_deg()
+    arr = np.asarray(geoms, dtype=object)
+    arr = precision.snap(arr, grid) if grid else shapely.buffer(arr, 0)
+    arr, part_of = shapely.get_parts(arr, return_index=True)
+    keep = (shapely.get_type_id(arr) == 3) & ~shapely.is_empty(arr)
+    arr, part_of = arr[keep], part_of[keep]
+    # bütün poliqonlar bir çağırışla 3857-yə (şəbəkədə təmizdirsə, yalnız etibarsızlar təmir olunur)
+    arr = to_3857(arr)
+    arr = precision.repair(arr) if grid else shapely.buffer(arr, 0)
+    keep = ~shapely.is_empty(arr)
+    if with_owner:
+        return list(arr[keep]), [feat_idx[i] for i in part_of[keep]]
+    return list(arr[keep])
+
+
+def _overlap_pairs(polys: List[Polygon], min_area: float, subset=None):
+    """
+    Kəsişən cütlər: [(i, j, kəsişmə poliqonu, sahə m²), ...], i < j, (i, j) üzrə sıralı.
+    STRtree bir çağırışla bütün (i, j) indeks cütlərini verir; daxili kəsişmə yoxlaması,
+    intersection və sahə massiv ufunc-ları ilə yalnız namizəd cütlər üzərində hesablanır.
+    subset – indeks massivi verilibsə, yalnız ən azı bir tərəfi subset-də olan cütlər axtarılır.
+    """
+    arr = np.asarray(polys, dtype=object)
+    left, right = STRtree(arr).query(arr if subset is None else arr[subset], predicate="intersects")
+    if subset is not None:
+        left = subset[left]
+    left, right = np.minimum(left, right), np.maximum(left, right)
+    keep = left < right
+    code = np.unique(left[keep] * len(arr) + right[keep])  # təkrarsız (i, j), artan sıra
+    left, right = code // len(arr), code % len(arr)
+    if left.size == 0:
+        return []
+
+    # yalnız sərhəddə toxunanlar (qonşu parsellərin çoxu) intersection-a çatmır
+    keep = shapely.relate_pattern(arr[left], arr[right], "T********")
+    left, right = left[keep], right[keep]
+
+    inter = shapely.buffer(shapely.intersection(arr[left], arr[right]), 0)  # etibarlılığı artır
+    areas = shapely.area(inter)
+    keep = areas > min_area
+    left, right, inter, areas = left[keep], right[keep], inter[keep], areas[keep]
+
+    out = []
+    for k in range(len(left)):
+        poly_parts = _flatten_polys(inter[k])
+        if not poly_parts:
+            continue
+        inter_poly = unary_union(poly_parts) if len(poly_parts) > 1 else poly_parts[0]
+        out.append((int(left[k]), int(right[k]), inter_poly, float(areas[k])))
+    return out
+
+
+def _overlay_union(polys: List[Polygon]) -> BaseGeometry:
+    try:
+        return unary_union(polys).buffer(0)
+    except Exception:
+        return unary_union(polys)
+
+
+def _coverage_overlaps_and_union(polys: List[Polygon], min_area: float):
+    """
+    "coverage" mühərriki. coverage_invalid_edges kənarları qonşusu ilə dəqiq üst-üstə
+    düşməyən (kəsişən və ya sürüşmüş) parselləri işarələyir:
+      - kəsişmələr yalnız işarələnmiş parsellərdən axtarılır (kəsişən cütün ən azı biri işarələnir);
+      - birləşmə: təmiz hissə coverage_union_all (overlay-siz), işarələnmişlər adi union ilə.
+    """
+    arr = np.asarray(polys, dtype=object)
+    bad = ~shapely.is_empty(shapely.coverage_invalid_edges(arr))
+    bad_idx = np.flatnonzero(bad)
+
+    parts = []
+    if bad_idx.size < len(arr):
+        parts.append(shapely.coverage_union_all(arr[~bad]))
+    if bad_idx.size:
+        parts.append(shapely.union_all(arr[bad_idx]))
+    u = shapely.union_all(parts) if len(parts) > 1 else parts[0]
+
+    pairs = _overlap_pairs(polys, min_area, subset=bad_idx) if bad_idx.size else []
+    return pairs, u.buffer(0)
+
+
+def _overlap_items(pairs) -> List[Dict[str, Any]]:
+    """(i, j, kəsişmə 3857, sahə) cütləri → cavab elementləri (4326-da, bir transform çağırışı)."""
+    out = []
+    inters4326 = to_4326(np.asarray([p[2] for p in pairs], dtype=object))
+    for (i, j, _inter, inter_area), inter4326 in zip(pairs, inters4326):
+        rep = inter4326.representative_point()
+        out.append({
+            "a_idx": i,
+            "b_idx": j,
+            "area_sqm": round(inter_area, 2),
+            "geom": mapping(inter4326),
+            "centroid": [float(rep.x), float(rep.y)],
+            "bbox": list(inter4326.bounds)
+        })
+    return out
+
+
+def _gap_candidates(comps, min_area: float):
+    """Birləşmənin komponentlərindəki boşluqlar (3857): [(gap, sahə), ...], sahə > min_area."""
+    out = []
+    for poly in comps:
+        outer = Polygon(poly.exterior)
+        gap = outer.difference(poly)
+        for gg in _flatten_polys(gap):
+            a = float(gg.area)  # 3857 m²
+            if a > min_area:
+                out.append((gg, a))
+    return out
+
+
+def _gap_items(gaps3857) -> List[Dict[str, Any]]:
+    """[(gap 3857, sahə)] → cavab elementləri (hash ilə; ignore filtri çağıranda)."""
+    out = []
+    gaps4326 = to_4326(np.asarray([g for g, _a in gaps3857], dtype=object))
+    sig_areas = shapely.area(to_3857(gaps4326)) if len(gaps4326) else []
+    for (_gg, a), gg4326, sig_a in zip(gaps3857, gaps4326, sig_areas):
+        rep = gg4326.representative_point()
+        out.append({
+            "hash": _gap_signature(gg4326, float(sig_a)),
+            "area_sqm": round(a, 2),
+            "geom": mapping(gg4326),
+            "centroid": [float(rep.x), float(rep.y)],
+            "bbox": list(gg4326.bounds)
+        })
+    return out
+
+
+# ---------------------------
+# Bölmələrlə (tile) paralel yoxlama
+# ---------------------------
+_POOL = None  # (workers, ProcessPoolExecutor)
+_POOL_LOCK = threading.Lock()
+
+
+def _pool(workers: int) -> ProcessPoolExecutor:
+    """Proses pool-u bir dəfə yaradılır (spawn: thread-li worker-də fork təhlükəsiz deyil)."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None or _POOL[0] != workers:
+            if _POOL is not None:
+                _POOL[1].shutdown(wait=False)
+            ctx = multiprocessing.get_context("spawn")
+            _POOL = (workers, ProcessPoolExecutor(max_workers=workers, mp_context=ctx))
+        return _POOL[1]
+
+
+def _tiles(polys: List[Polygon], n_tiles: int):
+    """
+    Parsellər envelope mərkəzinə görə nx × ny tile-a bölünür: [(owned, working), ...].
+    owned   – tile-a məxsus parsellərin (artan) indeksləri;
+    working – owned parsellərin ümumi extent-i ilə kəsişən bütün parsellər (owned daxil).
+    Kəsişən hər cüt (i, j) i-nin tile-ının working dəstində tam olur → sərhəd itmir.
+    """
+    b = shapely.bounds(np.asarray(polys, dtype=object))
+    cx, cy = (b[:, 0] + b[:, 2]) / 2, (b[:, 1] + b[:, 3]) / 2
+    w = max(float(cx.max() - cx.min()), 1e-9)
+    h = max(float(cy.max() - cy.min()), 1e-9)
+    nx = max(1, round(math.sqrt(n_tiles * w / h)))
+    ny = max(1, math.ceil(n_tiles / nx))
+    tx = np.minimum(((cx - cx.min()) / w * nx).astype(int), nx - 1)
+    ty = np.minimum(((cy - cy.min()) / h * ny).astype(int), ny - 1)
+    tile = ty * nx + tx
+
+    out = []
+    for t in np.unique(tile):
+        owned = np.flatnonzero(tile == t)
+        ext = (b[owned, 0].min(), b[owned, 1].min(), b[owned, 2].max(), b[owned, 3].max())
+        working = np.flatnonzero(
+            (b[:, 0] <= ext[2]) & (b[:, 2] >= ext[0]) & (b[:, 1] <= ext[3]) & (b[:, 3] >= ext[1])
+        )
+        out.append((owned, working))
     return out
 
 
+def _validate_tile(owned, working, polys_working, min_area: float):
+    """
+    Bir tile (proses pool-da): owned parsellərdən başlayan kəsişmələr + owned-lərin birləşməsi.
+    Cüt (i, j), i < j, yalnız i-nin tile-ında qaytarılır — birləşdirmədə təkrar olmur.
+    """
+    local_owned = np.flatnonzero(np.isin(working, owned))
+    owned_set = set(owned.tolist())
+    pairs = []
+    for li, lj, inter_poly, area in _overlap_pairs(list(polys_working), min_area, subset=local_owned):
+        i, j = int(working[li]), int(working[lj])  # working artan sıralıdır → i < j
+        if i in owned_set:
+            pairs.append((i, j, inter_poly, area))
+    return pairs, shapely.union_all(polys_working[local_owned])
+
+
+def _partitioned_overlaps_and_union(polys: List[Polygon], min_area: float, workers: int):
+    """
+    Tile-ların nəticələri birləşdirilir: cütlər (i, j) üzrə sıralanır, birləşmə tile
+    birləşmələrindən qurulur. Boşluqlar (gap) sonra ümumi birləşmədən çıxarılır → hash-lər
+    tək proseslik rejimlə eynidir.
+    """
+    arr = np.asarray(polys, dtype=object)
+    tiles = _tiles(polys, max(workers, math.ceil(len(polys) / max(TILE_PARCELS, 1))))
+    jobs = [(owned, working, arr[working], min_area) for owned, working in tiles]
+    if workers > 1:
+        results = list(_pool(workers).map(_validate_tile, *zip(*jobs)))
+    else:
+        results = [_validate_tile(*job) for job in jobs]
+
+    pairs, unions = [], []
+    for tile_pairs, tile_union in results:
+        pairs.extend(tile_pairs)
+        unions.append(tile_union)
+    pairs.sort(key=lambda p: (p[0], p[1]))
+    logger.debug("[TEKUIS][VALIDATE] partitioned tiles=%d workers=%d pairs=%d", len(tiles), workers, len(pairs))
+    return pairs, shapely.union_all(unions).buffer(0)
+
+
 # ---------------------------
 # Əsas validator
 # ---------------------------
+def _engine_label(engine: str, workers: int, db_mode: bool) -> str:
+    """Nəticəni hesablayan icra yolu (cache açarı üçün): "db", "overlay", "coverage/p4" və s."""
+    if db_mode:
+        return "db"
+    return f"{engine}/p{workers}" if workers >= 1 else engine
+
+
+def _use_db_mode(geojson: Dict[str, Any], mode: Optional[str]) -> bool:
+    if mode:
+        return mode == "db"
+    if DB_MIN_FEATURES and len((geojson or {}).get("features") or []) >= DB_MIN_FEATURES:
+        return tekuis_validation_db.available()
+    if DB_MIN_VERTICES and tekuis_validation_db.vertex_count(geojson) >= DB_MIN_VERTICES:
+        return tekuis_validation_db.available()
+    return False
+
+
 def validate_tekuis(
     geojson: Dict[str, Any],
     meta_id: int,
     *,
     min_overlap_sqm: Optional[float] = None,
-    min_gap_sqm: Optional[float] = None
+    min_gap_sqm: Optional[float] = None,
+    engine: Optional[str] = None,
+    workers: Optional[int] = None,
+    use_cache: bool = True,
+    mode: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Giriş GeoJSON-u (4326) **ekrandakı cari vəziyyət** kimi qəbul edir.
     Hesablamalar 3857-də aparılır, nəticələr 4326-ya transform olunaraq qaytarılır.
+    engine – "overlay" / "coverage"; verilməyibsə TEKUIS_VALIDATION_ENGINE.
+    workers – bölmələrlə paralel rejim üçün proses sayı; verilməyibsə TEKUIS_VALIDATION_PARTITIONED
+              açıq olduqda TEKUIS_VALIDATION_WORKERS, əks halda 0 (tək proses).
+    use_cache – nəticə məzmun hash-i ilə cache-lənir (corrections.validation_cache).
+    mode – "memory" / "db" (PostGIS, tekuis_validation_db); verilməyibsə feature sayı və
+           təpə həcminə görə avtomatik (TEKUIS_VALIDATION_DB_MIN_FEATURES / _VERTICES;
+           yalnız PostGIS əlçatandırsa – tekuis_validation_db.available).
 
     Qaytarır:
       {
         meta_id, stats: {n_features, overlap_count, gap_count},
         overlaps: [{a_idx,b_idx, area_sqm, geom, centroid, bbox}],
-        gaps:     [{hash, area_sqm, geom, centroid, bbox}]
+        gaps:     [{hash, area_sqm, geom, centroid, bbox}],
+        content_hash, cached   (yalnız cache aktiv olduqda)
       }
     """
     MIN_OV = float(min_overlap_sqm if min_overlap_sqm is not None else MIN_AREA_SQM)
     MIN_GA = float(min_gap_sqm     if min_gap_sqm     is not None else MIN_AREA_SQM)
 
-    polys = _collect_polys_from_geojson_3857(geojson)  # 3857-də siyahı
-    n = len(polys)
+    # ---------- İcra yolu: PostGIS / yaddaşda (mühərrik, bölmələr) — cache açarının hissəsidir
+    engine = engine or ENGINE
+    workers = (WORKERS if PARTITIONED else 0) if workers is None else int(workers)
+    db_mode = _use_db_mode(geojson, mode)
+    label = _engine_label(engine, workers, db_mode)
+
+    # ---------- Cache: normallaşdırılmış giriş + hədlər + icra yolu + ignore dəstinin versiyası
+    use_cache = use_cache and validation_cache.enabled()
+    ignored = None
+    if use_cache:
+        ignored = _ignored_gap_hashes(meta_id)
+        iver = validation_cache.ignore_version(ignored)
+        ihash = validation_cache.input_hash(geojson)
+        chash = validation_cache.content_hash_for_input(ihash, MIN_OV, MIN_GA)
+        hit = validation_cache.get(meta_id, chash, iver, label) if chash else None
+        if hit is not None:
+            hit["cached"] = True
+            return hit
 
     result: Dict[str, Any] = {
         "meta_id": int(meta_id),
-        "stats": {"n_features": n, "overlap_count": 0, "gap_count": 0},
+        "stats": {"n_features": 0, "overlap_count": 0, "gap_count": 0},
         "overlaps": [],
         "gaps": []
     }
-    if n == 0:
-        return result
-
-    # ---------- KƏSİŞMƏLƏR (Overlaps) : 3857
-    tree = STRtree(polys)
 
-    # Shapely 2 → indekslər, 1.x → obyektlər. Hər iki hal üçün etibarlı funksiya.
-    def _query_candidates(g):
+    computed = None
+    if db_mode:
         try:
-            idxs = tree.query(g, predicate="intersects")
+            computed = tekuis_validation_db.overlaps_and_gaps(geojson, MIN_OV, MIN_GA)
+        except Exception as e:  # PostGIS xətası → yaddaşda
+            logger.warning("[TEKUIS][VALIDATE] db mode failed (%s) → memory", e)
+            label = _engine_label(engine, workers, False)
+        if computed is not None and use_cache:
+            # poliqonlar Python-da qurulmur → məzmun hash-i əvəzinə xam giriş hash-i
+            chash = f"input:{ihash}"
+            validation_cache.remember_input(ihash, MIN_OV, MIN_GA, chash)
+
+    if computed is None:
+        polys = _collect_polys_from_geojson_3857(geojson)  # 3857-də siyahı
+        n = len(polys)
+        if n == 0:
+            return result
+
+        if use_cache:
+            # xam JSON fərqli, normallaşdırılmış məzmun eyni ola bilər (sıra/ring başlanğıcı və s.)
+            chash = validation_cache.content_hash(polys, MIN_OV, MIN_GA)
+            validation_cache.remember_input(ihash, MIN_OV, MIN_GA, chash)
+            hit = validation_cache.get(meta_id, chash, iver, label)
+            if hit is not None:
+                hit["cached"] = True
+                return hit
+
+        pairs = None
+        if workers >= 1 and n >= PARTITION_MIN:
             try:
-                # numpy/piton int-ları üçün yoxla
-                if len(idxs) > 0 and isinstance(idxs[0], (int,) + _NP_INT):
-                    return [polys[int(j)] for j in idxs]
-            except Exception:
-                pass
-            # Shapely 1.x: geometriyalar qayıda bilər
-            return list(idxs)
-        except Exception:
-            # köhnə API fallback
-            return list(tree.query(g))
-
-    seen_pairs: Set[Tuple[int, int]] = set()
-    for i, g in enumerate(polys):
-        candidates = _query_candidates(g)
-        for cand_geom in candidates:
-            # indeks tap (Shapely 2: eyni obyekt listdədir; 1.x: WKB müqayisəsi)
-            j = None
-            try:
-                j = polys.index(cand_geom)
-            except ValueError:
-                try:
-                    j = next(k for k, pg in enumerate(polys) if pg.wkb == getattr(cand_geom, "wkb", b""))
-                except StopIteration:
-                    continue
-            if j is None or j <= i or (i, j) in seen_pairs:
-                continue
-
-            inter = g.intersection(cand_geom)
-            if inter.is_empty:
-                continue
-            inter = inter.buffer(0)  # etibarlılığı artır
-            if inter.is_empty:
-                continue
-
-            inter_area = float(inter.area)  # 3857-də m²
-            if inter_area <= MIN_OV:
-                continue
-
-            poly_parts = _flatten_polys(inter)
-            if not poly_parts:
-                continue
-            inter_poly = unary_union(poly_parts) if len(poly_parts) > 1 else poly_parts[0]
-
-            inter4326 = shp_transform(_to_4326, inter_poly)
-            rep = inter4326.representative_point()
-            result["overlaps"].append({
-                "a_idx": i,
-                "b_idx": j,
-                "area_sqm": round(inter_area, 2),
-                "geom": mapping(inter4326),
-                "centroid": [float(rep.x), float(rep.y)],
-                "bbox": list(inter4326.bounds)
-            })
-            seen_pairs.add((i, j))
+                pairs, u = _partitioned_overlaps_and_union(polys, MIN_OV, workers)
+            except Exception as e:  # pool sınıbsa (BrokenProcessPool və s.) → tək prosesdə
+                logger.warning("[TEKUIS][VALIDATE] partitioned mode failed (%s) → single process", e)
+        if pairs is None:
+            if engine == "coverage":
+                pairs, u = _coverage_overlaps_and_union(polys, MIN_OV)
+            else:
+                pairs, u = _overlap_pairs(polys, MIN_OV), _overlay_union(polys)
 
-    # ---------- BOŞLUQLAR (Gaps) : 3857 (BİRDƏFƏLİK HESABLA)
-    try:
-        u = unary_union(polys).buffer(0)
-    except Exception:
-        u = unary_union(polys)
+        comps = _flatten_polys(u if isinstance(u, (Polygon, MultiPolygon)) else u.buffer(0))
+        computed = (n, pairs, _gap_candidates(comps, MIN_GA))
 
-    comps = _flatten_polys(u if isinstance(u, (Polygon, MultiPolygon)) else u.buffer(0))
-    for poly in comps:
-        outer = Polygon(poly.exterior)
-        gap = outer.difference(poly)
-        for gg in _flatten_polys(gap):
-            a = float(gg.area)  # 3857 m²
-            if a <= MIN_GA:
-                continue
-            gg4326 = shp_transform(_to_4326, gg)
-            h = _gap_signature(gg4326)
-            if _is_gap_ignored(meta_id, h):
-                continue
-            rep = gg4326.representative_point()
-            result["gaps"].append({
-                "hash": h,
-                "area_sqm": round(a, 2),
-                "geom": mapping(gg4326),
-                "centroid": [float(rep.x), float(rep.y)],
-                "bbox": list(gg4326.bounds)
-            })
+    n, pairs, gap_cands = computed
+    result["stats"]["n_features"] = n
+    if use_cache:
+        result["content_hash"] = chash
+        result["cached"] = False
+
+    # ---------- KƏSİŞMƏLƏR (Overlaps) : 3857
+    result["overlaps"] = _overlap_items(pairs)
+
+    # ---------- BOŞLUQLAR (Gaps) : 3857 (BİRDƏFƏLİK HESABLA)
+    gaps = _gap_items(gap_cands)
+    if ignored is None:
+        ignored = _ignored_gap_hashes(meta_id) if gaps else set()
+    result["gaps"] = [g for g in gaps if g["hash"] not in ignored]
 
     # Statistikalar
     result["stats"]["overlap_count"] = len(result["overlaps"])
     result["stats"]["gap_count"] = len(result["gaps"])
+    if use_cache:
+        validation_cache.put(meta_id, chash, iver, result, label)
     return result
 
@@ -0,0 +1,173 @@
+# tekuis_validation_db.py
+# -*- coding: utf-8 -*-
+"""
+validate_tekuis üçün PostGIS icra rejimi (çox böyük coverage-lər).
+
+Python rejimində bütün parsellər shapely obyektlərinə çevrilir və birləşmə yaddaşda
+qurulur; çox böyük ticket-lərdə bu, worker-in yaddaşını ağırlaşdırır. Bu rejimdə:
+  - feature-lər müvəqqəti cədvələ yazılır (GeoJSON mətn kimi, hissələrlə);
+  - normallaşdırma Python rejimi ilə eynidir: buffer(0) (və ya TEKUIS_PRECISION_GRID ilə
+    ST_ReducePrecision) → hissələr → yalnız Polygon → 3857 → buffer(0), indeks
+    (feature, hissə) sırası ilə;
+  - kəsişmələr GIST indeksli self-join ilə (&& + ST_Relate 'T********');
+  - boşluqlar ST_Union + komponentlərin xarici halqası ilə ST_Difference;
+  - nəticələr hissə-hissə (fetchmany) oxunur, cavab formatı dəyişmir.
+Müvəqqəti cədvəllər ON COMMIT DROP-dur (sorğu tranzaksiyası ilə birlikdə silinir).
+"""
+
+import json
+import logging
+import time
+
+import shapely
+from django.db import DatabaseError, connection, transaction
+
+from . import precision
+
+_INSERT_CHUNK = 1000
+_FETCH_CHUNK = 2000
+_PROBE_RETRY_S = 300.0  # PostGIS yoxdursa/baza əlçatmazdırsa yoxlama bu qədər sonra təkrarlanır
+
+logger = logging.getLogger(__name__)
+_available = None  # (bool, yoxlama vaxtı)
+
+
+def available() -> bool:
+    """
+    Default baza PostgreSQL + postgis extension-dırmı. Müsbət nəticə proses ömrü boyu,
+    mənfi nəticə _PROBE_RETRY_S müddətində yadda saxlanılır (hər validate-də sorğu atılmasın).
+    """
+    global _available
+    now = time.monotonic()
+    if _available is not None and (_available[0] or now - _available[1] < _PROBE_RETRY_S):
+        return _available[0]
+    ok = False
+    if connection.vendor == "postgresql":
+        try:
+            with connection.cursor() as cur:
+                cur.execute("SELECT postgis_lib_version()")
+                ok = cur.fetchone() is not None
+        except DatabaseError as e:
+            logger.info("[TEKUIS][VALIDATE] PostGIS unavailable (%s) → no auto db mode", e)
+    _available = (ok, now)
+    return ok
+
+
+def vertex_count(geojson: dict) -> int:
+    """Polygon/MultiPolygon feature-lərin təpə sayı (halqa uzunluqları; shapely qurmadan)."""
+    total = 0
+    for f in (geojson or {}).get("features") or []:
+        g = (f or {}).get("geometry") or {}
+        coords = g.get("coordinates") or []
+        polys = [coords] if g.get("type") == "Polygon" else coords if g.get("type") == "MultiPolygon" else []
+        for poly in polys:
+            for ring in poly or []:
+                total += len(ring or [])
+    return total
+
+
+def _fetch_chunks(cur):
+    while True:
+        rows = cur.fetchmany(_FETCH_CHUNK)
+        if not rows:
+            return
+        yield from rows
+
+
+def _parcel_table_sql(grid) -> str:
+    """
+    Normallaşdırılmış poliqon cədvəli. ST_ReducePrecision yalnız şəbəkə verildikdə SQL-ə
+    düşür (%(grid)s); əks halda Python rejimi kimi sadəcə buffer(0).
+    """
+    if grid:
+        norm = ("ST_ReducePrecision(CASE WHEN ST_IsValid(src.g) THEN src.g ELSE ST_Buffer(src.g, 0) END, "
+                "%(grid)s)")
+        fix = "CASE WHEN ST_IsValid(t.g) THEN t.g ELSE ST_Buffer(t.g, 0) END"
+    else:
+        norm = "ST_Buffer(src.g, 0)"
+        fix = "ST_Buffer(t.g, 0)"
+    return f"""
+        CREATE TEMP TABLE tekuis_validate_parcel ON COMMIT DROP AS
+        WITH parts AS (
+          SELECT s.fidx, d.path, d.geom
+          FROM tekuis_validate_src s,
+               LATERAL (SELECT ST_SetSRID(ST_GeomFromGeoJSON(s.gj), 4326) AS g) src,
+               LATERAL ST_Dump({norm}) d
+        ), poly AS (
+          SELECT p.fidx, p.path, {fix} AS geom
+          FROM parts p,
+               LATERAL (SELECT ST_Transform(p.geom, 3857) AS g) t
+          WHERE ST_GeometryType(p.geom) = 'ST_Polygon'
+        )
+        SELECT (row_number() OVER (ORDER BY fidx, path) - 1)::integer AS idx, geom
+        FROM poly
+        WHERE NOT ST_IsEmpty(geom)
+    """
+
+
+def overlaps_and_gaps(geojson: dict, min_overlap_sqm: float, min_gap_sqm: float):
+    """
+    Qaytarır: (n, pairs, gaps)
+      n     – normallaşdırılmış poliqon sayı;
+      pairs – [(i, j, kəsişmə 3857, sahə)], (i, j) üzrə sıralı (Python rejimi ilə eyni);
+      gaps  – [(gap 3857, sahə)], sahə > min_gap_sqm.
+    """
+    rows = []
+    for k, f in enumerate((geojson or {}).get("features") or []):
+        g = (f or {}).get("geometry")
+        if isinstance(g, dict) and g.get("type") in ("Polygon", "MultiPolygon"):
+            rows.append((k, json.dumps(g)))
+
+    with transaction.atomic(), connection.cursor() as cur:
+        # xarici tranzaksiya daxilində təkrar çağırış ola bilər (ON COMMIT DROP hələ işləməyib)
+        cur.execute("DROP TABLE IF EXISTS tekuis_validate_src, tekuis_validate_parcel")
+        cur.execute("CREATE TEMP TABLE tekuis_validate_src (fidx integer, gj text) ON COMMIT DROP")
+        for k in range(0, len(rows), _INSERT_CHUNK):
+            chunk = rows[k:k + _INSERT_CHUNK]
+            cur.execute(
+                "INSERT INTO tekuis_validate_src (fidx, gj) VALUES " + ",".join(["(%s, %s)"] * len(chunk)),
+                [v for row in chunk for v in row],
+            )
+
+        grid = precision.grid_deg()
+        cur.execute(_parcel_table_sql(grid), {"grid": float(grid)} if grid else None)
+        cur.execute("CREATE INDEX ON tekuis_validate_parcel USING GIST (geom)")
+        cur.execute("ANALYZE tekuis_validate_parcel")
+        cur.execute("SELECT count(*) FROM tekuis_validate_parcel")
+        n = int(cur.fetchone()[0])
+
+        # ---------- Kəsişmələr: GIST self-join
+        cur.execute("""
+            SELECT a.idx, b.idx, ST_AsBinary(x.geom), ST_Area(x.geom)
+            FROM tekuis_validate_parcel a
+            JOIN tekuis_validate_parcel b
+              ON a.idx < b.idx AND a.geom && b.geom
+            CROSS JOIN LATERAL (
+              SELECT ST_Buffer(ST_CollectionExtract(ST_Intersection(a.geom, b.geom), 3), 0) AS geom
+            ) x
+            WHERE ST_Relate(a.geom, b.geom, 'T********')
+              AND ST_Area(x.geom) > %s
+            ORDER BY a.idx, b.idx
+        """, [float(min_overlap_sqm)])
+        pairs = [
+            (int(i), int(j), shapely.from_wkb(bytes(wkb)), float(area))
+            for i, j, wkb, area in _fetch_chunks(cur)
+        ]
+
+        # ---------- Boşluqlar: birləşmənin komponentləri → xarici halqa − komponent
+        cur.execute("""
+            WITH u AS (
+              SELECT ST_Buffer(ST_Union(geom), 0) AS g FROM tekuis_validate_parcel
+            ), comp AS (
+              SELECT d.geom AS c FROM u, LATERAL ST_Dump(u.g) d
+            ), gap AS (
+              SELECT d.geom AS g
+              FROM comp, LATERAL ST_Dump(ST_Difference(ST_MakePolygon(ST_ExteriorRing(comp.c)), comp.c)) d
+            )
+            SELECT ST_AsBinary(g), ST_Area(g)
+            FROM gap
+            WHERE ST_GeometryType(g) = 'ST_Polygon' AND ST_Area(g) > %s
+        """, [float(min_gap_sqm)])
+        gaps = [(shapely.from_wkb(bytes(wkb)), float(area)) for wkb, area in _fetch_chunks(cur)]
+
+    return n, pairs, gaps
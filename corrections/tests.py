@@ -1,3 +1,813 @@
-from django.test import TestCase
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import time
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+import shapely
+from django.core.cache import caches
+from django.db import connection
+from django.http import HttpResponse, JsonResponse, QueryDict
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from pyproj import Transformer
+from shapely.geometry import shape
+from shapely.ops import transform
+
+from corrections import tekuis_validation as tv
+from corrections import (
+    admission,
+    coalescing,
+    feature_cache,
+    grid_agg,
+    paging,
+    parcels_api,
+    precision,
+    tekuis_validation_db,
+    validation_cache,
+    validation_session,
+    validation_token,
+)
+from corrections.admission import admit
+from corrections.async_utils import _GuardedConnection, _ThreadedConnection, oracle_id_list
+from corrections.attr_query import attr_query_from_get, attr_query_from_payload
+from corrections.breakers import CLOSED, OPEN, CircuitBreaker, CircuitOpen
+from corrections.coalescing import coalesced
+from corrections.deadline import Deadline
+from corrections.generalize import band_tolerance, simplify_features, zoom_band
+from corrections.grid_agg import grid_cell
+from corrections.id_exclusion import exclude_known, parse_have, parse_id_list, parse_rowid_list
+from corrections.reproject import to_3857, to_4326
+from corrections.supersession import latest_wins
+from corrections.views.tekuis import TEKUIS_ATTRS, _tekuis_by_ids_sql, _tekuis_by_rids_sql
+
+_LOCMEM = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+
+# PostGIS testləri yalnız TEKUIS_POSTGIS_TESTS=1 olduqda (test bazası + postgis extension lazımdır)
+POSTGIS_TESTS = os.environ.get("TEKUIS_POSTGIS_TESTS") == "1"
+
+
+def _square(x, y, size=0.001):
+    x0, y0, x1, y1 = (round(v, 6) for v in (x, y, x + size, y + size))  # qonşular eyni koordinatı bölüşsün
+    return [[[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]]
+
+
+def _fc(polygons):
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "id": i, "properties": {"ID": i}, "geometry": {"type": "Polygon", "coordinates": c}}
+            for i, c in enumerate(polygons)
+        ],
+    }
+
+
+def _coverage_fc():
+    """3×3 kvadrat, mərkəzi boş (boşluq) + sağ-üst kvadratla üst-üstə düşən bir kvadrat."""
+    cells = [_square(49.8 + 0.001 * i, 40.4 + 0.001 * j) for i in range(3) for j in range(3) if (i, j) != (1, 1)]
+    cells.append(_square(49.8015, 40.4015))
+    return _fc(cells)
+
+
+def _shingled_fc(n=6):
+    """n×n bir-birini örtən kvadratlar (hər biri qonşularının kənarını, diaqonal da daxil, örtür)."""
+    return _fc([_square(49.8 + 0.001 * i, 40.4 + 0.001 * j, 0.0012) for i in range(n) for j in range(n)])
+
+
+class CombinedParcelsTests(SimpleTestCase):
+    def test_one_source_failing_keeps_the_other(self):
+        async def necas():
+            return [{"type": "Feature", "geometry": None, "properties": {"SOURCE": "NECAS"}}]
+
+        async def down():
+            raise RuntimeError("ORA-12541")
+
+        with self.assertLogs("corrections.parcels_api", "WARNING"):
+            out = asyncio.run(parcels_api._run_both(down(), necas()))
+        self.assertTrue(out["ok"])
+        self.assertEqual(out["errors"], {"tekuis": "ORA-12541"})
+        self.assertEqual(out["tekuis"]["features"], [])
+        self.assertEqual(len(out["necas"]["features"]), 1)
+
+        with self.assertLogs("corrections.parcels_api", "WARNING"):
+            self.assertFalse(asyncio.run(parcels_api._run_both(down(), down()))["ok"])
+
+
+class LatestWinsTests(SimpleTestCase):
+    def setUp(self):
+        self.rf = RequestFactory()
+
+    def _view(self, started, release):
+        @latest_wins("test_bbox")
+        async def view(request):
+            if request.GET.get("slow"):
+                started.set()
+                await release.wait()
+            return JsonResponse({"ok": True})
+
+        return view
+
+    def test_newer_request_supersedes_older(self):
+        async def scenario():
+            started, release = asyncio.Event(), asyncio.Event()
+            view = self._view(started, release)
+            old = asyncio.create_task(view(self.rf.get("/", {"view_key": "tab1", "slow": 1})))
+            await started.wait()
+            new = await view(self.rf.get("/", {"view_key": "tab1"}))
+            return await old, new
+
+        old, new = asyncio.run(scenario())
+        self.assertEqual(old.status_code, 409)
+        self.assertEqual(json.loads(old.content), {"ok": False, "superseded": True})
+        self.assertEqual(new.status_code, 200)
+
+    def test_older_seq_rejected(self):
+        async def scenario():
+            started, release = asyncio.Event(), asyncio.Event()
+            view = self._view(started, release)
+            newer = asyncio.create_task(view(self.rf.get("/", {"view_key": "tab1", "seq": 5, "slow": 1})))
+            await started.wait()
+            late = await view(self.rf.get("/", {"view_key": "tab1", "seq": 3}))
+            other_tab = await view(self.rf.get("/", {"view_key": "tab2", "seq": 1}))
+            release.set()
+            return await newer, late, other_tab
+
+        newer, late, other_tab = asyncio.run(scenario())
+        self.assertEqual((newer.status_code, late.status_code, other_tab.status_code), (200, 409, 200))
+
+
+class CoalescingTests(SimpleTestCase):
+    def test_followers_share_leader_response(self):
+        calls = []
+
+        async def produce():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return HttpResponse(b'{"n": 1}', content_type="application/json")
+
+        async def scenario():
+            return await asyncio.gather(*(coalesced(("test", 1), produce) for _ in range(3)))
+
+        resps = asyncio.run(scenario())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([r.content for r in resps], [b'{"n": 1}'] * 3)
+        self.assertEqual({r["Content-Type"] for r in resps}, {"application/json"})
+        self.assertNotIn(("test", 1), coalescing._INFLIGHT)
+
+    def test_follower_runs_itself_when_leader_cancelled(self):
+        async def hang():
+            await asyncio.sleep(30)
+
+        async def own():
+            return HttpResponse(b"own")
+
+        async def scenario():
+            leader = asyncio.create_task(coalesced(("test", 2), hang))
+            await asyncio.sleep(0)
+            follower = asyncio.create_task(coalesced(("test", 2), own))
+            await asyncio.sleep(0)
+            leader.cancel()  # klient getdi → _LeaderGone
+            with self.assertRaises(asyncio.CancelledError):
+                await leader
+            return await follower
+
+        self.assertEqual(asyncio.run(scenario()).content, b"own")
+        self.assertNotIn(("test", 2), coalescing._INFLIGHT)
+
+
+class AdmissionTests(SimpleTestCase):
+    def setUp(self):
+        self.rf = RequestFactory()
+        admission._LANES.clear()
+        self.addCleanup(admission._LANES.clear)
+
+    def _nested(self, cls, outer, inner):
+        """Birinci sorğu işləyərkən ikincisi gəlir; (xarici, daxili) cavablar."""
+        seen = {}
+
+        @admit(cls)
+        def view(request):
+            if "inner" not in seen:
+                seen["inner"] = view(inner)
+            return JsonResponse({"ok": True})
+
+        return view(outer), seen["inner"]
+
+    @override_settings(ADMISSION_PER_TICKET=1)
+    def test_ticket_cap_is_429(self):
+        outer, inner = self._nested(
+            "interactive", self.rf.get("/", {"ticket": "T1"}), self.rf.get("/", {"ticket": "T1"})
+        )
+        self.assertEqual((outer.status_code, inner.status_code), (200, 429))
+        self.assertEqual(json.loads(inner.content)["scope"], "ticket")
+        self.assertFalse(admission._HOLDERS)  # limitlər buraxılıb
+
+    @override_settings(ADMISSION_CLASSES={"batch": {"limit": 1, "queue": 0, "wait_s": 0, "retry_after": 7}})
+    def test_saturated_class_is_503(self):
+        outer, inner = self._nested("batch", self.rf.get("/", {"ticket": "T1"}), self.rf.get("/", {"ticket": "T2"}))
+        self.assertEqual((outer.status_code, inner.status_code), (200, 503))
+        self.assertEqual(inner["Retry-After"], "7")
+        self.assertEqual(json.loads(inner.content)["error"], "overloaded")
+        self.assertEqual(admission.admission_stats()["batch"]["active"], 0)
+
+    @override_settings(ADMISSION_TRUSTED_PROXIES=["10.0.0.0/8"])
+    def test_forwarded_for_only_from_trusted_proxy(self):
+        via_proxy = self.rf.get("/", REMOTE_ADDR="10.0.0.5", HTTP_X_FORWARDED_FOR="6.6.6.6, 1.2.3.4, 10.0.0.7")
+        self.assertEqual(admission._client_ip(via_proxy), "1.2.3.4")
+        direct = self.rf.get("/", REMOTE_ADDR="5.5.5.5", HTTP_X_FORWARDED_FOR="1.2.3.4")
+        self.assertEqual(admission._client_ip(direct), "5.5.5.5")
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("corrections.breakers.time.monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _fail(self, br):
+        with self.assertRaises(OSError):
+            with br.guard():
+                raise OSError("down")
+
+    def test_open_half_open_closed(self):
+        br = CircuitBreaker("test", min_calls=2, failure_rate=0.5, open_s=20)
+        with self.assertLogs("corrections.breakers", "INFO"):
+            self._fail(br)
+            self.assertEqual(br.state, CLOSED)  # min_calls-dan az
+            self._fail(br)
+            self.assertEqual(br.state, OPEN)
+            with self.assertRaises(CircuitOpen) as cm:
+                with br.guard():
+                    self.fail("OPEN-da asılılıq çağırılmamalıdır")
+            self.assertEqual(cm.exception.retry_after, 20)
+
+            self.now += 21
+            with br.guard():
+                self.assertEqual(br.state, "half_open")
+            self.assertEqual(br.state, CLOSED)
+
+            self._fail(br)
+            self._fail(br)
+            self.assertEqual((br.state, br.trips), (OPEN, 2))
+            self.now += 21
+            self._fail(br)  # HALF_OPEN sınağı uğursuz → yenidən OPEN
+        self.assertEqual((br.state, br.trips), (OPEN, 3))
+
+    def test_half_open_admits_one_probe(self):
+        br = CircuitBreaker("test", min_calls=1, open_s=5)
+        with self.assertLogs("corrections.breakers", "INFO"):
+            self._fail(br)
+            self.now += 6
+            with br.guard():
+                with self.assertRaises(CircuitOpen):
+                    with br.guard():
+                        pass
+        self.assertEqual(br.state, CLOSED)
+
+
+class DeadlineTests(SimpleTestCase):
+    def test_call_timeout_reaches_real_connection(self):
+        class _Real:
+            call_timeout = 0
+
+        real = _Real()
+        conn = _GuardedConnection(_ThreadedConnection(real), CircuitBreaker("test"))
+        deadline = Deadline(2.0)
+        deadline.apply(conn)
+        self.assertTrue(0 < real.call_timeout <= 2000)
+        self.assertEqual(conn.call_timeout, real.call_timeout)
+        self.assertIs(conn.deadline, deadline)
+
+    def test_budget_timeout_is_not_a_breaker_failure(self):
+        class _Dpy4024:
+            full_code = "DPY-4024"
+
+        class _Cursor:
+            async def execute(self, sql, params=None):
+                raise TimeoutError(_Dpy4024())
+
+        class _Conn:
+            call_timeout = 0
+
+            def cursor(self):
+                return _Cursor()
+
+        br = CircuitBreaker("test", min_calls=1)
+        conn = _GuardedConnection(_Conn(), br)
+        Deadline(0).apply(conn)  # büdcə bitib
+        with self.assertRaises(TimeoutError):
+            asyncio.run(conn.cursor().execute("SELECT 1"))
+        self.assertEqual(br.snapshot()["calls"], 0)
+
+        conn.deadline = None  # büdcəsiz eyni timeout asılılığın xətasıdır
+        with self.assertRaises(TimeoutError), self.assertLogs("corrections.breakers", "WARNING"):
+            asyncio.run(conn.cursor().execute("SELECT 1"))
+        self.assertEqual(br.state, OPEN)
+
+
+class PagingCursorTests(SimpleTestCase):
+    BBOX = (49.0, 40.0, 49.1, 40.1)
+
+    def test_roundtrip(self):
+        state = {"tekuis": {"after": "AAAR3sAAEAAAACXAAA", "total": None}, "necas": None}
+        token = paging.encode_cursor("parcels_bbox", self.BBOX, state)
+        self.assertEqual(paging.decode_cursor(token, "parcels_bbox", self.BBOX), state)
+
+    def test_tampered_or_foreign_cursor_rejected(self):
+        token = paging.encode_cursor("tekuis_bbox", self.BBOX, {"tekuis": {"after": "AAA", "total": None}})
+        for bad, kind, bbox in (
+            (token[:-2] + "xx", "tekuis_bbox", self.BBOX),
+            ("not-a-cursor", "tekuis_bbox", self.BBOX),
+            (token, "necas_bbox", self.BBOX),
+            (token, "tekuis_bbox", (49.0, 40.0, 49.2, 40.1)),
+        ):
+            with self.assertRaises(ValueError):
+                paging.decode_cursor(bad, kind, bbox)
+
+    @override_settings(PARCELS_PAGE_MAX=100, PARCELS_PAGE_SIZE=50)
+    def test_page_limit_capped(self):
+        self.assertEqual(
+            [paging.page_limit(v) for v in (None, "", "20", "1000", "0", "x")], [50, 50, 20, 100, 1, 50]
+        )
+
+    def test_next_only_while_a_source_is_pending(self):
+        state = {"tekuis": {"after": None, "total": 3}, "necas": None}
+        more = paging.page_fields("parcels_bbox", self.BBOX, 10, state)
+        self.assertTrue(more["has_more"])  # necas hələ başlamayıb
+        self.assertIsNotNone(more["next"])
+        end = paging.page_fields("tekuis_bbox", self.BBOX, 10, {"tekuis": {"after": None, "total": 3}})
+        self.assertEqual((end["has_more"], end["next"], end["total_estimate"]), (False, None, 3))
+
+
+class GeneralizeTests(SimpleTestCase):
+    @override_settings(PARCELS_SIMPLIFY_MAX_ZOOM=16)
+    def test_zoom_band(self):
+        self.assertEqual(zoom_band({"zoom": "12.7"}), 12)
+        self.assertEqual(zoom_band({"resolution": str(156543.03392804097 / 2 ** 10)}), 10)
+        for params in ({"zoom": "17"}, {}, {"zoom": "x"}, {"resolution": "0"}):
+            self.assertIsNone(zoom_band(params))
+
+    def test_tolerance_in_srid_units(self):
+        self.assertAlmostEqual(band_tolerance(10, 3857) / band_tolerance(10, 4326), 111320.0)
+
+    def test_valid_coverage_stays_a_coverage(self):
+        features = _coverage_fc()["features"][:-1]  # üst-üstə düşən kvadrat çıxarılıb
+        simplify_features(features, 14)
+        self.assertTrue(shapely.coverage_is_valid([shape(f["geometry"]) for f in features]))
+
+    def test_overlapping_input_simplified_per_geometry(self):
+        features = _coverage_fc()["features"]
+        with self.assertLogs("corrections.generalize", "INFO") as logs:
+            simplify_features(features, 14)
+        self.assertIn("not a valid coverage", logs.output[0])
+        self.assertTrue(all(shape(f["geometry"]).is_valid for f in features))
+
+
+class AttrQueryTests(SimpleTestCase):
+    def test_unknown_field_rejected(self):
+        with self.assertRaises(ValueError):
+            attr_query_from_get(QueryDict("fields=ID,SHAPE"), TEKUIS_ATTRS, "t")
+        with self.assertRaises(ValueError):
+            attr_query_from_get(QueryDict("f_ID%3D1%20OR%201=1"), TEKUIS_ATTRS, "t")
+        with self.assertRaises(ValueError):
+            attr_query_from_payload({"filters": {"1=1) --": [1]}}, TEKUIS_ATTRS, "t")
+        with self.assertRaises(ValueError):
+            attr_query_from_payload({"filters": ["ID"]}, TEKUIS_ATTRS, "t")
+
+    def test_values_are_binds(self):
+        q = attr_query_from_payload({"fields": ["id"], "filters": {"rayon_adi": "x' OR '1'='1"}}, TEKUIS_ATTRS, "t")
+        self.assertEqual(q.fields, ("ID",))
+        self.assertEqual(q.where_sql, " AND t.RAYON_ADI = :fq0")
+        self.assertEqual(q.binds, {"fq0": "x' OR '1'='1"})
+
+
+class GridCellTests(SimpleTestCase):
+    BBOX = (44.0, 38.0, 51.0, 42.0)
+
+    @override_settings(PARCELS_GRID_MAX_CELLS=100)
+    def test_cell_grows_to_respect_cap(self):
+        for params in ({"agg": "grid", "cell": "0.001"}, {"agg": "grid", "zoom": "18"}, {"agg": "grid"}):
+            cell = grid_cell(params, self.BBOX)
+            self.assertLessEqual(grid_agg._cell_count(self.BBOX, cell), 100)
+        self.assertGreater(grid_cell({"agg": "grid", "cell": "0.001"}, self.BBOX), 0.001)
+
+    def test_off_or_invalid(self):
+        self.assertIsNone(grid_cell({}, self.BBOX))
+        for cell in ("x", "0", "-1"):
+            with self.assertRaises(ValueError):
+                grid_cell({"agg": "grid", "cell": cell}, self.BBOX)
+
+    def test_cells_to_fc(self):
+        fc = grid_agg.cells_to_fc([(10, 20, 3, 1.5, "A"), (11, 20, 2, None, None)], 0.5, "TEKUIS")
+        self.assertEqual(fc["agg"], {"mode": "grid", "cell": 0.5, "cells": 2, "count": 5})
+        self.assertEqual(fc["features"][0]["geometry"]["coordinates"][0][0], [5.0, 10.0])
+
+
+@override_settings(CACHES={"default": _LOCMEM, "parcel_geoms": _LOCMEM})
+class FeatureCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.feature = {
+            "type": "Feature",
+            "geometry": {"type": "Polygon", "coordinates": _square(49.8, 40.4)},
+            "properties": {"ID": 1, "RAYON_ADI": "X"},
+        }
+
+    def test_roundtrip_and_scn(self):
+        feature_cache.store("tekuis", [("R1", 10, self.feature)])
+        hits, missing = feature_cache.lookup("tekuis", [("R1", 10), ("R2", 10)])
+        self.assertEqual(missing, ["R2"])
+        self.assertTrue(shape(hits["R1"]["geometry"]).equals(shape(self.feature["geometry"])))
+        self.assertEqual(hits["R1"]["properties"], self.feature["properties"])
+        self.assertEqual(feature_cache.lookup("tekuis", [("R1", 11)]), ({}, ["R1"]))  # SCN dəyişib
+
+    def test_project(self):
+        out = feature_cache.project(dict(self.feature, properties={"ID": 1, "RAYON_ADI": "X", "SOURCE": "TEKUIS"}),
+                                    ["ID"])
+        self.assertEqual(out["properties"], {"ID": 1, "SOURCE": "TEKUIS"})
+
+    def test_rowid_lookup_is_one_collection_bind(self):
+        sql = _tekuis_by_rids_sql()
+        self.assertIn("TABLE(:ids)", sql)
+        self.assertNotIn(":r0", sql)
+
+
+class IdExclusionTests(SimpleTestCase):
+    def test_have_ranges_and_bitmap(self):
+        self.assertEqual(parse_have("1-3,10").digest, parse_have("10,2-3,1").digest)
+        have = parse_have("b:8:AQI")  # bit 0 → 8, bit 9 → 17
+        self.assertIn(8, have)
+        self.assertIn("17", have)
+        self.assertNotIn(9, have)
+        with self.assertRaises(ValueError):
+            parse_have("5-1")
+
+    def test_exclude_known_keeps_non_integer_keys(self):
+        feats = [{"properties": {"ID": v}} for v in (1, 2, "A7", None)]
+        kept, n = exclude_known(feats, parse_have("1-2"), "ID")
+        self.assertEqual(n, 2)
+        self.assertEqual([f["properties"]["ID"] for f in kept], ["A7", None])
+
+
+class IdBindTests(SimpleTestCase):
+    def test_ids_sql_is_single_collection_bind(self):
+        q = attr_query_from_payload({"filters": {"RAYON_ADI": ["a", "b"]}}, TEKUIS_ATTRS, "t")
+        sql = _tekuis_by_ids_sql(q)
+        self.assertIn("TABLE(:ids)", sql)
+        self.assertNotIn(":r0", sql)
+        self.assertEqual(set(q.binds), {"fq0", "fq1"})
+
+    def test_oracle_id_list_binds_one_object(self):
+        class _Type:
+            def newobject(self, values):
+                return ("obj", values)
+
+        class _Conn:
+            async def gettype(self, name):
+                self.name = name
+                return _Type()
+
+        conn = _Conn()
+        obj = asyncio.run(oracle_id_list(conn, (3, 1, 2), numeric=True))
+        self.assertEqual((conn.name, obj), ("SYS.ODCINUMBERLIST", ("obj", [3, 1, 2])))
+        asyncio.run(oracle_id_list(conn, ["A"], numeric=False))
+        self.assertEqual(conn.name, "SYS.ODCIVARCHAR2LIST")
+
+    def test_id_lists_validated(self):
+        self.assertEqual(parse_id_list("3,1,3", numeric=True), [3, 1])
+        with self.assertRaises(ValueError):
+            parse_id_list(["1", "x"], numeric=True)
+        with self.assertRaises(ValueError):
+            parse_rowid_list(["AAAR3sAAEAAAACXAAA", "1' OR '1'='1"])
+
+
+class OverlapPairsTests(SimpleTestCase):
+    def _pairwise(self, polys, min_area):
+        """Köhnə (vektorlaşdırılmamış) alqoritm: hər cüt ayrıca."""
+        out = []
+        for i in range(len(polys)):
+            for j in range(i + 1, len(polys)):
+                a, b = polys[i], polys[j]
+                if a.intersects(b) and not a.touches(b):
+                    inter = a.intersection(b).buffer(0)
+                    if inter.area > min_area:
+                        out.append((i, j, round(inter.area, 3)))
+        return out
+
+    def test_matches_pairwise(self):
+        for fc in (_coverage_fc(), _shingled_fc()):
+            polys = tv._collect_polys_from_geojson_3857(fc)
+            got = [(i, j, round(a, 3)) for i, j, _g, a in tv._overlap_pairs(polys, 0.25)]
+            self.assertTrue(got)
+            self.assertEqual(got, self._pairwise(polys, 0.25))
+
+    def test_touching_neighbours_are_not_overlaps(self):
+        polys = tv._collect_polys_from_geojson_3857(_fc([_square(49.8, 40.4), _square(49.801, 40.4)]))
+        self.assertEqual(tv._overlap_pairs(polys, 0.0), [])
+
+
+class CoverageEngineTests(SimpleTestCase):
+    def test_same_result_as_overlay(self):
+        clean = _fc([f["geometry"]["coordinates"] for f in _coverage_fc()["features"][:-1]])  # etibarlı coverage
+        for fc in (_coverage_fc(), _shingled_fc(), clean):
+            polys = tv._collect_polys_from_geojson_3857(fc)
+            pairs, union = tv._coverage_overlaps_and_union(polys, 0.25)
+            expected = tv._overlap_pairs(polys, 0.25)
+            self.assertEqual([(i, j) for i, j, _g, _a in pairs], [(i, j) for i, j, _g, _a in expected])
+            self.assertEqual([round(a, 3) for *_ij, a in pairs], [round(a, 3) for *_ij, a in expected])
+            self.assertAlmostEqual(union.area, tv._overlay_union(polys).area, delta=0.01)
+
+
+class ReprojectTests(SimpleTestCase):
+    FWD = Transformer.from_crs(4326, 3857, always_xy=True)
+    INV = Transformer.from_crs(3857, 4326, always_xy=True)
+
+    def test_arrays_match_per_geometry_pyproj(self):
+        geoms = [shape(f["geometry"]) for f in _coverage_fc()["features"]]
+        for g, g3857 in zip(geoms, to_3857(geoms)):
+            self.assertTrue(g3857.equals_exact(transform(self.FWD.transform, g), 1e-6))
+        back = to_4326(to_3857(geoms))
+        self.assertTrue(all(a.equals_exact(b, 1e-9) for a, b in zip(back, geoms)))
+        self.assertTrue(to_3857(geoms[0]).equals_exact(transform(self.FWD.transform, geoms[0]), 1e-6))
+
+    def test_gap_hash_matches_old_formula(self):
+        """Köhnə hesablama: 4326-ya geri proyeksiya, yenidən 3857-də sahə (ignore cədvəlindəki hash-lər)."""
+        polys = tv._collect_polys_from_geojson_3857(_coverage_fc())
+        cands = tv._gap_candidates(tv._flatten_polys(tv._overlay_union(polys)), 5.0)
+        self.assertTrue(cands)
+        for (g, _a), item in zip(cands, tv._gap_items(cands)):
+            g4326 = transform(self.INV.transform, g)
+            minx, miny, maxx, maxy = g4326.envelope.bounds
+            area = transform(self.FWD.transform, g4326).area
+            sig = f"{round(minx,6)},{round(miny,6)},{round(maxx,6)},{round(maxy,6)}|{round(area,1)}"
+            self.assertEqual(item["hash"], hashlib.md5(sig.encode("utf-8")).hexdigest())
+
+
+class PartitionTests(SimpleTestCase):
+    def setUp(self):
+        self.polys = tv._collect_polys_from_geojson_3857(_shingled_fc(8))
+
+    def test_tiles_own_each_parcel_once_and_keep_pairs(self):
+        tiles = tv._tiles(self.polys, 6)
+        self.assertGreater(len(tiles), 1)
+        owned = np.concatenate([o for o, _w in tiles])
+        self.assertEqual(sorted(owned.tolist()), list(range(len(self.polys))))
+        tile_of = {int(i): k for k, (o, _w) in enumerate(tiles) for i in o}
+        for i, j, _g, _a in tv._overlap_pairs(self.polys, 0.25):
+            self.assertIn(j, tiles[tile_of[i]][1])  # sərhəddən keçən cüt də i-nin tile-ında
+
+    @mock.patch.object(tv, "TILE_PARCELS", 10)
+    def test_partitioned_equals_single_process(self):
+        pairs, union = tv._partitioned_overlaps_and_union(self.polys, 0.25, 1)
+        expected = tv._overlap_pairs(self.polys, 0.25)
+        self.assertEqual([(i, j) for i, j, _g, _a in pairs], [(i, j) for i, j, _g, _a in expected])  # təkrarsız
+        self.assertAlmostEqual(union.area, tv._overlay_union(self.polys).area, delta=0.01)
+
+
+@override_settings(CACHES={"default": _LOCMEM, "validation": _LOCMEM, "validation_sessions": _LOCMEM})
+class IgnoredGapsTests(SimpleTestCase):
+    def test_loaded_once_and_filtered(self):
+        fc = _coverage_fc()
+        with mock.patch.object(tv, "_ignored_gap_hashes", return_value=set()) as loader:
+            full = tv.validate_tekuis(fc, 1, min_overlap_sqm=0.25, min_gap_sqm=5.0)
+        loader.assert_called_once_with(1)
+        self.assertEqual(full["stats"]["overlap_count"], 3)
+        h = full["gaps"][0]["hash"]
+
+        with mock.patch.object(tv, "_ignored_gap_hashes", return_value={h}) as loader:
+            out = tv.validate_tekuis(fc, 1, min_overlap_sqm=0.25, min_gap_sqm=5.0)
+        loader.assert_called_once_with(1)
+        self.assertNotIn(h, [g["hash"] for g in out["gaps"]])
+        self.assertEqual(out["stats"]["gap_count"], full["stats"]["gap_count"] - 1)
+
+
+class ValidationCacheKeyTests(SimpleTestCase):
+    def test_input_hash_ignores_properties_and_key_order(self):
+        fc = _coverage_fc()
+        other = copy.deepcopy(fc)
+        for f in other["features"]:
+            f["properties"]["X"] = 1
+            f["geometry"] = dict(reversed(list(f["geometry"].items())))
+        self.assertEqual(validation_cache.input_hash(fc), validation_cache.input_hash(other))
+
+    def test_input_hash_changes_with_geometry(self):
+        fc = _coverage_fc()
+        other = copy.deepcopy(fc)
+        other["features"][-1]["geometry"]["coordinates"][0][1][0] += 1e-6
+        self.assertNotEqual(validation_cache.input_hash(fc), validation_cache.input_hash(other))
+
+    def test_content_hash_normalizes_ring_start(self):
+        fc = _coverage_fc()
+        shifted = copy.deepcopy(fc)
+        ring = shifted["features"][0]["geometry"]["coordinates"][0]
+        shifted["features"][0]["geometry"]["coordinates"][0] = ring[1:] + ring[1:2]
+        a = tv._collect_polys_from_geojson_3857(fc)
+        b = tv._collect_polys_from_geojson_3857(shifted)
+        self.assertEqual(validation_cache.content_hash(a, 0.25, 5.0), validation_cache.content_hash(b, 0.25, 5.0))
+        self.assertNotEqual(validation_cache.content_hash(a, 0.25, 5.0), validation_cache.content_hash(a, 0.5, 5.0))
+
+    def test_execution_path_in_key(self):
+        runs = (("overlay", 0, False), ("coverage", 0, False), ("overlay", 4, False), ("coverage", 0, True))
+        labels = {tv._engine_label(e, w, db) for e, w, db in runs}
+        self.assertEqual(labels, {"overlay", "coverage", "overlay/p4", "db"})
+        self.assertEqual(len({validation_cache._key(1, "c", "i", label) for label in labels}), 4)
+
+
+class ValidationTokenTests(SimpleTestCase):
+    def setUp(self):
+        self.fc = _coverage_fc()
+        self.ihash = validation_cache.input_hash(self.fc)
+        self.token = validation_token.issue(7, self.ihash, 0.25, 5.0, ["b|a", "a|b"], ["g1"])
+
+    def test_roundtrip(self):
+        self.assertEqual(validation_token.verify(self.token, self.fc, 7, 0.25, 5.0), ({"a|b", "b|a"}, {"g1"}))
+
+    def test_rejects_other_input(self):
+        moved = copy.deepcopy(self.fc)
+        moved["features"][0]["geometry"]["coordinates"][0][0][0] += 1e-6
+        self.assertIsNone(validation_token.verify(self.token, moved, 7, 0.25, 5.0))
+        self.assertIsNone(validation_token.verify(self.token, self.fc, 8, 0.25, 5.0))
+        self.assertIsNone(validation_token.verify(self.token, self.fc, 7, 0.5, 5.0))
+
+    def test_rejects_tampered_or_missing(self):
+        self.assertIsNone(validation_token.verify(self.token[:-2] + "xx", self.fc, 7, 0.25, 5.0))
+        self.assertIsNone(validation_token.verify(None, self.fc, 7, 0.25, 5.0))
+
+    @override_settings(TEKUIS_VALIDATION_TOKEN_MAX_AGE_S=60)
+    def test_expiry(self):
+        with mock.patch("django.core.signing.time.time", return_value=time.time() + 61):
+            self.assertIsNone(validation_token.verify(self.token, self.fc, 7, 0.25, 5.0))
+        with mock.patch("django.core.signing.time.time", return_value=time.time() + 30):
+            self.assertIsNotNone(validation_token.verify(self.token, self.fc, 7, 0.25, 5.0))
+
+
+@override_settings(CACHES={"default": _LOCMEM, "validation": _LOCMEM, "validation_sessions": _LOCMEM})
+@mock.patch.object(tv, "_ignored_gap_hashes", return_value=set())
+class ValidationSessionTests(SimpleTestCase):
+    def test_delta_matches_full_start(self, _ignored):
+        fc = _coverage_fc()
+        first = validation_session.start(1, fc, 0.25, 5.0)
+
+        # overlap-ı yaradan kvadratı başqa qonşulara sürüşdür, bir kvadratı sil, yenisini əlavə et
+        moved = copy.deepcopy(fc["features"][-1])
+        moved["geometry"]["coordinates"] = _square(49.8005, 40.4025)
+        added = {"type": "Feature", "id": 100, "properties": {"ID": 100},
+                 "geometry": {"type": "Polygon", "coordinates": _square(49.803, 40.4)}}
+        delta = validation_session.apply(1, [moved, added], ["0"], base_version=1)
+
+        final = copy.deepcopy(fc)
+        final["features"] = final["features"][1:-1] + [moved, added]
+        full = validation_session.start(2, final, 0.25, 5.0)
+
+        current = {o["id"] for o in first["added"]["overlaps"]}
+        current = (current | {o["id"] for o in delta["added"]["overlaps"]}) - set(delta["removed"]["overlaps"])
+        self.assertTrue(full["added"]["overlaps"] and full["added"]["gaps"])
+        self.assertEqual(delta["stats"], full["stats"])
+        self.assertEqual(current, {o["id"] for o in full["added"]["overlaps"]})
+        self.assertEqual(
+            sorted(round(g["area_sqm"]) for g in delta["added"]["gaps"]),
+            sorted(round(g["area_sqm"]) for g in full["added"]["gaps"]),
+        )
+
+    def test_stale_and_missing(self, _ignored):
+        validation_session.start(1, _coverage_fc(), 0.25, 5.0)
+        with self.assertRaises(validation_session.SessionError) as cm:
+            validation_session.apply(1, [], [], base_version=5)
+        self.assertEqual(cm.exception.code, "STALE")
+        with self.assertRaises(validation_session.SessionError) as cm:
+            validation_session.apply(999, [], [])
+        self.assertEqual((cm.exception.code, cm.exception.status), ("NO_SESSION", 410))
+
+    def test_version_claim_is_exclusive(self, _ignored):
+        validation_session.start(1, _coverage_fc(), 0.25, 5.0)
+        # paralel delta eyni versiyanı artıq tutub (oxuma ilə yazma arasında)
+        claim = validation_session._claim_key(1, validation_session._load(1))
+        self.assertTrue(caches["validation_sessions"].add(claim, 1))
+        with self.assertRaises(validation_session.SessionError) as cm:
+            validation_session.apply(1, [], ["0"], base_version=1)
+        self.assertEqual((cm.exception.code, cm.exception.status), ("STALE", 409))
+
+        caches["validation_sessions"].delete(claim)
+        with mock.patch.object(validation_session, "_apply", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                validation_session.apply(1, [], ["0"], base_version=1)
+        # uğursuz delta iddianı buraxır; ikinci cəhd keçir, köhnə versiya isə artıq STALE-dir
+        self.assertEqual(validation_session.apply(1, [], ["0"], base_version=1)["version"], 2)
+        with self.assertRaises(validation_session.SessionError):
+            validation_session.apply(1, [], ["1"], base_version=1)
+
+
+class ParcelTableSqlTests(SimpleTestCase):
+    def test_reduce_precision_only_with_grid(self):
+        self.assertNotIn("ST_ReducePrecision", tekuis_validation_db._parcel_table_sql(None))
+        self.assertNotIn("%(grid)s", tekuis_validation_db._parcel_table_sql(None))
+        self.assertIn("ST_ReducePrecision", tekuis_validation_db._parcel_table_sql(1e-7))
+
+
+class DbModeSelectionTests(SimpleTestCase):
+    """Avtomatik rejim seçimi – PostGIS tələb olunmur (available() mock-lanır)."""
+
+    @mock.patch.object(tekuis_validation_db, "available", return_value=True)
+    def test_thresholds(self, _available):
+        fc = _coverage_fc()  # 9 feature, 45 təpə
+        with mock.patch.object(tv, "DB_MIN_FEATURES", 20000), mock.patch.object(tv, "DB_MIN_VERTICES", 2000000):
+            self.assertFalse(tv._use_db_mode(fc, None))
+        with mock.patch.object(tv, "DB_MIN_FEATURES", 9):
+            self.assertTrue(tv._use_db_mode(fc, None))
+        with mock.patch.object(tv, "DB_MIN_FEATURES", 0), mock.patch.object(tv, "DB_MIN_VERTICES", 45):
+            self.assertTrue(tv._use_db_mode(fc, None))
+        with mock.patch.object(tv, "DB_MIN_FEATURES", 0), mock.patch.object(tv, "DB_MIN_VERTICES", 0):
+            self.assertFalse(tv._use_db_mode(fc, None))
+
+    @mock.patch.object(tv, "DB_MIN_FEATURES", 1)
+    def test_needs_postgis_unless_explicit(self):
+        with mock.patch.object(tekuis_validation_db, "available", return_value=False):
+            self.assertFalse(tv._use_db_mode(_coverage_fc(), None))
+            self.assertTrue(tv._use_db_mode(_coverage_fc(), "db"))
+            self.assertFalse(tv._use_db_mode(_coverage_fc(), "memory"))
+
+    @mock.patch.object(tekuis_validation_db, "_available", None)
+    def test_probe_skips_other_vendors(self):
+        with mock.patch.object(tekuis_validation_db.connection, "vendor", "sqlite"):
+            self.assertFalse(tekuis_validation_db.available())
+        self.assertEqual(tekuis_validation_db._available[0], False)
+        with mock.patch.object(tekuis_validation_db.connection, "vendor", "postgresql"):
+            self.assertFalse(tekuis_validation_db.available())  # mənfi nəticə _PROBE_RETRY_S yadda qalır
+
+
+@skipUnless(POSTGIS_TESTS, "TEKUIS_POSTGIS_TESTS=1 deyil")
+class PostgisValidationTests(TestCase):
+    databases = {"default"} if POSTGIS_TESTS else set()
+
+    @classmethod
+    def setUpTestData(cls):
+        with connection.cursor() as cur:
+            cur.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+
+    def _memory(self, fc, min_ov, min_ga):
+        polys = tv._collect_polys_from_geojson_3857(fc)
+        pairs = tv._overlap_pairs(polys, min_ov)
+        gaps = tv._gap_candidates(tv._flatten_polys(tv._overlay_union(polys)), min_ga)
+        return len(polys), pairs, gaps
+
+    def test_matches_memory_mode(self):
+        fc = _coverage_fc()
+        n, pairs, gaps = tekuis_validation_db.overlaps_and_gaps(fc, 0.25, 5.0)
+        m_n, m_pairs, m_gaps = self._memory(fc, 0.25, 5.0)
+        self.assertTrue(m_pairs and m_gaps)
+        self.assertEqual(n, m_n)
+        self.assertEqual([(i, j) for i, j, _g, _a in pairs], [(i, j) for i, j, _g, _a in m_pairs])
+        for (_i, _j, _g, a), (_mi, _mj, _mg, ma) in zip(pairs, m_pairs):
+            self.assertAlmostEqual(a, ma, delta=max(0.01, ma * 1e-6))
+        self.assertEqual(len(gaps), len(m_gaps))
+        self.assertAlmostEqual(sum(a for _g, a in gaps), sum(a for _g, a in m_gaps), delta=0.01)
+
+    def test_explain_plan(self):
+        fc = _coverage_fc()
+        with connection.cursor() as cur:
+            cur.execute("CREATE TEMP TABLE tekuis_validate_src (fidx integer, gj text)")
+            cur.execute(
+                "INSERT INTO tekuis_validate_src (fidx, gj) VALUES (%s, %s)",
+                [0, json.dumps(fc["features"][0]["geometry"])],
+            )
+            for grid in (None, 1e-7):
+                sql = tekuis_validation_db._parcel_table_sql(grid)
+                cur.execute("EXPLAIN " + sql, {"grid": grid} if grid else None)
+                plan = "\n".join(r[0] for r in cur.fetchall())
+                self.assertIn("tekuis_validate_src", plan)
+            cur.execute("DROP TABLE tekuis_validate_src")
+
+
+class PrecisionGridTests(SimpleTestCase):
+    GEOMS = [
+        {"type": "Polygon", "coordinates": [[[49.80000012, 40.4], [49.8010004, 40.40000049], [49.801, 40.401],
+                                             [49.8, 40.401], [49.80000012, 40.4]]]},
+        # özünü kəsən "papyon" – buffer(0) ilə təmir olunur
+        {"type": "Polygon", "coordinates": [[[49.8, 40.4], [49.801, 40.401], [49.801, 40.4], [49.8, 40.401],
+                                             [49.8, 40.4]]]},
+    ]
+
+    def test_parse(self):
+        self.assertEqual(precision._parse("1e-7deg"), 1e-7)
+        self.assertAlmostEqual(precision._parse("1.1132 m"), 1e-5)
+        self.assertIsNone(precision._parse(""))
+        with self.assertRaises(ValueError):
+            precision._parse("5")
+
+    @override_settings(TEKUIS_PRECISION_GRID="1e-6deg")
+    def test_snap_on_grid_valid_and_idempotent(self):
+        once = precision.snap_geojson(self.GEOMS)
+        twice = precision.snap_geojson(once)
+        for gj, gj2 in zip(once, twice):
+            g = shape(gj)
+            self.assertTrue(g.equals(shape(gj2)))
+            self.assertEqual(shapely.get_num_coordinates(g), shapely.get_num_coordinates(shape(gj2)))
+            self.assertTrue(g.is_valid and not g.is_empty)
+            coords = shapely.get_coordinates(g).ravel()
+            self.assertTrue(all(abs(c * 1e6 - round(c * 1e6)) < 1e-6 for c in coords))
+
+    @override_settings(TEKUIS_PRECISION_GRID="")
+    def test_disabled_is_passthrough(self):
+        self.assertIs(precision.snap_geojson(self.GEOMS), self.GEOMS)
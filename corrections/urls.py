@@ -6,6 +6,7 @@ from .views import (
     info_by_geom,
     info_by_fk,
     layers_by_ticket,
+    debug_breakers,
     debug_mssql,
     debug_odbc,
     attach_upload,
@@ -16,8 +17,11 @@ from .views import (
     soft_delete_gis_by_ticket,
     tekuis_parcels_by_bbox,
     tekuis_parcels_by_geom,
+    tekuis_parcels_by_ids,
     save_tekuis_parcels,
     validate_tekuis_parcels,
+    tekuis_validate_session_start,
+    tekuis_validate_session_delta,
     ignore_tekuis_gap,
     tekuis_exists_by_ticket,
     attributes_options,
@@ -27,8 +31,10 @@ from .views import (
 
 )
 
-from .necas_api import necas_parcels_by_bbox, necas_parcels_by_geom
+from .necas_api import necas_parcels_by_bbox, necas_parcels_by_geom, necas_parcels_by_ids
+from .parcels_api import parcels_by_bbox, parcels_by_geom
 from .tekuis_parcel_db import tekuis_parcels_by_db
+from .grid_agg import local_grid_by_bbox
 from .history_api import history_status
 
 
@@ -60,19 +66,28 @@ urlpatterns = [
 
     path("tekuis/parcels/by-bbox/", tekuis_parcels_by_bbox, name="tekuis_by_bbox"),
     path("tekuis/parcels/by-geom/", tekuis_parcels_by_geom, name="tekuis_by_geom"),
+    path("tekuis/parcels/by-ids/", tekuis_parcels_by_ids, name="tekuis_by_ids"),
 
 
 
     path("necas/parcels/by-bbox/", necas_parcels_by_bbox, name="necas_by_bbox"),
     path("necas/parcels/by-geom/", necas_parcels_by_geom, name="necas_by_geom"),
+    path("necas/parcels/by-ids/", necas_parcels_by_ids, name="necas_by_ids"),
+
+    # TEKUIS + NECAS birlikdə (paralel)
+    path("parcels/by-bbox/", parcels_by_bbox, name="parcels_by_bbox"),
+    path("parcels/by-geom/", parcels_by_geom, name="parcels_by_geom"),
 
     path("save-tekuis-parcels/", save_tekuis_parcels, name="save_tekuis_parcels"),
     path("tekuis/exists", tekuis_exists_by_ticket, name="tekuis_exists_by_ticket"),
 
     path("tekuis/parcels/by-db/", tekuis_parcels_by_db, name="tekuis_by_db"),
+    path("local/parcels/grid/", local_grid_by_bbox, name="local_grid_by_bbox"),
 
     path("tekuis/validate/", validate_tekuis_parcels, name="validate_tekuis_parcels"),
     path("tekuis/validate/ignore-gap/", ignore_tekuis_gap, name="ignore_tekuis_gap"),
+    path("tekuis/validate/session/", tekuis_validate_session_start, name="tekuis_validate_session_start"),
+    path("tekuis/validate/session/delta/", tekuis_validate_session_delta, name="tekuis_validate_session_delta"),
 
     path("history/status/", history_status, name="history_status"),
 
@@ -92,5 +107,6 @@ urlpatterns = [
     # Debug
     path('debug/mssql/', debug_mssql, name='debug_mssql'),
     path('debug/odbc/', debug_odbc, name='debug_odbc'),
+    path('debug/breakers/', debug_breakers, name='debug_breakers'),
 
 ]
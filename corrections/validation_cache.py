@@ -0,0 +1,84 @@
+# validation_cache.py
+# -*- coding: utf-8 -*-
+"""
+TEKUİS validasiya nəticələri üçün məzmun-ünvanlı cache.
+
+Klient redaktə zamanı /api/tekuis/validate/-i təkrar-təkrar çağırır, save_tekuis_parcels
+isə az öncə yoxlanmış FeatureCollection-u yenidən yoxlayırdı. Nəticə indi açarla saxlanır:
+  - normallaşdırılmış giriş geometriyaları (3857, shapely.normalize, sıra saxlanır —
+    a_idx/b_idx sıradan asılıdır);
+  - hədlər (min_overlap_sqm, min_gap_sqm);
+  - icra yolu (overlay / coverage, bölmələrlə paralel rejim, PostGIS) — parametr dəyişəndə
+    başqa yolla hesablanmış nəticə qaytarılmır;
+  - meta_id və onun ignore dəstinin versiyası (ignore edilmiş gap hash-lərinin imzası).
+Eyni giriş → eyni açar; yeni gap ignore ediləndə versiya dəyişir, köhnə nəticə işlənmir.
+
+Girişin parse + normallaşdırılması da baha olduğundan (10k parsel ~0.5 s) xam geometriya
+JSON-unun hash-i → məzmun hash-i əlaqəsi də saxlanır: eyni sorğu təkrarlananda
+geometriyalar heç parse olunmur.
+
+Cache "validation" Django cache alias-ındadır (settings.CACHES; worker-lər arasında ortaq DB
+cache cədvəli — validate bir worker-də, save digərində ola bilər); TTL – TEKUIS_VALIDATION_CACHE_S
+(0 → söndürülüb).
+"""
+
+import hashlib
+import json
+import struct
+
+import numpy as np
+import shapely
+from django.conf import settings
+from django.core.cache import caches
+
+_ALIAS = "validation"
+_VERSION = 1  # alqoritm / nəticə formatı dəyişəndə artırılır
+
+
+def enabled() -> bool:
+    return _ALIAS in settings.CACHES and _ttl() > 0
+
+
+def _ttl() -> int:
+    return int(getattr(settings, "TEKUIS_VALIDATION_CACHE_S", 1800))
+
+
+def content_hash(polys, min_overlap_sqm: float, min_gap_sqm: float) -> str:
+    """Normallaşdırılmış poliqonlar (WKB, sıra ilə) + hədlər → sha256 hex."""
+    h = hashlib.sha256(f"v{_VERSION}|{min_overlap_sqm!r}|{min_gap_sqm!r}".encode("ascii"))
+    for wkb in shapely.to_wkb(shapely.normalize(np.asarray(polys, dtype=object))):
+        h.update(struct.pack("<I", len(wkb)))
+        h.update(wkb)
+    return h.hexdigest()
+
+
+def input_hash(geojson: dict) -> str:
+    """Xam giriş geometriyalarının (JSON, sıra ilə) hash-i — parse etmədən."""
+    geoms = [(f or {}).get("geometry") for f in (geojson or {}).get("features") or []]
+    raw = json.dumps(geoms, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def ignore_version(hashes) -> str:
+    """Ignore dəstinin imzası (sıradan asılı deyil)."""
+    return hashlib.sha1("\n".join(sorted(hashes)).encode("utf-8")).hexdigest()[:16]
+
+
+def _key(meta_id: int, chash: str, ignore_ver: str, engine: str) -> str:
+    return f"tekuis:{int(meta_id)}:{chash}:{ignore_ver}:{engine}"
+
+
+def content_hash_for_input(ihash: str, min_overlap_sqm: float, min_gap_sqm: float):
+    return caches[_ALIAS].get(f"input:{ihash}:{min_overlap_sqm!r}:{min_gap_sqm!r}")
+
+
+def remember_input(ihash: str, min_overlap_sqm: float, min_gap_sqm: float, chash: str) -> None:
+    caches[_ALIAS].set(f"input:{ihash}:{min_overlap_sqm!r}:{min_gap_sqm!r}", chash, _ttl())
+
+
+def get(meta_id: int, chash: str, ignore_ver: str, engine: str):
+    return caches[_ALIAS].get(_key(meta_id, chash, ignore_ver, engine))
+
+
+def put(meta_id: int, chash: str, ignore_ver: str, result: dict, engine: str) -> None:
+    caches[_ALIAS].set(_key(meta_id, chash, ignore_ver, engine), result, _ttl())
@@ -0,0 +1,224 @@
+# validation_session.py
+# -*- coding: utf-8 -*-
+"""
+TEKUİS üçün inkremental validasiya sessiyası (meta_id başına).
+
+Redaktə alətləri (tekuis_erase.js, rt_move.js, editvertex.js) adətən bir-iki parseli
+dəyişir, amma hər dəfə bütün FeatureCollection göndərilib yenidən hesablanırdı. İndi:
+  start – tam FC bir dəfə yoxlanılır; server son coverage-i (3857 poliqonlar, feature
+          açarları, birləşmə, tapılmış problemlər) saxlayır;
+  apply – klient yalnız dəyişən/əlavə olunan feature-ləri və silinən açarları göndərir;
+          server yalnız təsirlənən ətrafı yenidən hesablayır:
+            * kəsişmələr – STRtree ilə yalnız yeni poliqonların cütləri;
+            * birləşmə – köhnə birləşmədən dəyişiklik pəncərəsi (W) çıxılır, W daxilində
+              parsellərin kəsilmiş hissələri yenidən birləşdirilir;
+            * boşluqlar – yalnız W ilə kəsişən komponentlərdə, bbox-u W-yə düşənlər.
+Cavab – problemlərin fərqi: əlavə olunan (tam elementlər) və yox olan (id-lər).
+
+Feature açarı: feature.id, yoxsa properties.ID / properties.id, yoxsa start-dakı sıra ("#i").
+Açarsız yeni feature-lərə server açar verir (cavabda "assigned").
+Overlap id – "a_key|b_key|imza", gap id – gap hash-i (ignore ilə eyni).
+
+Vəziyyət "validation_sessions" cache alias-ında saxlanır (ortaq DB cache cədvəli,
+TTL – TEKUIS_VALIDATION_SESSION_S); hər dəyişiklik versiyanı artırır, köhnə versiyalı delta
+STALE ilə rədd olunur. Versiya keçidi atomikdir: delta "sessiya:versiya" iddia açarını
+cache.add ilə tutur (DB cache-də INSERT), eyni versiyaya ikinci delta STALE alır — paralel
+deltalar bir-birinin nəticəsini üstələmir. Sessiya vaxtı keçib və ya limitdə silinibsə – NO_SESSION (410):
+klient start-ı tam FC ilə təkrarlamalıdır.
+"""
+
+import hashlib
+import secrets
+
+import numpy as np
+import shapely
+from django.conf import settings
+from django.core.cache import caches
+from shapely.strtree import STRtree
+
+from . import tekuis_validation as tv
+
+_ALIAS = "validation_sessions"
+_WINDOW_PAD_M = 1.0  # pəncərə kənarı (3857 m) – sərhəddəki toxunmalar itməsin
+
+
+class SessionError(Exception):
+    def __init__(self, code: str, message: str, status: int):
+        super().__init__(message)
+        self.code = code
+        self.status = status
+
+
+def _key(meta_id: int) -> str:
+    return f"tekuis:session:{int(meta_id)}"
+
+
+def _ttl() -> int:
+    return int(getattr(settings, "TEKUIS_VALIDATION_SESSION_S", 3600))
+
+
+def _save(meta_id: int, st: dict) -> None:
+    # poliqonlar bir to_wkb çağırışı ilə (geometriya başına pickle 10k parseldə ~0.15 s idi)
+    packed = dict(st, polys=shapely.to_wkb(np.asarray(st["polys"], dtype=object)))
+    caches[_ALIAS].set(_key(meta_id), packed, _ttl())
+
+
+def _claim_key(meta_id: int, st: dict) -> str:
+    return f"{_key(meta_id)}:{st['sid']}:v{st['v']}"
+
+
+def _load(meta_id: int):
+    st = caches[_ALIAS].get(_key(meta_id))
+    if st is not None:
+        st["polys"] = list(shapely.from_wkb(st["polys"]))
+    return st
+
+
+def _feature_key(f: dict, fallback):
+    k = (f or {}).get("id")
+    if k is None:
+        props = (f or {}).get("properties") or {}
+        k = props.get("ID", props.get("id"))
+    return str(k) if k is not None and str(k) != "" else fallback
+
+
+def _keyed_overlaps(pairs, owners) -> dict:
+    """_overlap_pairs nəticəsi → {id: element}; indekslər əvəzinə feature açarları."""
+    out = {}
+    for (i, j, _g, _a), item in zip(pairs, tv._overlap_items(pairs)):
+        ka, kb = sorted((owners[i], owners[j]))
+        if ka == kb:  # eyni MultiPolygon-un hissələri
+            continue
+        sig = f"{ka}|{kb}|{[round(c, 6) for c in item['bbox']]}|{round(item['area_sqm'], 1)}"
+        item_id = f"{ka}|{kb}|{hashlib.md5(sig.encode('utf-8')).hexdigest()[:12]}"
+        del item["a_idx"], item["b_idx"]
+        item.update({"id": item_id, "a_key": ka, "b_key": kb})
+        out[item_id] = item
+    return out
+
+
+def _keyed_gaps(cands) -> dict:
+    """[(gap 3857, sahə)] → {hash: (element, 3857 bounds)}."""
+    items = tv._gap_items(cands)
+    return {item["hash"]: (item, tuple(g.bounds)) for (g, _a), item in zip(cands, items)}
+
+
+def _report(st: dict, ignored: set) -> dict:
+    """Cari problemlər ilə klientə son göndərilənlərin fərqi."""
+    ov = st["overlaps"]
+    gp = {h: v[0] for h, v in st["gaps"].items() if h not in ignored}
+    prev_ov, prev_gp = st["reported"]
+    st["reported"] = (set(ov), set(gp))
+    return {
+        "version": st["v"],
+        "stats": {"n_features": len(st["polys"]), "overlap_count": len(ov), "gap_count": len(gp)},
+        "added": {
+            "overlaps": [ov[k] for k in sorted(ov.keys() - prev_ov)],
+            "gaps": [gp[h] for h in sorted(gp.keys() - prev_gp)],
+        },
+        "removed": {
+            "overlaps": sorted(prev_ov - ov.keys()),
+            "gaps": sorted(prev_gp - gp.keys()),
+        },
+    }
+
+
+def start(meta_id: int, geojson: dict, min_overlap_sqm: float, min_gap_sqm: float) -> dict:
+    """Tam yoxlama + sessiyanın yaradılması (köhnəsi əvəz olunur). Bütün problemlər "added"-dədir."""
+    keys, seen = [], set()
+    for i, f in enumerate((geojson or {}).get("features") or []):
+        k = _feature_key(f, f"#{i}")
+        if k in seen:
+            k = f"{k}#{i}"
+        seen.add(k)
+        keys.append(k)
+
+    polys, owner_idx = tv._collect_polys_from_geojson_3857(geojson, with_owner=True)
+    owners = [keys[i] for i in owner_idx]
+    u = tv._overlay_union(polys)
+    st = {
+        "sid": secrets.token_hex(8),  # yeni start köhnə sessiyanın versiya iddialarına toxunmur
+        "v": 1,
+        "min_ov": float(min_overlap_sqm),
+        "min_ga": float(min_gap_sqm),
+        "polys": polys,
+        "owners": owners,
+        "u": u,
+        "overlaps": _keyed_overlaps(tv._overlap_pairs(polys, min_overlap_sqm), owners),
+        "gaps": _keyed_gaps(tv._gap_candidates(tv._flatten_polys(u), min_gap_sqm)),
+        "reported": (set(), set()),
+    }
+    out = _report(st, tv._ignored_gap_hashes(meta_id))
+    out["keys"] = keys
+    _save(meta_id, st)
+    return out
+
+
+def apply(meta_id: int, upsert: list, removed: list, base_version=None) -> dict:
+    """
+    upsert  – dəyişən/yeni feature-lər (açar → əvvəlki hissələri tam əvəz olunur);
+    removed – silinən feature açarları.
+    """
+    st = _load(meta_id)
+    if st is None:
+        raise SessionError("NO_SESSION", "validasiya sessiyası yoxdur (vaxtı keçib və ya silinib) – yenidən başladın", 410)
+    if base_version is not None and int(base_version) != st["v"]:
+        raise SessionError("STALE", f"sessiya versiyası {st['v']}, gələn {base_version}", 409)
+    claim = _claim_key(meta_id, st)
+    if not caches[_ALIAS].add(claim, 1, _ttl()):
+        raise SessionError("STALE", f"sessiya versiyası {st['v']} artıq başqa delta ilə dəyişdirilir", 409)
+    try:
+        return _apply(meta_id, st, upsert, removed)
+    except BaseException:
+        caches[_ALIAS].delete(claim)  # uğursuz delta versiyanı bloklamasın
+        raise
+
+
+def _apply(meta_id: int, st: dict, upsert: list, removed: list) -> dict:
+
+    up_keys, assigned = [], []
+    for i, f in enumerate(upsert):
+        k = _feature_key(f, None)
+        if k is None:
+            k = f"n{st['v']}.{i}"
+            assigned.append(k)
+        up_keys.append(k)
+    touched = set(up_keys) | {str(k) for k in removed}
+
+    polys, owners = st["polys"], st["owners"]
+    old_parts = [p for p, o in zip(polys, owners) if o in touched]
+    new_polys, new_idx = tv._collect_polys_from_geojson_3857({"features": upsert}, with_owner=True)
+    keep = [i for i, o in enumerate(owners) if o not in touched]
+    polys = [polys[i] for i in keep] + new_polys
+    owners = [owners[i] for i in keep] + [up_keys[i] for i in new_idx]
+    changed = old_parts + new_polys
+
+    # ---------- Kəsişmələr: toxunulan açarlarınkı silinir, yeni poliqonların cütləri əlavə olunur
+    overlaps = {
+        k: v for k, v in st["overlaps"].items() if v["a_key"] not in touched and v["b_key"] not in touched
+    }
+    if new_polys:
+        subset = np.arange(len(keep), len(polys))
+        overlaps.update(_keyed_overlaps(tv._overlap_pairs(polys, st["min_ov"], subset=subset), owners))
+
+    u, gaps = st["u"], st["gaps"]
+    if changed:
+        # ---------- Birləşmə: W xaricində köhnə birləşmə, W daxilində kəsilmiş parsellər
+        boxes = shapely.buffer(shapely.envelope(np.asarray(changed, dtype=object)), _WINDOW_PAD_M, join_style="mitre")
+        w = shapely.union_all(boxes)
+        arr = np.asarray(polys, dtype=object)
+        near = STRtree(arr).query(w, predicate="intersects") if len(arr) else np.empty(0, dtype=int)
+        local = shapely.union_all(shapely.intersection(arr[near], w))
+        u = tv._overlay_union([u.difference(w), local])
+
+        # ---------- Boşluqlar: bbox-u W ilə kəsişənlər yenidən hesablanır
+        gaps = {h: v for h, v in gaps.items() if not shapely.box(*v[1]).intersects(w)}
+        comps = [c for c in tv._flatten_polys(u) if c.envelope.intersects(w)]
+        cands = [(g, a) for g, a in tv._gap_candidates(comps, st["min_ga"]) if g.envelope.intersects(w)]
+        gaps.update(_keyed_gaps(cands))
+
+    st.update({"v": st["v"] + 1, "polys": polys, "owners": owners, "u": u, "overlaps": overlaps, "gaps": gaps})
+    out = _report(st, tv._ignored_gap_hashes(meta_id))
+    out["assigned"] = assigned
+    _save(meta_id, st)
+    return out
@@ -0,0 +1,54 @@
+# validation_token.py
+# -*- coding: utf-8 -*-
+"""
+TEKUİS validasiya token-ləri (django.core.signing).
+
+Validate endpoint-i nəticə ilə birlikdə imzalı token qaytarır; token bağlayır:
+  - yoxlanmış FeatureCollection-un xam geometriya hash-ini (validation_cache.input_hash);
+  - meta_id;
+  - hədləri (min_overlap_sqm, min_gap_sqm);
+  - tapılmış problemlərin açarlarını (overlap topoKey-ləri, gap hash-ləri).
+Save endpoint-i token-i və hash-i yoxlayır (O(n) hash, overlay yox); klientin ignore etdiyi
+açarlar token-dəki bütün açarları örtürsə, validasiya təkrarlanmır. Token etibarsız,
+vaxtı keçmiş və ya uyğunsuzdursa, tam validasiya işləyir — zəmanət itmir.
+
+Ömür – TEKUIS_VALIDATION_TOKEN_MAX_AGE_S (default 3600 san.).
+"""
+
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core import signing
+
+from . import validation_cache
+
+_SALT = "corrections.tekuis.validation"
+
+
+def issue(meta_id: int, ihash: str, min_overlap_sqm: float, min_gap_sqm: float,
+          overlap_keys, gap_keys) -> str:
+    payload = {
+        "m": int(meta_id),
+        "h": ihash,
+        "t": [float(min_overlap_sqm), float(min_gap_sqm)],
+        "o": sorted(set(overlap_keys)),
+        "g": sorted(set(gap_keys)),
+    }
+    return signing.dumps(payload, salt=_SALT, compress=True)
+
+
+def verify(token, geojson: dict, meta_id: int, min_overlap_sqm: float,
+           min_gap_sqm: float) -> Optional[Tuple[set, set]]:
+    """Token bu giriş üçün etibarlıdırsa (overlap açarları, gap açarları); əks halda None."""
+    if not token or not isinstance(token, str):
+        return None
+    max_age = int(getattr(settings, "TEKUIS_VALIDATION_TOKEN_MAX_AGE_S", 3600))
+    try:
+        p = signing.loads(token, salt=_SALT, max_age=max_age)
+    except signing.BadSignature:  # SignatureExpired da buraya düşür
+        return None
+    if p.get("m") != int(meta_id) or p.get("t") != [float(min_overlap_sqm), float(min_gap_sqm)]:
+        return None
+    if p.get("h") != validation_cache.input_hash(geojson):
+        return None
+    return set(p.get("o") or []), set(p.get("g") or [])
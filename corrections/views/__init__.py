@@ -1,6 +1,13 @@
-from .auth import _redeem_ticket, _redeem_ticket_with_token, _unauthorized, require_valid_ticket
+from .auth import (
+    _aredeem_ticket,
+    _aredeem_ticket_with_token,
+    _redeem_ticket,
+    _redeem_ticket_with_token,
+    _unauthorized,
+    require_valid_ticket,
+)
 from .attach import attach_geojson, attach_geojson_by_ticket, attach_list_by_ticket, attach_upload
-from .debug import debug_mssql, debug_odbc
+from .debug import debug_breakers, debug_mssql, debug_odbc
 from .gis import save_polygon, soft_delete_gis_by_ticket
 from .info import (
     attributes_options,
@@ -18,13 +25,18 @@ from .tekuis import (
     tekuis_parcels_by_attach_ticket,
     tekuis_parcels_by_bbox,
     tekuis_parcels_by_geom,
+    tekuis_parcels_by_ids,
     tekuis_validate_ignore_gap_view,
+    tekuis_validate_session_delta,
+    tekuis_validate_session_start,
     tekuis_validate_view,
     validate_tekuis_parcels,
 )
 from .uploads import upload_points, upload_shp
 
 __all__ = [
+    "_aredeem_ticket",
+    "_aredeem_ticket_with_token",
     "_redeem_ticket",
     "_redeem_ticket_with_token",
     "_unauthorized",
@@ -34,6 +46,7 @@ __all__ = [
     "attach_list_by_ticket",
     "attach_upload",
     "attributes_options",
+    "debug_breakers",
     "debug_mssql",
     "debug_odbc",
     "ignore_tekuis_gap",
@@ -49,7 +62,10 @@ __all__ = [
     "tekuis_parcels_by_attach_ticket",
     "tekuis_parcels_by_bbox",
     "tekuis_parcels_by_geom",
+    "tekuis_parcels_by_ids",
     "tekuis_validate_ignore_gap_view",
+    "tekuis_validate_session_delta",
+    "tekuis_validate_session_start",
     "tekuis_validate_view",
     "ticket_status",
     "upload_points",
@@ -8,6 +8,7 @@ import zipfile
 from pathlib import Path
 from typing import List, Optional
 
+import numpy as np
 import shapefile  # pyshp
 from django.conf import settings
 from django.db import connection
@@ -15,8 +16,9 @@ from django.http import HttpResponseBadRequest, JsonResponse
 from django.utils.text import get_valid_filename
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET
-from pyproj import CRS, Transformer
 
+from corrections import reproject
+from corrections.breakers import breaker
 from .auth import _parse_jwt_user, _redeem_ticket, _redeem_ticket_with_token, _unauthorized
 from .geo_utils import (
     _build_transformer_for_points,
@@ -58,6 +60,12 @@ def _smb_net_use():
     if not unc:
         return
 
+    # SMB əlçatmazdırsa hər sorğu isdir/net use timeout-larını gözləməsin
+    with breaker("smb").guard():
+        _smb_mount(unc, dom, user, pwd)
+
+
+def _smb_mount(unc, dom, user, pwd):
     # --- YENİ: UNC yolunu normallaşdır ---
     unc = str(unc).strip()
     # forward-slash-ları backslash-a çevir
@@ -412,38 +420,37 @@ def _geojson_from_zip_file(zip_path: Path) -> dict:
 def _candidate_point_transformers():
     return [
         ("wgs84", None),
-        ("utm38", Transformer.from_crs(CRS.from_epsg(32638), CRS.from_epsg(4326), always_xy=True)),
-        ("utm39", Transformer.from_crs(CRS.from_epsg(32639), CRS.from_epsg(4326), always_xy=True)),
+        ("utm38", reproject.transformer(32638, 4326)),
+        ("utm39", reproject.transformer(32639, 4326)),
     ]
 
 
-def _score_transformer_on_rows(rows, x_idx, y_idx, transformer, sample_limit=200):
-    cnt = 0
-    checked = 0
-    for r in rows:
-        if len(r) <= max(x_idx, y_idx):
-            continue
-        try:
-            x = float(str(r[x_idx]).strip().replace(",", "."))
-            y = float(str(r[y_idx]).strip().replace(",", "."))
-        except Exception:
-            continue
-
-        if transformer is not None:
-            try:
-                lon, lat = transformer.transform(x, y)
-            except Exception:
-                continue
-        else:
-            lon, lat = x, y
+def _parse_xy(r, x_idx, y_idx):
+    """Sətirdən (x, y); uyğun deyilsə None."""
+    if len(r) <= max(x_idx, y_idx):
+        return None
+    try:
+        return (
+            float(str(r[x_idx]).strip().replace(",", ".")),
+            float(str(r[y_idx]).strip().replace(",", ".")),
+        )
+    except Exception:
+        return None
 
-        if (-180 <= lon <= 180) and (-90 <= lat <= 90):
-            cnt += 1
 
-        checked += 1
-        if checked >= sample_limit:
-            break
-    return cnt
+def _score_transformer_on_rows(rows, x_idx, y_idx, transformer, sample_limit=200):
+    sample = []
+    for r in rows:
+        xy = _parse_xy(r, x_idx, y_idx)
+        if xy is not None:
+            sample.append(xy)
+            if len(sample) >= sample_limit:
+                break
+    if not sample:
+        return 0
+    xy = np.asarray(sample, dtype=float)
+    lon, lat = reproject.transform_xy(transformer, xy[:, 0], xy[:, 1])
+    return int(np.count_nonzero((-180 <= lon) & (lon <= 180) & (-90 <= lat) & (lat <= 90)))
 
 
 def _auto_pick_points_transformer(rows, x_idx, y_idx):
@@ -491,31 +498,26 @@ def _geojson_from_csvtxt_file(txt_path: Path, crs_choice: str = "auto") -> dict:
     if (choice in ("auto", "detect")) and (crs_idx is None):
         chosen_name, transformer = _auto_pick_points_transformer(body, x_idx, y_idx)
 
-    features = []
+    # 1) sətirləri oxu, 2) bütün nöqtələri transformer üzrə qruplarla bir dəfə çevir
+    parsed = []
     for r in body:
-        if len(r) <= max(x_idx, y_idx):
-            continue
-        try:
-            x = float(str(r[x_idx]).strip().replace(",", "."))
-            y = float(str(r[y_idx]).strip().replace(",", "."))
-        except Exception:
+        xy = _parse_xy(r, x_idx, y_idx)
+        if xy is None:
             continue
-
         row_transformer = transformer
         row_crs_code = None
         if crs_idx is not None and crs_idx < len(r):
             row_crs_code = _canonize_crs_value(r[crs_idx])
             if row_crs_code:
                 row_transformer = _build_transformer_for_points(row_crs_code)
+        parsed.append((r, xy, row_transformer, row_crs_code))
 
-        if row_transformer:
-            try:
-                lon, lat = row_transformer.transform(x, y)
-            except Exception:
-                continue
-        else:
-            lon, lat = x, y
+    lons, lats = reproject.transform_grouped(
+        [p[1][0] for p in parsed], [p[1][1] for p in parsed], [p[2] for p in parsed]
+    )
 
+    features = []
+    for (r, _xy, _tr, row_crs_code), lon, lat in zip(parsed, lons.tolist(), lats.tolist()):
         if not (-180 <= lon <= 180 and -90 <= lat <= 90):
             continue
 
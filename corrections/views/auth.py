@@ -1,16 +1,46 @@
+import asyncio
 import base64
 import json
 import logging
 import time
+import weakref
 from functools import wraps
 from typing import Optional
 
 import requests
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.http import JsonResponse
 
+from corrections.breakers import CircuitOpen, breaker
+
+try:
+    import httpx
+
+    HTTPX_AVAILABLE = True
+except Exception:
+    httpx = None
+    HTTPX_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Node redeem üçün ortaq HTTP klientləri (keep-alive bağlantılar sorğular arasında işlənir):
+# sinxron yol – proses üzrə requests.Session; ASGI_DEPLOY-da – loop başına httpx.AsyncClient.
+_HTTP = requests.Session()
+_ASYNC_HTTP = weakref.WeakKeyDictionary()
+
+
+def _async_http():
+    """Cari loop üçün ortaq httpx klienti; WSGI-də (loop sorğu başınadır) və ya httpx yoxdursa None."""
+    if not (HTTPX_AVAILABLE and getattr(settings, "ASGI_DEPLOY", False)):
+        return None
+    loop = asyncio.get_running_loop()
+    client = _ASYNC_HTTP.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(timeout=int(getattr(settings, "NODE_REDEEM_TIMEOUT", 8)))
+        _ASYNC_HTTP[loop] = client
+    return client
+
 
 def _unauthorized(msg="unauthorized"):
     return JsonResponse({"ok": False, "error": msg}, status=401)
@@ -33,50 +63,100 @@ def _coerce_exp_ms(exp_val) -> int | None:
     return v * 1000 if v < 10**12 else v
 
 
-def _redeem_ticket_with_token(ticket: str):
-    """
-    Node redeem-dən həm fk_metadata (id), həm də token qaytarır.
-    Token yoxdursa və ya vaxtı keçibsə -> (None, None).
-    """
-    url = getattr(
+def _redeem_url() -> str:
+    return getattr(
         settings,
         "NODE_REDEEM_URL",
         "http://10.11.1.73:8080/api/requests/handoff/redeem",
     ).rstrip("/")
-    timeout = int(getattr(settings, "NODE_REDEEM_TIMEOUT", 8))
+
+
+def _redeem_base_headers() -> dict:
     bearer = getattr(settings, "NODE_REDEEM_BEARER", None)
     headers = {"Accept": "application/json"}
     if bearer:
         headers["Authorization"] = f"Bearer {bearer}"
+    return headers
+
+
+def _node_breaker():
+    """Node redeem breaker-i: şəbəkə xətası və 5xx uğursuzluq sayılır, açıqdırsa CircuitOpen."""
+    return breaker("node")
+
+
+def _note_node_status(call, resp):
+    if resp.status_code >= 500:
+        call.fail()
+
+
+def _token_pair_from_redeem_response(resp):
+    """
+    Redeem cavabından (fk_metadata, token) çıxarır; requests və httpx cavabları üçün eynidir.
+    Token yoxdursa və ya vaxtı keçibsə -> (None, None).
+    """
+    if resp.status_code != 200:
+        return None, None
+    data = resp.json()
+    if data.get("valid", True) is False:
+        return None, None
+    tok = (data.get("token") or "").strip()
+    exp = data.get("exp")
+    # token mütləq lazımdır:
+    if not tok:
+        return None, None
+    # vaxt yoxlaması:
+    exp_ms = _coerce_exp_ms(exp)
+    if exp_ms is None or _now_ms() > exp_ms + int(
+        getattr(settings, "NODE_REDEEM_EXP_SKEW_SEC", 15)
+    ) * 1000:
+        return None, None
+    # id götür:
+    rid = data.get("id") or data.get("rowid") or data.get("fk") or data.get("fk_metadata")
     try:
-        resp = requests.post(
-            url,
-            data={"ticket": (ticket or "").strip()},
-            headers={**headers, "Content-Type": "application/x-www-form-urlencoded"},
-            timeout=timeout,
-        )
-        if resp.status_code != 200:
-            return None, None
-        data = resp.json()
-        if data.get("valid", True) is False:
-            return None, None
-        tok = (data.get("token") or "").strip()
-        exp = data.get("exp")
-        # token mütləq lazımdır:
-        if not tok:
-            return None, None
-        # vaxt yoxlaması:
-        exp_ms = _coerce_exp_ms(exp)
-        if exp_ms is None or _now_ms() > exp_ms + int(
-            getattr(settings, "NODE_REDEEM_EXP_SKEW_SEC", 15)
-        ) * 1000:
-            return None, None
-        # id götür:
-        rid = data.get("id") or data.get("rowid") or data.get("fk") or data.get("fk_metadata")
-        try:
-            return int(str(rid).strip()), tok
-        except Exception:
-            return None, None
+        return int(str(rid).strip()), tok
+    except Exception:
+        return None, None
+
+
+def _redeem_ticket_with_token(ticket: str):
+    """
+    Node redeem-dən həm fk_metadata (id), həm də token qaytarır.
+    Token yoxdursa və ya vaxtı keçibsə -> (None, None).
+    """
+    timeout = int(getattr(settings, "NODE_REDEEM_TIMEOUT", 8))
+    try:
+        with _node_breaker().guard() as call:
+            resp = _HTTP.post(
+                _redeem_url(),
+                data={"ticket": (ticket or "").strip()},
+                headers={**_redeem_base_headers(), "Content-Type": "application/x-www-form-urlencoded"},
+                timeout=timeout,
+            )
+            _note_node_status(call, resp)
+        return _token_pair_from_redeem_response(resp)
+    except CircuitOpen:
+        raise
+    except Exception:
+        return None, None
+
+
+async def _aredeem_ticket_with_token(ticket: str):
+    """_redeem_ticket_with_token-un async variantı (ortaq httpx klienti; yoxdursa thread körpüsü)."""
+    client = _async_http()
+    if client is None:
+        return await sync_to_async(_redeem_ticket_with_token, thread_sensitive=False)(ticket)
+
+    try:
+        async with _node_breaker().aguard() as call:
+            resp = await client.post(
+                _redeem_url(),
+                data={"ticket": (ticket or "").strip()},
+                headers={**_redeem_base_headers(), "Content-Type": "application/x-www-form-urlencoded"},
+            )
+            _note_node_status(call, resp)
+        return _token_pair_from_redeem_response(resp)
+    except CircuitOpen:
+        raise
     except Exception:
         return None, None
 
@@ -159,127 +239,155 @@ def require_valid_ticket(view_fn):
     return _wrap
 
 
-def _redeem_ticket(ticket: str) -> Optional[int]:
+def _redeem_id_from_response(resp) -> Optional[int]:
     """
-    Node redeem endpoint-ini çağırır və yalnız aşağıdakılar ödənərsə id qaytarır:
+    Redeem cavabını yoxlayır və yalnız aşağıdakılar ödənərsə id qaytarır:
       - HTTP 200 + JSON parse OK
       - data.valid != False
       - token mövcuddur (boş deyil)
       - exp mövcuddur və _now_ms() < exp (+ kiçik saat fərqi buferi)
-    Əks halda None.
     """
-    ticket = (ticket or "").strip()
-    if not ticket:
-        return None
-
-    url = getattr(
-        settings,
-        "NODE_REDEEM_URL",
-        "http://10.11.1.73:8080/api/requests/handoff/redeem",
-    ).rstrip("/")
-    timeout = int(getattr(settings, "NODE_REDEEM_TIMEOUT", 8))
-    prefer = (getattr(settings, "NODE_REDEEM_METHOD", "FORM") or "FORM").upper()
-
     require_token = bool(getattr(settings, "NODE_REDEEM_REQUIRE_TOKEN", True))
     skew_sec = int(getattr(settings, "NODE_REDEEM_EXP_SKEW_SEC", 15))  # kiçik saat fərqi buferi
     skew_ms = skew_sec * 1000
 
-    bearer = getattr(settings, "NODE_REDEEM_BEARER", None)
-    base_headers = {"Accept": "application/json"}
-    if bearer:
-        base_headers["Authorization"] = f"Bearer {bearer}"
+    if resp.status_code != 200:
+        logger.warning("redeem HTTP %s: %s", resp.status_code, (resp.text[:300] if resp.content else ""))
+        return None
+    try:
+        data = resp.json()
+    except Exception:
+        logger.warning("redeem JSON parse failed: %r", resp.text[:200])
+        return None
 
-    def _parse_and_validate(resp) -> Optional[int]:
-        if resp.status_code != 200:
-            logger.warning("redeem HTTP %s: %s", resp.status_code, (resp.text[:300] if resp.content else ""))
-            return None
-        try:
-            data = resp.json()
-        except Exception:
-            logger.warning("redeem JSON parse failed: %r", resp.text[:200])
-            return None
-
-        # valid=false isə rədd
-        if data.get("valid", True) is False:
-            logger.info("redeem: valid=false qaytdı")
-            return None
-
-        # token tələbi (default: tələb olunur)
-        tok = (data.get("token") or "").strip()
-        if require_token and not tok:
-            logger.info("redeem: token yoxdur (require_token=True)")
-            return None
-
-        # exp yoxlaması
-        exp_ms = _coerce_exp_ms(data.get("exp"))
-        if exp_ms is None:
-            logger.info("redeem: exp yoxdur/yolverilməz")
-            return None
-        now = _now_ms()
-        if now > (exp_ms + skew_ms):
-            logger.info(
-                "redeem: token expiry keçib (now=%s, exp=%s, skew_ms=%s)",
-                now,
-                exp_ms,
-                skew_ms,
-            )
-            return None
+    # valid=false isə rədd
+    if data.get("valid", True) is False:
+        logger.info("redeem: valid=false qaytdı")
+        return None
 
-        # id götür
-        rid = data.get("id") or data.get("rowid") or data.get("fk") or data.get("fk_metadata")
-        try:
-            return int(str(rid).strip())
-        except Exception:
-            logger.warning("redeem: 'id' parse olunmadı: %r", rid)
-            return None
+    # token tələbi (default: tələb olunur)
+    tok = (data.get("token") or "").strip()
+    if require_token and not tok:
+        logger.info("redeem: token yoxdur (require_token=True)")
+        return None
 
-    def _post_form(key: str) -> Optional[int]:
-        try:
-            h = {**base_headers, "Content-Type": "application/x-www-form-urlencoded"}
-            resp = requests.post(url, data={key: ticket}, headers=h, timeout=timeout)
-            logger.info("redeem POST FORM %s → %s", key, resp.status_code)
-            return _parse_and_validate(resp)
-        except Exception as e:
-            logger.warning("redeem POST FORM (%s) failed: %s", key, e)
-            return None
+    # exp yoxlaması
+    exp_ms = _coerce_exp_ms(data.get("exp"))
+    if exp_ms is None:
+        logger.info("redeem: exp yoxdur/yolverilməz")
+        return None
+    now = _now_ms()
+    if now > (exp_ms + skew_ms):
+        logger.info(
+            "redeem: token expiry keçib (now=%s, exp=%s, skew_ms=%s)",
+            now,
+            exp_ms,
+            skew_ms,
+        )
+        return None
 
-    def _post_json(key: str) -> Optional[int]:
-        try:
-            h = {**base_headers, "Content-Type": "application/json"}
-            resp = requests.post(url, json={key: ticket}, headers=h, timeout=timeout)
-            logger.info("redeem POST JSON %s → %s", key, resp.status_code)
-            return _parse_and_validate(resp)
-        except Exception as e:
-            logger.warning("redeem POST JSON (%s) failed: %s", key, e)
-            return None
+    # id götür
+    rid = data.get("id") or data.get("rowid") or data.get("fk") or data.get("fk_metadata")
+    try:
+        return int(str(rid).strip())
+    except Exception:
+        logger.warning("redeem: 'id' parse olunmadı: %r", rid)
+        return None
 
-    def _get_qs(key: str) -> Optional[int]:
-        try:
-            resp = requests.get(
-                url,
-                params={key: ticket},
-                headers=base_headers,
-                timeout=timeout,
-                allow_redirects=False,
-            )
-            logger.info("redeem GET %s → %s", key, resp.status_code)
-            return _parse_and_validate(resp)
-        except Exception as e:
-            logger.warning("redeem GET (%s) failed: %s", key, e)
-            return None
 
+def _redeem_attempts():
+    """
+    NODE_REDEEM_METHOD-a görə cəhd ardıcıllığı: [(method, key), ...]
+    method: FORM | JSON | GET, key: ticket | hash
+    """
+    prefer = (getattr(settings, "NODE_REDEEM_METHOD", "FORM") or "FORM").upper()
     order_map = {
-        "FORM": (_post_form, _post_json, _get_qs),
-        "JSON": (_post_json, _get_qs, _post_form),
-        "GET": (_get_qs, _post_form, _post_json),
+        "FORM": ("FORM", "JSON", "GET"),
+        "JSON": ("JSON", "GET", "FORM"),
+        "GET": ("GET", "FORM", "JSON"),
     }
     order = order_map.get(prefer, order_map["FORM"])
+    return [(method, key) for method in order for key in ("ticket", "hash")]
+
+
+def _redeem_ticket(ticket: str) -> Optional[int]:
+    """
+    Node redeem endpoint-ini çağırır; yoxlama qaydaları üçün bax: _redeem_id_from_response.
+    Əks halda None.
+    """
+    ticket = (ticket or "").strip()
+    if not ticket:
+        return None
 
-    for fn in order:
-        for key in ("ticket", "hash"):
-            rid = fn(key)
-            if rid is not None:
-                return rid
+    url = _redeem_url()
+    timeout = int(getattr(settings, "NODE_REDEEM_TIMEOUT", 8))
+    base_headers = _redeem_base_headers()
+
+    for method, key in _redeem_attempts():
+        try:
+            with _node_breaker().guard() as call:
+                if method == "FORM":
+                    h = {**base_headers, "Content-Type": "application/x-www-form-urlencoded"}
+                    resp = _HTTP.post(url, data={key: ticket}, headers=h, timeout=timeout)
+                elif method == "JSON":
+                    h = {**base_headers, "Content-Type": "application/json"}
+                    resp = _HTTP.post(url, json={key: ticket}, headers=h, timeout=timeout)
+                else:
+                    resp = _HTTP.get(
+                        url,
+                        params={key: ticket},
+                        headers=base_headers,
+                        timeout=timeout,
+                        allow_redirects=False,
+                    )
+                _note_node_status(call, resp)
+            logger.info("redeem %s %s → %s", method, key, resp.status_code)
+        except CircuitOpen:
+            raise
+        except Exception as e:
+            logger.warning("redeem %s (%s) failed: %s", method, key, e)
+            continue
+        rid = _redeem_id_from_response(resp)
+        if rid is not None:
+            return rid
+
+    logger.error("redeem failed for ticket (all attempts or token/exp invalid)")
+    return None
+
+
+async def _aredeem_ticket(ticket: str) -> Optional[int]:
+    """_redeem_ticket-in async variantı: eyni cəhd ardıcıllığı, httpx ilə."""
+    ticket = (ticket or "").strip()
+    if not ticket:
+        return None
+    client = _async_http()
+    if client is None:
+        return await sync_to_async(_redeem_ticket, thread_sensitive=False)(ticket)
+
+    url = _redeem_url()
+    base_headers = _redeem_base_headers()
+
+    for method, key in _redeem_attempts():
+        try:
+            async with _node_breaker().aguard() as call:
+                if method == "FORM":
+                    h = {**base_headers, "Content-Type": "application/x-www-form-urlencoded"}
+                    resp = await client.post(url, data={key: ticket}, headers=h)
+                elif method == "JSON":
+                    h = {**base_headers, "Content-Type": "application/json"}
+                    resp = await client.post(url, json={key: ticket}, headers=h)
+                else:
+                    resp = await client.get(url, params={key: ticket}, headers=base_headers, follow_redirects=False)
+                _note_node_status(call, resp)
+            logger.info("redeem %s %s → %s", method, key, resp.status_code)
+        except CircuitOpen:
+            raise
+        except Exception as e:
+            logger.warning("redeem %s (%s) failed: %s", method, key, e)
+            continue
+        rid = _redeem_id_from_response(resp)
+        if rid is not None:
+            return rid
 
     logger.error("redeem failed for ticket (all attempts or token/exp invalid)")
-    return None
\ No newline at end of file
+    return None
@@ -1,7 +1,13 @@
+import os
+from functools import wraps
+
 from django.conf import settings
 from django.http import JsonResponse
 from django.views.decorators.http import require_GET
 
+from corrections.admission import admission_stats
+from corrections.breakers import breaker_states
+from .auth import require_valid_ticket
 from .mssql import _mssql_connect, pyodbc
 
 
@@ -55,4 +61,25 @@ def debug_odbc(request):
         info["drivers_on_system"] = list(pyodbc.drivers())
     except Exception as e:
         info["drivers_error"] = str(e)
-    return JsonResponse(info)
\ No newline at end of file
+    return JsonResponse(info)
+
+
+def _staff_or_ticket(view_fn):
+    """Staff sessiyası (Node redeem əlçatmaz olanda da) və ya etibarlı ticket."""
+    ticket_view = require_valid_ticket(view_fn)
+
+    @wraps(view_fn)
+    def _wrap(request, *args, **kwargs):
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated and user.is_staff:
+            return view_fn(request, *args, **kwargs)
+        return ticket_view(request, *args, **kwargs)
+
+    return _wrap
+
+
+@require_GET
+@_staff_or_ticket
+def debug_breakers(request):
+    """Asılılıq breaker-lərinin və qəbul siniflərinin cari vəziyyəti (worker başına)."""
+    return JsonResponse({"breakers": breaker_states(), "admission": admission_stats(), "pid": os.getpid()})
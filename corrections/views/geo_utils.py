@@ -4,12 +4,15 @@ import re
 from pathlib import Path
 from typing import List, Optional, Tuple
 
+import numpy as np
 import shapefile  # pyshp
 from pyproj import CRS, Transformer
 from shapely import wkt as shapely_wkt
 from shapely.geometry import mapping, shape as shapely_shape
 from shapely.ops import unary_union
 
+from corrections import reproject
+
 
 def _clean_wkt_text(w):
     """
@@ -34,6 +37,92 @@ def _clean_wkt_text(w):
     return w
 
 
+# ==========================
+# Giriş WKT sanitizasiyası (TEKUIS/NECAS ortaq)
+# ==========================
+_WKT_NUM_RE = r"[-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[Ee][+-]?\d+)?"
+_WKT_TYPE_RE = r"(?:POINT|LINESTRING|POLYGON|MULTIPOINT|MULTILINESTRING|MULTIPOLYGON|GEOMETRYCOLLECTION)"
+_WKT_CURVED_RE = re.compile(
+    r"\b(CURVEPOLYGON|CIRCULARSTRING|COMPOUNDCURVE|ELLIPTICARC|MULTICURVE|MULTISURFACE|GEOMETRYCOLLECTION)\b",
+    flags=re.I,
+)
+
+
+def _normalize_wkt_remove_m_dims(w: str) -> str:
+    """ZM/M dimensiyalarını Shapely-nin başa düşdüyü formaya (Z/2D) salır."""
+    s = w
+    m_hdr = re.match(rf"^\s*(?:{_WKT_TYPE_RE})\s+(ZM|M)\b", s, flags=re.I)
+    if not m_hdr:
+        return s
+    dim = m_hdr.group(1).upper()
+    if dim == "ZM":
+        s = re.sub(rf"\b({_WKT_TYPE_RE})\s+ZM\b", r"\1 Z", s, flags=re.I)
+        s = re.sub(rf"({_WKT_NUM_RE})\s+({_WKT_NUM_RE})\s+({_WKT_NUM_RE})\s+({_WKT_NUM_RE})", r"\1 \2 \3", s)
+    elif dim == "M":
+        s = re.sub(rf"\b({_WKT_TYPE_RE})\s+M\b", r"\1", s, flags=re.I)
+        s = re.sub(rf"({_WKT_NUM_RE})\s+({_WKT_NUM_RE})\s+({_WKT_NUM_RE})", r"\1 \2", s)
+    return s
+
+
+def _clip_wkt_tail(s: str) -> str:
+    """WKT-dən sonrakı zibili kəs (məs: 'POLYGON((...))49.80…' → 'POLYGON((...))')."""
+    if s.upper().startswith("SRID=") and ";" in s:
+        s = s.split(";", 1)[1].strip()
+    depth = 0
+    end = -1
+    for i, ch in enumerate(s):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+            if depth == 0:
+                end = i
+                break
+    return s[: end + 1].strip() if end >= 0 else s.strip()
+
+
+def _sanitize_input_wkts(wkt_list: List[str]) -> Tuple[List[str], dict]:
+    """
+    Klientdən gələn WKT-ləri Oracle sorğusuna hazırlayır:
+    boş/əyri/parse olunmayanları atır, qalanları kanonik 2D WKT-yə çevirir.
+    Qaytarır: (safe_wkts, {"empty": .., "curved": .., "parse": ..})
+    """
+    safe_wkts: List[str] = []
+    stats = {"empty": 0, "curved": 0, "parse": 0}
+    for w in wkt_list or []:
+        s = _clean_wkt_text(w or "")
+        if not s:
+            stats["empty"] += 1
+            continue
+        if _WKT_CURVED_RE.search(s):
+            stats["curved"] += 1
+            continue
+        s = _clip_wkt_tail(_normalize_wkt_remove_m_dims(s))
+        try:
+            g = shapely_wkt.loads(s)
+            if g.is_empty:
+                stats["empty"] += 1
+                continue
+            s = g.wkt  # kanonik 2D WKT
+        except Exception:
+            stats["parse"] += 1
+            continue
+        safe_wkts.append(s)
+    return safe_wkts, stats
+
+
+def _infer_wkt_srid(wkts: List[str], fallback: int) -> int:
+    """SRID auto-detekt: koordinatlar dərəcə aralığındadırsa 4326, əks halda fallback."""
+    try:
+        g0 = shapely_wkt.loads(wkts[0])
+        minx, miny, maxx, maxy = g0.bounds
+        if -180 <= minx <= 180 and -180 <= maxx <= 180 and -90 <= miny <= 90 and -90 <= maxy <= 90:
+            return 4326
+    except Exception:
+        pass
+    return fallback
+
+
 def _find_main_shp(tmpdir: Path) -> Path:
     for p in tmpdir.rglob("*.shp"):
         return p
@@ -55,10 +144,10 @@ def _guess_crs_or_transformer(first_xy: Tuple[float, float]) -> Optional[Transfo
     x, y = first_xy
     if -180 <= x <= 180 and -90 <= y <= 90:
         return None
-    candidates = [CRS.from_epsg(32638), CRS.from_epsg(32639)]  # UTM 38N, 39N
+    candidates = [32638, 32639]  # UTM 38N, 39N
     for cand in candidates:
         try:
-            t = Transformer.from_crs(cand, CRS.from_epsg(4326), always_xy=True)
+            t = reproject.transformer(cand, 4326)
             lon, lat = t.transform(x, y)
             if 40 <= lon <= 55 and 35 <= lat <= 50:
                 return t
@@ -76,7 +165,7 @@ def _make_transformer(shp_path: Path, first_xy: Tuple[float, float]) -> Optional
         except Exception:
             pass
         try:
-            return Transformer.from_crs(src_crs, CRS.from_epsg(4326), always_xy=True)
+            return reproject.transformer(src_crs, 4326)
         except Exception:
             return _guess_crs_or_transformer(first_xy)
     else:
@@ -94,32 +183,27 @@ def _parts_indices(shape) -> List[Tuple[int, int]]:
     return idxs
 
 
-def _transform_coords(coords: List[Tuple[float, float]], transformer: Optional[Transformer]):
-    if transformer is None:
+def _transform_coords(coords: List[Tuple[float, float]], tr: Optional[Transformer]):
+    """Bütün nöqtələr bir transform çağırışı ilə (nöqtə başına yox)."""
+    if tr is None or not coords:
         return coords
-    out = []
-    for x, y in coords:
-        lon, lat = transformer.transform(x, y)
-        out.append((lon, lat))
-    return out
+    xy = np.asarray(coords, dtype=float)
+    lon, lat = reproject.transform_xy(tr, xy[:, 0], xy[:, 1])
+    return list(zip(lon.tolist(), lat.tolist()))
 
 
 def _shape_to_geojson_geometry(shape, transformer: Optional[Transformer]) -> dict:
     st = shape.shapeType
-    pts = shape.points or []
+    # shape-in bütün nöqtələri bir dəfə çevrilir, hissələr sonra kəsilir
+    pts = _transform_coords([tuple(p[:2]) for p in shape.points or []], transformer)
 
     if st in (shapefile.POINT, shapefile.POINTZ, shapefile.POINTM):
-        lonlat = _transform_coords([pts[0]], transformer)[0]
-        return {"type": "Point", "coordinates": lonlat}
+        return {"type": "Point", "coordinates": pts[0]}
     if st in (shapefile.MULTIPOINT, shapefile.MULTIPOINTZ, shapefile.MULTIPOINTM):
-        lonlats = _transform_coords(pts, transformer)
-        return {"type": "MultiPoint", "coordinates": lonlats}
+        return {"type": "MultiPoint", "coordinates": pts}
     if st in (shapefile.POLYLINE, shapefile.POLYLINEZ, shapefile.POLYLINEM):
         parts = _parts_indices(shape)
-        lines = []
-        for s, e in parts:
-            lonlats = _transform_coords(pts[s:e], transformer)
-            lines.append(lonlats)
+        lines = [pts[s:e] for s, e in parts]
         if len(lines) == 1:
             return {"type": "LineString", "coordinates": lines[0]}
         return {"type": "MultiLineString", "coordinates": lines}
@@ -127,7 +211,7 @@ def _shape_to_geojson_geometry(shape, transformer: Optional[Transformer]) -> dic
         parts = _parts_indices(shape)
         rings = []
         for s, e in parts:
-            lonlats = _transform_coords(pts[s:e], transformer)
+            lonlats = pts[s:e]
             if lonlats and lonlats[0] != lonlats[-1]:
                 lonlats.append(lonlats[0])
             rings.append(lonlats)
@@ -230,9 +314,9 @@ def _build_transformer_for_points(crs_choice: str) -> Optional[Transformer]:
     if crs_choice == "wgs84":
         return None
     if crs_choice == "utm38":
-        return Transformer.from_crs(CRS.from_epsg(32638), CRS.from_epsg(4326), always_xy=True)
+        return reproject.transformer(32638, 4326)
     if crs_choice == "utm39":
-        return Transformer.from_crs(CRS.from_epsg(32639), CRS.from_epsg(4326), always_xy=True)
+        return reproject.transformer(32639, 4326)
     return None
 
 
@@ -6,7 +6,18 @@ from django.db import connection
 from django.http import HttpResponseBadRequest, JsonResponse
 from django.views.decorators.http import require_GET
 
-from .auth import _redeem_ticket, _redeem_ticket_with_token, _unauthorized, require_valid_ticket
+from corrections.admission import admit
+from corrections.async_utils import run_blocking
+from corrections.breakers import CircuitOpen
+from corrections.generalize import simplify_features_cached, zoom_band
+from .auth import (
+    _aredeem_ticket_with_token,
+    _node_breaker,
+    _note_node_status,
+    _redeem_ticket,
+    _unauthorized,
+    require_valid_ticket,
+)
 from .mssql import _filter_request_fields, _is_edit_allowed_for_fk, _mssql_fetch_request
 from .tekuis import _has_active_tekuis
 
@@ -31,14 +42,16 @@ def _resolve_fk_by_wkt(wkt: str):
 
 
 @require_GET
-def ticket_status(request):
+@admit("interactive")
+async def ticket_status(request):
     ticket = (request.GET.get("ticket") or "").strip()
-    fk, tok = _redeem_ticket_with_token(ticket)
+    fk, tok = await _aredeem_ticket_with_token(ticket)
     if not (fk and tok):
         return JsonResponse({"ok": False}, status=401)
 
     try:
-        allowed, sid = _is_edit_allowed_for_fk(fk)
+        # pyodbc bloklayır → thread körpüsü
+        allowed, sid = await run_blocking(_is_edit_allowed_for_fk, fk)
     except Exception:
         allowed, sid = False, None
     return JsonResponse({"ok": True, "status_id": sid, "allow_edit": bool(allowed)})
@@ -67,7 +80,7 @@ def layers_by_ticket(request):
         with connection.cursor() as cur:
             cur.execute(
                 """
-                SELECT id, fk_metadata, ST_AsGeoJSON(geom) AS gj
+                SELECT id, fk_metadata, ST_AsGeoJSON(geom) AS gj, xmin::text
                 FROM gis_data
                 WHERE fk_metadata = %s
                 AND COALESCE(status,1) = 1
@@ -76,14 +89,15 @@ def layers_by_ticket(request):
             )
             rows = cur.fetchall()
 
-        features = []
-        for rid, fk, gj in rows:
+        features, versions = [], []
+        for rid, fk, gj, xmin in rows:
             try:
                 geom = json.loads(gj) if isinstance(gj, str) else gj
             except Exception:
                 geom = None
             if not geom:
                 continue
+            versions.append(f"{rid}:{xmin}")
             features.append(
                 {
                     "type": "Feature",
@@ -92,6 +106,9 @@ def layers_by_ticket(request):
                     "properties": {"fk_metadata": fk},
                 }
             )
+        band = zoom_band(request.GET)
+        if band is not None:
+            features = simplify_features_cached(f"gis_data:{fk_metadata}", features, band, versions=versions)
         fc = {"type": "FeatureCollection", "features": features, "count": len(features), "fk_metadata": fk_metadata}
         return JsonResponse(fc, safe=False)
     except Exception as e:
@@ -180,15 +197,19 @@ def kateqoriya_name_by_ticket(request):
         headers["Authorization"] = f"Bearer {bearer}"
 
     try:
-        resp = requests.post(
-            url,
-            data={"ticket": ticket},
-            headers={**headers, "Content-Type": "application/x-www-form-urlencoded"},
-            timeout=timeout,
-        )
+        with _node_breaker().guard() as call:
+            resp = requests.post(
+                url,
+                data={"ticket": ticket},
+                headers={**headers, "Content-Type": "application/x-www-form-urlencoded"},
+                timeout=timeout,
+            )
+            _note_node_status(call, resp)
         if resp.status_code != 200:
             return JsonResponse({"ok": False, "error": f"redeem HTTP {resp.status_code}"}, status=resp.status_code)
         data = resp.json()
+    except CircuitOpen:
+        raise
     except Exception as e:
         return JsonResponse({"ok": False, "error": f"redeem error: {e}"}, status=500)
 
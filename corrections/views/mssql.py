@@ -5,6 +5,8 @@ from typing import Any, Dict, Optional, Tuple
 
 from django.conf import settings
 
+from corrections.breakers import breaker
+
 logger = logging.getLogger(__name__)
 
 ALLOWED_INFO_FIELDS = {
@@ -100,7 +102,9 @@ def _mssql_connect():
         f"UID={_odbc_escape(user)};PWD={_odbc_escape(pwd)};"
         f"Encrypt={enc};TrustServerCertificate={trust};"
     )
-    return pyodbc.connect(conn_str, timeout=login_timeout)
+    # Breaker açıqdırsa CircuitOpen atılır — çağıranlar onu adi MSSQL xətası kimi tutur (fast-fail)
+    with breaker("mssql").guard():
+        return pyodbc.connect(conn_str, timeout=login_timeout)
 
 
 def _mssql_fetch_request(row_id: int) -> Optional[Dict[str, Any]]:
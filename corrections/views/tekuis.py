@@ -1,5 +1,7 @@
 import json
+import logging
 import os
+import re
 import zlib
 from typing import List, Optional
 
@@ -8,14 +10,40 @@ from django.conf import settings
 from django.db import connection, transaction
 from django.http import HttpResponseBadRequest, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_GET
+from django.views.decorators.http import require_GET, require_POST
+from shapely import wkb as shapely_wkb
 from shapely import wkt as shapely_wkt
 from shapely.geometry import mapping, shape as shapely_shape
 
+from corrections.admission import admit
+from corrections.attr_query import AttrQuery, attr_query_from_get, attr_query_from_payload
+from corrections.async_utils import oracle_connection_async, oracle_id_list, run_blocking
+from corrections.breakers import breaker, oracle_outage
+from corrections.coalescing import coalesced, snap_bbox
+from corrections import feature_cache
+from corrections.deadline import Deadline, continuation_fields, read_continuation, wkt_list_digest
+from corrections.generalize import band_cached, simplify_features, zoom_band
+from corrections.grid_agg import cells_to_fc, grid_cell
+from corrections.id_exclusion import exclude_known, order_by_ids, parse_have, parse_id_list, with_key_field
+from corrections.paging import decode_cursor, page_fields, page_limit, want_total
+from corrections.supersession import latest_wins
 from .attach import _find_attach_file, _geojson_from_csvtxt_file, _geojson_from_zip_file, _smb_net_use
 from .auth import _redeem_ticket, _unauthorized, require_valid_ticket
-from .geo_utils import _canonize_crs_value, _clean_wkt_text, _flatten_geoms, _payload_to_wkt_list
-from corrections.tekuis_validation import ignore_gap, validate_tekuis
+from .geo_utils import (
+    _canonize_crs_value,
+    _clean_wkt_text,
+    _clip_wkt_tail,
+    _flatten_geoms,
+    _infer_wkt_srid,
+    _normalize_wkt_remove_m_dims,
+    _payload_to_wkt_list,
+    _sanitize_input_wkts,
+)
+from corrections import precision, validation_cache, validation_session, validation_token
+from corrections.tekuis_validation import ignore_gaps, validate_tekuis
+
+logger = logging.getLogger(__name__)
+
 
 TEKUIS_ATTRS = (
     "ID",
@@ -36,25 +64,31 @@ TEKUIS_ATTRS = (
 )
 
 
-def _tekuis_props_from_row(vals):
+def _tekuis_props_from_row(vals, fields=TEKUIS_ATTRS):
     """Oracle-dan oxunan dəyərləri sütun adları ilə properties-ə çevirir."""
-    return {k: v for k, v in zip(TEKUIS_ATTRS, vals)}
+    return {k: v for k, v in zip(fields, vals)}
 
 
-def _oracle_connect():
+def _tekuis_connect_params() -> dict:
     host = os.getenv("ORA_HOST", "alldb-scan.emlak.gov.az")
     port = int(os.getenv("ORA_PORT", "1521"))
     service = os.getenv("ORA_SERVICE", "tekuisdb")
-    user = os.getenv("ORA_USER")
-    password = os.getenv("ORA_PASSWORD")
+    return {
+        "user": os.getenv("ORA_USER"),
+        "password": os.getenv("ORA_PASSWORD"),
+        "dsn": oracledb.makedsn(host, port, service_name=service),
+    }
 
-    dsn = oracledb.makedsn(host, port, service_name=service)
 
-    # Bəzi oracledb versiyalarında 'encoding' dəstəklənmir → geriyə uyğun bağla
-    try:
-        return oracledb.connect(user=user, password=password, dsn=dsn, encoding="UTF-8", nencoding="UTF-8")
-    except TypeError:
-        return oracledb.connect(user=user, password=password, dsn=dsn)
+def _oracle_connect():
+    params = _tekuis_connect_params()
+
+    with breaker("oracle_tekuis", oracle_outage).guard():
+        # Bəzi oracledb versiyalarında 'encoding' dəstəklənmir → geriyə uyğun bağla
+        try:
+            return oracledb.connect(**params, encoding="UTF-8", nencoding="UTF-8")
+        except TypeError:
+            return oracledb.connect(**params)
 
 
 def _has_active_tekuis(meta_id: int) -> bool:
@@ -75,354 +109,571 @@ def _has_active_tekuis(meta_id: int) -> bool:
         return False
 
 
-@require_GET
-def tekuis_parcels_by_bbox(request):
-    try:
-        minx = float(request.GET.get("minx"))
-        miny = float(request.GET.get("miny"))
-        maxx = float(request.GET.get("maxx"))
-        maxy = float(request.GET.get("maxy"))
-    except Exception:
-        return HttpResponseBadRequest("minx/miny/maxx/maxy tələb olunur və ədədi olmalıdır.")
-
+def _tekuis_table():
     schema = getattr(settings, "TEKUIS_SCHEMA", os.getenv("TEKUIS_SCHEMA", "BTG_MIS"))
     table = getattr(settings, "TEKUIS_TABLE", os.getenv("TEKUIS_TABLE", "M_G_PARSEL"))
+    return f"{schema}.{table}"
 
-    sql = f"""
-        SELECT sde.st_astext(t.SHAPE) AS wkt,
-               t.ID, t.LAND_CATEGORY2ENUM, t.LAND_CATEGORY_ENUM, t.NAME, t.OWNER_TYPE_ENUM,
-               t.SUVARILMA_NOVU_ENUM, t.EMLAK_NOVU_ENUM, t.OLD_LAND_CATEGORY2ENUM,
-               t.TERRITORY_NAME, t.RAYON_ADI, t.IED_ADI, t.BELEDIYE_ADI,t.LAND_CATEGORY3ENUM,t.LAND_CATEGORY4ENUM, t.AREA_HA
-          FROM {schema}.{table} t
-         WHERE t.SHAPE.MINX <= :maxx AND t.SHAPE.MAXX >= :minx
+
+def _tekuis_srid() -> int:
+    """TEKUİS cədvəlinin (və bbox cavabının) SRID-i."""
+    return int(os.getenv("TEKUIS_SRID", 4326))
+
+
+# fields= / f_* verilməyəndə: bütün atributlar, filtrsiz
+_TEKUIS_ALL = AttrQuery(TEKUIS_ATTRS, {}, "t")
+
+_TEKUIS_OUT_CURVED_RE = re.compile(
+    r"\b(CURVEPOLYGON|CIRCULARSTRING|COMPOUNDCURVE|ELLIPTICARC|MULTICURVE|MULTISURFACE)\b", flags=re.I
+)
+
+
+_TEKUIS_BBOX_PRED = """
+           t.SHAPE.MINX <= :maxx AND t.SHAPE.MAXX >= :minx
            AND t.SHAPE.MINY <= :maxy AND t.SHAPE.MAXY >= :miny
+"""
+
+
+def _tekuis_bbox_sql(q: AttrQuery = _TEKUIS_ALL) -> str:
+    """Bir səhifə: ROWID üzrə keyset (:after → son oxunan ROWID), ən çox :lim sətir."""
+    return f"""
+        SELECT * FROM (
+            SELECT ROWIDTOCHAR(t.ROWID) AS rid,
+                   sde.st_astext(t.SHAPE) AS wkt,
+                   {q.select_sql}
+              FROM {_tekuis_table()} t
+             WHERE {_TEKUIS_BBOX_PRED}{q.where_sql}
+               AND (:after IS NULL OR t.ROWID > CHARTOROWID(:after))
+             ORDER BY t.ROWID
+        ) WHERE ROWNUM <= :lim
     """
 
-    params = dict(minx=minx, miny=miny, maxx=maxx, maxy=maxy)
 
-    features, skipped = [], 0
-    with _oracle_connect() as cn:
-        with cn.cursor() as cur:
-            cur.execute(sql, params)
-            for row in cur:
-                wkt_lob, *attr_vals = row
-                raw = wkt_lob.read() if hasattr(wkt_lob, "read") else wkt_lob
-                wkt = _clean_wkt_text(raw)
-                if not wkt:
-                    skipped += 1
-                    continue
-                try:
-                    geom = shapely_wkt.loads(wkt)
-                except Exception:
-                    skipped += 1
-                    continue
-                props = _tekuis_props_from_row(attr_vals)
-                props["SOURCE"] = "TEKUIS"
-                features.append({"type": "Feature", "geometry": mapping(geom), "properties": props})
+def _tekuis_bbox_ids_sql(q: AttrQuery = _TEKUIS_ALL) -> str:
+    """İki fazalı oxumanın 1-ci fazası: səhifə üçün yalnız (ROWID, ORA_ROWSCN)."""
+    return f"""
+        SELECT * FROM (
+            SELECT ROWIDTOCHAR(t.ROWID) AS rid, t.ORA_ROWSCN AS scn
+              FROM {_tekuis_table()} t
+             WHERE {_TEKUIS_BBOX_PRED}{q.where_sql}
+               AND (:after IS NULL OR t.ROWID > CHARTOROWID(:after))
+             ORDER BY t.ROWID
+        ) WHERE ROWNUM <= :lim
+    """
 
-    print(f"[TEKUIS][BBOX] returned={len(features)} skipped={skipped} extent=({minx},{miny},{maxx},{maxy})")
-    return JsonResponse({"type": "FeatureCollection", "features": features}, safe=False)
 
+def _tekuis_by_rids_sql() -> str:
+    """2-ci faza: ROWID kolleksiyası (:ids) üçün geometriya + bütün atributlar; tək SQL mətni."""
+    return f"""
+        SELECT ROWIDTOCHAR(t.ROWID) AS rid,
+               sde.st_astext(t.SHAPE) AS wkt,
+               {_TEKUIS_ALL.select_sql}
+          FROM {_tekuis_table()} t
+         WHERE t.ROWID IN (SELECT /*+ CARDINALITY(x 100) */ CHARTOROWID(x.COLUMN_VALUE) FROM TABLE(:ids) x)
+    """
 
-@csrf_exempt
-def tekuis_parcels_by_geom(request):
-    if request.method != "POST":
-        return HttpResponseBadRequest("POST gözlənirdi.")
 
-    try:
-        payload = json.loads(request.body.decode("utf-8"))
-    except Exception:
-        return HttpResponseBadRequest("Yanlış JSON.")
+def _tekuis_by_ids_sql(q: AttrQuery = _TEKUIS_ALL, ids_only: bool = False) -> str:
+    """ID siyahısı üzrə (kolleksiya bind :ids, ID indeksi); ids_only → 2 fazalı oxumanın 1-ci fazası."""
+    if ids_only:
+        select_sql = "ROWIDTOCHAR(t.ROWID) AS rid, t.ORA_ROWSCN AS scn"
+    else:
+        select_sql = f"ROWIDTOCHAR(t.ROWID) AS rid, sde.st_astext(t.SHAPE) AS wkt, {q.select_sql}"
+    return f"""
+        SELECT {select_sql}
+          FROM {_tekuis_table()} t
+         WHERE t.ID IN (SELECT /*+ CARDINALITY(x 100) */ x.COLUMN_VALUE FROM TABLE(:ids) x){q.where_sql}
+    """
 
-    # İstifadəçi SRID verə bilər, amma aşağıda avtomatik korreksiya edəcəyik
-    srid_in_payload = int(payload.get("srid") or os.getenv("TEKUIS_SRID", 4326))
-    buf_m = float(payload.get("buffer_m") or 0.0)
 
-    schema = os.getenv("TEKUIS_SCHEMA", "BTG_MIS")
-    table = os.getenv("TEKUIS_TABLE", "M_G_PARSEL")
-    table_srid = int(os.getenv("TEKUIS_TABLE_SRID", 4326))  # cədvəl SRID
+def _tekuis_bbox_count_sql(q: AttrQuery = _TEKUIS_ALL) -> str:
+    return f"SELECT COUNT(*) FROM {_tekuis_table()} t WHERE {_TEKUIS_BBOX_PRED}{q.where_sql}"
 
-    # --- TEKUİS atributları (SELECT və properties üçün eyni sıra)
-    attrs_sql = ", ".join([f"t.{c}" for c in TEKUIS_ATTRS])
 
-    # WKT siyahısını yığ
-    wkt_list = _payload_to_wkt_list(payload)
-    if not wkt_list:
-        w_single = _clean_wkt_text(payload.get("wkt")) if payload.get("wkt") else None
-        if not w_single:
-            return HttpResponseBadRequest("wkt və ya geojson verilməlidir.")
-        wkt_list = [w_single]
+def _tekuis_grid_sql(q: AttrQuery = _TEKUIS_ALL) -> str:
+    """BBOX daxilində envelope mərkəzinə görə grid xanaları: say, cəmi AREA_HA, dominant kateqoriya."""
+    return f"""
+        SELECT gx, gy, COUNT(*), SUM(area_ha), STATS_MODE(cat)
+          FROM (
+                SELECT FLOOR((t.SHAPE.MINX + t.SHAPE.MAXX) / 2 / :cell) AS gx,
+                       FLOOR((t.SHAPE.MINY + t.SHAPE.MAXY) / 2 / :cell) AS gy,
+                       t.AREA_HA AS area_ha,
+                       t.LAND_CATEGORY_ENUM AS cat
+                  FROM {_tekuis_table()} t
+                 WHERE {_TEKUIS_BBOX_PRED}{q.where_sql}
+               )
+         GROUP BY gx, gy
+    """
 
-    import re
-    from shapely import wkt as _wkt
-    from shapely import wkb as _wkb
 
-    NUM_RE = r"[-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[Ee][+-]?\d+)?"
-    TYPE_RE = r"(?:POINT|LINESTRING|POLYGON|MULTIPOINT|MULTILINESTRING|MULTIPOLYGON|GEOMETRYCOLLECTION)"
+def _tekuis_geom_sql(g_source_sql: str, geom_expr: str, q: AttrQuery = _TEKUIS_ALL, ids_only: bool = False) -> str:
+    """
+    by-geom sorğusunun ortaq skeleti.
+    g_source_sql – giriş geometriyalarını verən FROM hissəsi (UNION ALL və ya dual),
+    geom_expr    – həmin sətirdən SDE geometriyası quran ifadə,
+    q            – seçilən sütunlar və atribut filtrləri,
+    ids_only     – True → yalnız (ROWID, ORA_ROWSCN) (iki fazalı oxumanın 1-ci fazası).
+    """
+    if ids_only:
+        select_sql = "ROWIDTOCHAR(t.ROWID) AS rid, t.ORA_ROWSCN AS scn"
+    else:
+        select_sql = f"t.ROWID AS rid, sde.st_astext(t.SHAPE) AS wkt, {q.select_sql}"
+    return f"""
+        WITH g AS (
+            SELECT CASE WHEN :bufm > 0 THEN
+                sde.st_transform(
+                    sde.st_buffer(
+                        sde.st_transform({geom_expr}, 3857), :bufm
+                    ),
+                    :table_srid
+                )
+            ELSE
+                sde.st_transform({geom_expr}, :table_srid)
+            END AS geom
+            FROM {g_source_sql}
+        ),
+        ids AS (
+            SELECT DISTINCT t.ROWID AS rid
+              FROM {_tekuis_table()} t, g
+             WHERE sde.st_envintersects(t.SHAPE, g.geom) = 1
+               AND sde.st_intersects(t.SHAPE, g.geom) = 1{q.where_sql}
+        )
+        SELECT {select_sql}
+          FROM {_tekuis_table()} t
+          JOIN ids ON t.ROWID = ids.rid
+    """
 
-    def _normalize_wkt_remove_m_dims(w: str) -> str:
-        s = w
-        m_hdr = re.match(rf"^\s*(?:{TYPE_RE})\s+(ZM|M)\b", s, flags=re.I)
-        if not m_hdr:
-            return s
-        dim = m_hdr.group(1).upper()
-        if dim == "ZM":
-            s = re.sub(rf"\b({TYPE_RE})\s+ZM\b", r"\1 Z", s, flags=re.I)
-            s = re.sub(rf"({NUM_RE})\s+({NUM_RE})\s+({NUM_RE})\s+({NUM_RE})", r"\1 \2 \3", s)
-        elif dim == "M":
-            s = re.sub(rf"\b({TYPE_RE})\s+M\b", r"\1", s, flags=re.I)
-            s = re.sub(rf"({NUM_RE})\s+({NUM_RE})\s+({NUM_RE})", r"\1 \2", s)
-        return s
 
-    def _clip_tail(s: str) -> str:
-        """WKTdən sonrakı zibili kəs (məs: 'POLYGON((...))49.80…' → 'POLYGON((...))')."""
-        if s.upper().startswith("SRID=") and ";" in s:
-            s = s.split(";", 1)[1].strip()
-        depth = 0
-        end = -1
-        for i, ch in enumerate(s):
-            if ch == "(":
-                depth += 1
-            elif ch == ")":
-                depth -= 1
-                if depth == 0:
-                    end = i
-                    break
-        return s[: end + 1].strip() if end >= 0 else s.strip()
+def _tekuis_geom_chunk_sql(n_items: int, q: AttrQuery = _TEKUIS_ALL, ids_only: bool = False) -> str:
+    g_raw_sql = " \nUNION ALL\n".join([f"  SELECT :w{i} AS wkt FROM dual" for i in range(n_items)])
+    return _tekuis_geom_sql(f"(\n{g_raw_sql}\n)", "sde.st_geomfromtext(wkt, :srid_in)", q, ids_only)
 
-    # Input sanitizasiya
-    safe_wkts, bad_empty, bad_curved, bad_parse = [], 0, 0, 0
-    for w in wkt_list:
-        s = _clean_wkt_text(w or "")
-        if not s:
-            bad_empty += 1
-            continue
-        if re.search(r"\b(CURVEPOLYGON|CIRCULARSTRING|COMPOUNDCURVE|ELLIPTICARC|MULTICURVE|MULTISURFACE|GEOMETRYCOLLECTION)\b", s, flags=re.I):
-            bad_curved += 1
-            continue
-        s = _clip_tail(_normalize_wkt_remove_m_dims(s))
-        try:
-            g = _wkt.loads(s)
-            if g.is_empty:
-                bad_empty += 1
-                continue
-            s = g.wkt  # kanonik 2D WKT
-        except Exception:
-            bad_parse += 1
-            continue
-        safe_wkts.append(s)
 
-    if not safe_wkts:
-        print(
-            f"[TEKUIS][GEOM][input_sanitize] all invalid. empty={bad_empty}, curved={bad_curved}, parse={bad_parse}"
-        )
-        return JsonResponse({"type": "FeatureCollection", "features": []}, safe=False)
+def _tekuis_geom_single_sql(q: AttrQuery = _TEKUIS_ALL, ids_only: bool = False) -> str:
+    return _tekuis_geom_sql("dual", "sde.st_geomfromtext(:w, :srid_in)", q, ids_only)
 
-    # SRID auto-detekt: dərəcə aralığındadırsa 4326
-    def _infer_srid(wkts: list[str], fallback: int) -> int:
-        try:
-            g0 = _wkt.loads(wkts[0])
-            minx, miny, maxx, maxy = g0.bounds
-            if (-180 <= minx <= 180 and -180 <= maxx <= 180 and -90 <= miny <= 90 and -90 <= maxy <= 90):
-                return 4326
-        except Exception:
-            pass
-        return fallback
 
-    srid_in = _infer_srid(safe_wkts, srid_in_payload)
+def _tekuis_geom_wkb_sql(q: AttrQuery = _TEKUIS_ALL, ids_only: bool = False) -> str:
+    return _tekuis_geom_sql("dual", "sde.st_geomfromwkb(hextoraw(:wkb), :srid_in)", q, ids_only)
 
-    # SQL generator (WKT yolu)
-    def _make_sql_wkt(n_items: int) -> tuple[str, dict]:
-        bind_names = [f"w{i}" for i in range(n_items)]
-        g_raw_sql = " \nUNION ALL\n".join([f"  SELECT :{bn} AS wkt FROM dual" for bn in bind_names])
-        sql = f"""
-            WITH g_raw AS (
-{g_raw_sql}
-            ),
-            g AS (
-                SELECT CASE WHEN :bufm > 0 THEN
-                    sde.st_transform(
-                        sde.st_buffer(
-                            sde.st_transform(sde.st_geomfromtext(wkt, :srid_in), 3857), :bufm
-                        ),
-                        :table_srid
-                    )
-                ELSE
-                    sde.st_transform(sde.st_geomfromtext(wkt, :srid_in), :table_srid)
-                END AS geom
-                FROM g_raw
-            ),
-            ids AS (
-                SELECT DISTINCT t.ROWID AS rid
-                  FROM {schema}.{table} t, g
-                 WHERE sde.st_envintersects(t.SHAPE, g.geom) = 1
-                   AND sde.st_intersects(t.SHAPE, g.geom) = 1
-            )
-            SELECT t.ROWID AS rid,
-                   sde.st_astext(t.SHAPE) AS wkt,
-                   {attrs_sql}
-              FROM {schema}.{table} t
-              JOIN ids ON t.ROWID = ids.rid
-        """
-        params = {bn: safe_wkts[i] for i, bn in enumerate(bind_names)}
-        params.update({"srid_in": int(srid_in), "bufm": float(buf_m), "table_srid": int(table_srid)})
-        return sql, params
-
-    # Per-row fallback (WKB yolu)
-    def _make_sql_wkb() -> str:
-        return f"""
-            WITH g AS (
-                SELECT CASE WHEN :bufm > 0 THEN
-                    sde.st_transform(
-                        sde.st_buffer(
-                            sde.st_transform(sde.st_geomfromwkb(hextoraw(:wkb), :srid_in), 3857), :bufm
-                        ),
-                        :table_srid
-                    )
-                ELSE
-                    sde.st_transform(sde.st_geomfromwkb(hextoraw(:wkb), :srid_in), :table_srid)
-                END AS geom
-                FROM dual
-            ),
-            ids AS (
-                SELECT DISTINCT t.ROWID AS rid
-                  FROM {schema}.{table} t, g
-                 WHERE sde.st_envintersects(t.SHAPE, g.geom) = 1
-                   AND sde.st_intersects(t.SHAPE, g.geom) = 1
-            )
-            SELECT t.ROWID AS rid,
-                   sde.st_astext(t.SHAPE) AS wkt,
-                   {attrs_sql}
-              FROM {schema}.{table} t
-              JOIN ids ON t.ROWID = ids.rid
-        """
 
-    features, seen_rids = [], set()
-    out_skip_empty = out_skip_parse = out_skip_curved = out_tailfix = 0
+class _TekuisRowCollector:
+    """
+    Oracle-dan gələn (rid, wkt, attrs...) sətirlərini GeoJSON feature-lərə çevirir.
+    Eyni ROWID iki dəfə gəlsə (chunk-lar arası) təkrarlanmır.
+    """
+
+    def __init__(self, fields=TEKUIS_ATTRS):
+        self.fields = fields
+        self.features: List[dict] = []
+        self.seen_rids = set()
+        self.skip_empty = self.skip_curved = self.skip_parse = self.tailfix = 0
 
-    def _consume_cursor(cur):
-        nonlocal out_skip_empty, out_skip_curved, out_skip_parse, out_tailfix
-        for row in cur:
+    def consume(self, rows):
+        for row in rows:
             # rid, wkt_lob, attr1, attr2, ...
             rid, wkt_lob, *attr_vals = row
             rid_key = str(rid) if rid is not None else None
-            if rid_key and rid_key in seen_rids:
+            if rid_key and rid_key in self.seen_rids:
                 continue
 
             raw = wkt_lob.read() if hasattr(wkt_lob, "read") else wkt_lob
-            w = _clean_wkt_text(raw)
-            if not w:
-                out_skip_empty += 1
-                continue
-            if re.search(r"\b(CURVEPOLYGON|CIRCULARSTRING|COMPOUNDCURVE|ELLIPTICARC|MULTICURVE|MULTISURFACE)\b", w, flags=re.I):
-                out_skip_curved += 1
+            self.add(rid_key, raw, attr_vals)
+
+    def add(self, rid_key, raw_wkt, attr_vals):
+        w = _clean_wkt_text(raw_wkt)
+        if not w:
+            self.skip_empty += 1
+            return
+        if _TEKUIS_OUT_CURVED_RE.search(w):
+            self.skip_curved += 1
+            return
+
+        # tail kəs + M/ZM → 2D
+        w2 = _clip_wkt_tail(w)
+        if w2 != w:
+            self.tailfix += 1
+        w2 = _normalize_wkt_remove_m_dims(w2)
+        try:
+            geom = shapely_wkt.loads(w2)
+        except Exception:
+            self.skip_parse += 1
+            return
+
+        props = _tekuis_props_from_row(attr_vals, self.fields)
+        props["SOURCE"] = "TEKUIS"
+
+        self.features.append({"type": "Feature", "geometry": mapping(geom), "properties": props})
+        if rid_key:
+            self.seen_rids.add(rid_key)
+
+    @property
+    def skipped(self) -> int:
+        return self.skip_empty + self.skip_curved + self.skip_parse
+
+
+class _TekuisIdCollector:
+    """1-ci faza: (rid, scn) cütləri — sıra saxlanır, chunk-lar arası təkrarlar atılır."""
+
+    def __init__(self):
+        self.pairs = []
+        self.seen_rids = set()
+
+    def consume(self, rows):
+        for rid, scn in rows:
+            rid = str(rid)
+            if rid in self.seen_rids:
                 continue
+            self.seen_rids.add(rid)
+            self.pairs.append((rid, scn))
+
+
+async def _tekuis_resolve(cn, cur, pairs, q: AttrQuery = _TEKUIS_ALL) -> List[dict]:
+    """
+    2-ci faza: (rid, scn) cütlərini feature-lərə çevirir — cache-də təzə olanlar oradan,
+    qalanları bir sorğu ilə (ROWID kolleksiya bind-ı) Oracle-dan; sıra 1-ci fazadakı kimidir.
+    """
+    hits, missing = feature_cache.lookup("tekuis", pairs)
+    scn_of = dict(pairs)
+    fresh = []
+    if missing:
+        await cur.execute(_tekuis_by_rids_sql(), {"ids": await oracle_id_list(cn, missing, numeric=False)})
+        collector = _TekuisRowCollector()
+        for rid, wkt_text, *attr_vals in await cur.fetchall():
+            n = len(collector.features)
+            collector.add(rid, wkt_text, attr_vals)
+            if len(collector.features) > n:
+                hits[rid] = collector.features[-1]
+                fresh.append((rid, scn_of.get(rid), collector.features[-1]))
+    feature_cache.store("tekuis", fresh)
+    logger.debug("[TEKUIS][CACHE] ids=%d cached=%d fetched=%d", len(pairs), len(pairs) - len(missing), len(fresh))
+    return [feature_cache.project(hits[rid], q.fields) for rid, _scn in pairs if rid in hits]
+
+
+async def _tekuis_features_by_bbox(
+    minx: float,
+    miny: float,
+    maxx: float,
+    maxy: float,
+    limit: int,
+    after: Optional[str] = None,
+    with_total: bool = False,
+    q: AttrQuery = _TEKUIS_ALL,
+):
+    """
+    BBOX üzrə bir səhifə TEKUIS parseli.
+    Qaytarır: (features, next_after, total) — next_after None → başqa səhifə yoxdur;
+    total yalnız with_total=True olduqda sayılır (əks halda None).
+    q – sütun proyeksiyası və atribut filtrləri (SQL-ə ötürülür).
+    """
+    params = dict(minx=minx, miny=miny, maxx=maxx, maxy=maxy, **q.binds)
+    page = {**params, "after": after, "lim": int(limit) + 1}  # artıq sətir → növbəti səhifə var
+
+    total = None
+    async with oracle_connection_async("tekuis", _tekuis_connect_params()) as cn:
+        with cn.cursor() as cur:
+            if with_total:
+                await cur.execute(_tekuis_bbox_count_sql(q), params)
+                total = int((await cur.fetchone())[0])
+
+            if feature_cache.two_phase_enabled():
+                await cur.execute(_tekuis_bbox_ids_sql(q), page)
+                pairs = [(str(rid), scn) for rid, scn in await cur.fetchall()]
+                next_after = pairs[limit - 1][0] if len(pairs) > limit else None
+                features = await _tekuis_resolve(cn, cur, pairs[:limit], q)
+                skipped = len(pairs[:limit]) - len(features)
+            else:
+                collector = _TekuisRowCollector(q.fields)
+                last_rid = None
+                n_rows = 0
+                await cur.execute(_tekuis_bbox_sql(q), page)
+                async for row in cur:
+                    n_rows += 1
+                    if n_rows > limit:
+                        break
+                    rid, wkt_text, *attr_vals = row
+                    last_rid = rid
+                    collector.add(rid, wkt_text, attr_vals)
+                next_after = last_rid if n_rows > limit else None
+                features, skipped = collector.features, collector.skipped
+
+    print(
+        f"[TEKUIS][BBOX] returned={len(features)} skipped={skipped} "
+        f"extent=({minx},{miny},{maxx},{maxy}) limit={limit} more={next_after is not None}"
+    )
+    return features, next_after, total
+
+
+async def _tekuis_grid_by_bbox(bbox, cell: float, q: AttrQuery = _TEKUIS_ALL) -> dict:
+    """Grid aqreqasiyası (agg=grid) — hesablama Oracle-da, geri yalnız xanalar gəlir."""
+    minx, miny, maxx, maxy = bbox
+    params = dict(minx=minx, miny=miny, maxx=maxx, maxy=maxy, cell=float(cell), **q.binds)
+    async with oracle_connection_async("tekuis", _tekuis_connect_params()) as cn:
+        with cn.cursor() as cur:
+            await cur.execute(_tekuis_grid_sql(q), params)
+            rows = await cur.fetchall()
+    print(f"[TEKUIS][GRID] cells={len(rows)} cell={cell} extent=({minx},{miny},{maxx},{maxy})")
+    return cells_to_fc(rows, cell, "TEKUIS")
+
 
-            # tail kəs + M/ZM → 2D
-            w2 = _clip_tail(w)
-            if w2 != w:
-                out_tailfix += 1
-            m_hdr = re.match(rf"^\s*(?:{TYPE_RE})\s+(ZM|M)\b", w2, flags=re.I)
-            if m_hdr:
-                dim = m_hdr.group(1).upper()
-                if dim == "ZM":
-                    w2 = re.sub(rf"\b({TYPE_RE})\s+ZM\b", r"\1 Z", w2, flags=re.I)
-                    w2 = re.sub(rf"({NUM_RE})\s+({NUM_RE})\s+({NUM_RE})\s+({NUM_RE})", r"\1 \2 \3", w2)
-                else:
-                    w2 = re.sub(rf"\b({TYPE_RE})\s+M\b", r"\1", w2, flags=re.I)
-                    w2 = re.sub(rf"({NUM_RE})\s+({NUM_RE})\s+({NUM_RE})", r"\1 \2", w2)
+async def _tekuis_fetch_geom_chunk(
+    cn, cur, collector, sub: List[str], base_params: dict, deadline=None, q: AttrQuery = _TEKUIS_ALL, ids_only=False
+):
+    """Bir chunk: əvvəl UNION ALL sorğusu; zəhərli WKT varsa — tək-tək WKT, sonra WKB fallback."""
+    params = {f"w{i}": w for i, w in enumerate(sub)}
+    params.update(base_params)
+    try:
+        try:
+            cur.setinputsizes(**{k: oracledb.DB_TYPE_CLOB for k in params if k.startswith("w")})
+        except Exception:
+            pass
+        await cur.execute(_tekuis_geom_chunk_sql(len(sub), q, ids_only), params)
+        collector.consume(await cur.fetchall())
+    except oracledb.DatabaseError as e:
+        if oracle_outage(e):
+            raise  # bağlantı/timeout — fallback mənasızdır
+        for w in sub:
+            if deadline is not None:
+                deadline.apply(cn)
             try:
-                geom = _wkt.loads(w2)
-            except Exception:
-                out_skip_parse += 1
-                continue
+                await cur.execute(_tekuis_geom_single_sql(q, ids_only), {"w": w, **base_params})
+                collector.consume(await cur.fetchall())
+            except Exception as e1:
+                if oracle_outage(e1):
+                    raise
+                # WKB fallback
+                try:
+                    g = shapely_wkt.loads(w)  # artıq 2D və validdir
+                    wkb_hex = shapely_wkb.dumps(g, hex=True)  # 2D WKB (Shapely 2-də default 2D-dir)
+                    await cur.execute(_tekuis_geom_wkb_sql(q, ids_only), {"wkb": wkb_hex, **base_params})
+                    collector.consume(await cur.fetchall())
+                except Exception as e2:
+                    if oracle_outage(e2):
+                        raise
+                    head = (w[:220] + "…") if len(w) > 220 else w
+                    print(
+                        "[TEKUIS][GEOM] skipped one WKT due to SDE error.\n"
+                        f"WKT head: {head}\nWKB fallback err: {str(e2)[:240]}"
+                    )
 
-            props = _tekuis_props_from_row(attr_vals)
-            props["SOURCE"] = "TEKUIS"
 
-            features.append({"type": "Feature", "geometry": mapping(geom), "properties": props})
-            if rid_key:
-                seen_rids.add(rid_key)
+async def _tekuis_features_by_geom(
+    safe_wkts: List[str], srid_in: int, buf_m: float, deadline=None, start: int = 0, q: AttrQuery = _TEKUIS_ALL
+):
+    """
+    Artıq sanitizasiya olunmuş WKT-lər (bax: _sanitize_input_wkts) üzrə TEKUIS parsellərini çəkir.
+    deadline verilibsə, büdcə bitəndə dayanır: (features, next_offset) — next_offset None → hamısı bitib.
+    Yarımçıq chunk-ın nəticəsi atılır, davam sorğusu həmin chunk-dan başlayır.
+    """
+    table_srid = int(os.getenv("TEKUIS_TABLE_SRID", 4326))  # cədvəl SRID
+    base_params = {"srid_in": int(srid_in), "bufm": float(buf_m), "table_srid": table_srid, **q.binds}
 
-    with _oracle_connect() as cn:
+    two_phase = feature_cache.two_phase_enabled()
+    collector = _TekuisIdCollector() if two_phase else _TekuisRowCollector(q.fields)
+    features = [] if two_phase else collector.features
+    next_offset = None
+    async with oracle_connection_async("tekuis", _tekuis_connect_params()) as cn:
         with cn.cursor() as cur:
             CHUNK = 200
-            for start in range(0, len(safe_wkts), CHUNK):
-                sub = safe_wkts[start : start + CHUNK]
-                sql_wkt, params = _make_sql_wkt(len(sub))
+            for offset in range(int(start), len(safe_wkts), CHUNK):
+                if deadline is not None:
+                    if deadline.expired():
+                        next_offset = offset
+                        break
+                    deadline.apply(cn)
+                mark = len(features)
                 try:
-                    try:
-                        cur.setinputsizes(**{k: oracledb.DB_TYPE_CLOB for k in params if k.startswith("w")})
-                    except Exception:
-                        pass
-                    cur.execute(sql_wkt, params)
-                    _consume_cursor(cur)
-                except oracledb.DatabaseError:
-                    # Zəhərli WKT varsa — tək-tək yoxla; əvvəl WKT, sonra WKB fallback
-                    for w in sub:
-                        ok = False
-                        try:
-                            cur.execute(
-                                f"""
-                                WITH g AS (
-                                    SELECT CASE WHEN :bufm > 0 THEN
-                                        sde.st_transform(
-                                            sde.st_buffer(
-                                                sde.st_transform(sde.st_geomfromtext(:w, :srid_in), 3857), :bufm
-                                            ),
-                                            :table_srid
-                                        )
-                                    ELSE
-                                        sde.st_transform(sde.st_geomfromtext(:w, :srid_in), :table_srid)
-                                    END AS geom
-                                    FROM dual
-                                ),
-                                ids AS (
-                                    SELECT DISTINCT t.ROWID AS rid
-                                      FROM {schema}.{table} t, g
-                                     WHERE sde.st_envintersects(t.SHAPE, g.geom) = 1
-                                       AND sde.st_intersects(t.SHAPE, g.geom) = 1
-                                )
-                                SELECT t.ROWID AS rid,
-                                       sde.st_astext(t.SHAPE) AS wkt,
-                                       {attrs_sql}
-                                  FROM {schema}.{table} t
-                                  JOIN ids ON t.ROWID = ids.rid
-                                """,
-                                {"w": w, "srid_in": int(srid_in), "bufm": float(buf_m), "table_srid": int(table_srid)},
-                            )
-                            _consume_cursor(cur)
-                            ok = True
-                        except Exception:
-                            # WKB fallback
-                            try:
-                                g = _wkt.loads(w)  # artıq 2D və validdir
-                                wkb_hex = _wkb.dumps(g, hex=True)  # 2D WKB (Shapely 2-də default 2D-dir)
-                                cur.execute(
-                                    _make_sql_wkb(),
-                                    {"wkb": wkb_hex, "srid_in": int(srid_in), "bufm": float(buf_m), "table_srid": int(table_srid)},
-                                )
-                                _consume_cursor(cur)
-                                ok = True
-                            except Exception as e2:
-                                head = (w[:220] + "…") if len(w) > 220 else w
-                                print(
-                                    "[TEKUIS][GEOM] skipped one WKT due to SDE error.\n"
-                                    f"WKT head: {head}\nWKB fallback err: {str(e2)[:240]}"
-                                )
-                        if not ok:
-                            continue
+                    pmark = len(collector.pairs) if two_phase else 0
+                    await _tekuis_fetch_geom_chunk(
+                        cn, cur, collector, safe_wkts[offset : offset + CHUNK], base_params, deadline, q, two_phase
+                    )
+                    if two_phase:
+                        features.extend(await _tekuis_resolve(cn, cur, collector.pairs[pmark:], q))
+                except oracledb.DatabaseError as e:
+                    if deadline is None or not deadline.hit_by(e):
+                        raise
+                    del features[mark:]
+                    next_offset = offset
+                    break
 
     print(
-        f"[TEKUIS][GEOM] input_sanitized={len(safe_wkts)} dropped={bad_empty+bad_curved+bad_parse} "
-        f"(empty={bad_empty}, curved={bad_curved}, parse={bad_parse}) srid_in={srid_in} table_srid={table_srid} buf_m={buf_m}"
+        f"[TEKUIS][GEOM] returned={len(features)} unique_rids={len(collector.seen_rids)} two_phase={two_phase} "
+        f"srid_in={srid_in} table_srid={table_srid} buf_m={buf_m} next_offset={next_offset}"
     )
+    return features, next_offset
+
+
+async def _tekuis_features_by_ids(ids: List[int], q: AttrQuery = _TEKUIS_ALL) -> List[dict]:
+    """
+    ID-lər üzrə TEKUIS parselləri (spatial sorğu olmadan); bbox/geom ilə eyni feature formatı.
+    İki fazalı rejimdə geometriya cache-dən gəlir, yalnız dəyişənlər Oracle-dan oxunur.
+    """
+    async with oracle_connection_async("tekuis", _tekuis_connect_params()) as cn:
+        with cn.cursor() as cur:
+            binds = {"ids": await oracle_id_list(cn, ids, numeric=True), **q.binds}
+            if feature_cache.two_phase_enabled():
+                await cur.execute(_tekuis_by_ids_sql(q, ids_only=True), binds)
+                pairs = [(str(rid), scn) for rid, scn in await cur.fetchall()]
+                features = await _tekuis_resolve(cn, cur, pairs, q)
+            else:
+                collector = _TekuisRowCollector(q.fields)
+                await cur.execute(_tekuis_by_ids_sql(q), binds)
+                collector.consume(await cur.fetchall())
+                features = collector.features
+
+    print(f"[TEKUIS][IDS] requested={len(ids)} returned={len(features)}")
+    return features
+
+
+@require_GET
+@latest_wins("tekuis_bbox")
+@admit("interactive")
+async def tekuis_parcels_by_bbox(request):
+    try:
+        minx = float(request.GET.get("minx"))
+        miny = float(request.GET.get("miny"))
+        maxx = float(request.GET.get("maxx"))
+        maxy = float(request.GET.get("maxy"))
+    except Exception:
+        return HttpResponseBadRequest("minx/miny/maxx/maxy tələb olunur və ədədi olmalıdır.")
+
+    try:
+        q = attr_query_from_get(request.GET, TEKUIS_ATTRS, "t")
+        have = parse_have(request.GET.get("have"))
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    if have is not None:
+        q = with_key_field(q, TEKUIS_ATTRS, "ID")
+
+    bbox = snap_bbox(minx, miny, maxx, maxy)
+    try:
+        cell = grid_cell(request.GET, bbox)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    if cell is not None:
+        # agg=grid: parsellər yerinə xanalar (səhifələmə yoxdur)
+        async def _grid():
+            return JsonResponse(await _tekuis_grid_by_bbox(bbox, cell, q))
+
+        return await coalesced(("tekuis", "grid", *bbox, cell, q.digest), _grid)
+
+    limit = page_limit(request.GET.get("limit"))
+    kind = f"tekuis_bbox:{q.digest}"  # cursor başqa fields/filtr ilə işlənə bilməz
+    token = (request.GET.get("cursor") or "").strip()
+    try:
+        state = decode_cursor(token, kind, bbox).get("tekuis") if token else None
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    after = (state or {}).get("after")
+    with_total = state is None and want_total(request.GET)
+    band = zoom_band(request.GET)
+
+    async def _produce():
+        features, next_after, total = await _tekuis_features_by_bbox(
+            *bbox, limit, after, with_total=with_total, q=q
+        )
+        if band is not None:
+            features = await run_blocking(simplify_features, features, band, _tekuis_srid())
+        # sadələşdirmədən sonra: qonşular tam partiya ilə sadələşsin
+        features, excluded = exclude_known(features, have, "ID")
+        total = total if state is None else state.get("total")
+        out = {"type": "FeatureCollection", "features": features, "excluded": excluded}
+        out.update(page_fields(kind, bbox, limit, {"tekuis": {"after": next_after, "total": total}}))
+        return JsonResponse(out, safe=False)
+
+    key = ("tekuis", "bbox", *bbox, limit, after, with_total, q.digest, have.digest if have else None)
+    return await band_cached(key, band, lambda: coalesced((*key, band), _produce))
+
+
+@csrf_exempt
+@admit("interactive", heavy_body=True)
+async def tekuis_parcels_by_geom(request):
+    if request.method != "POST":
+        return HttpResponseBadRequest("POST gözlənirdi.")
+
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+    except Exception:
+        return HttpResponseBadRequest("Yanlış JSON.")
+
+    # İstifadəçi SRID verə bilər, amma aşağıda avtomatik korreksiya edəcəyik
+    srid_in_payload = int(payload.get("srid") or os.getenv("TEKUIS_SRID", 4326))
+    buf_m = float(payload.get("buffer_m") or 0.0)
+
+    # WKT siyahısını yığ
+    wkt_list = _payload_to_wkt_list(payload)
+    if not wkt_list:
+        w_single = _clean_wkt_text(payload.get("wkt")) if payload.get("wkt") else None
+        if not w_single:
+            return HttpResponseBadRequest("wkt və ya geojson verilməlidir.")
+        wkt_list = [w_single]
+
+    # Input sanitizasiya
+    safe_wkts, bad = _sanitize_input_wkts(wkt_list)
+    if not safe_wkts:
+        print(
+            f"[TEKUIS][GEOM][input_sanitize] all invalid. empty={bad['empty']}, curved={bad['curved']}, parse={bad['parse']}"
+        )
+        return JsonResponse({"type": "FeatureCollection", "features": []}, safe=False)
+
+    # SRID auto-detekt: dərəcə aralığındadırsa 4326
+    srid_in = _infer_wkt_srid(safe_wkts, srid_in_payload)
+
     print(
-        f"[TEKUIS][GEOM] returned={len(features)} unique_rids={len(seen_rids)} "
-        f"skipped_out={out_skip_empty+out_skip_curved+out_skip_parse} tailfix={out_tailfix}"
+        f"[TEKUIS][GEOM] input_sanitized={len(safe_wkts)} dropped={sum(bad.values())} "
+        f"(empty={bad['empty']}, curved={bad['curved']}, parse={bad['parse']})"
     )
 
-    return JsonResponse({"type": "FeatureCollection", "features": features}, safe=False)
+    try:
+        q = attr_query_from_payload(payload, TEKUIS_ATTRS, "t")
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    # Vaxt büdcəsi + davam tokeni (qismən nəticə)
+    deadline = Deadline.for_endpoint("tekuis_geom", payload.get("budget_ms"))
+    digest = wkt_list_digest(safe_wkts)
+    kind = f"tekuis_geom:{q.digest}"
+    try:
+        start = int(read_continuation(payload["continuation"], kind, digest).get("tekuis") or 0) if payload.get("continuation") else 0
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    async def _produce():
+        features, next_offset = await _tekuis_features_by_geom(safe_wkts, srid_in, buf_m, deadline, start, q)
+        out = {"type": "FeatureCollection", "features": features}
+        out.update(continuation_fields(kind, digest, {"tekuis": next_offset}, len(safe_wkts)))
+        return JsonResponse(out, safe=False)
+
+    return await coalesced(
+        ("tekuis", "geom", digest, round(buf_m, 3), srid_in, start, q.digest, deadline.budget_ms), _produce
+    )
+
+
+@csrf_exempt
+@require_POST
+@admit("interactive")
+async def tekuis_parcels_by_ids(request):
+    """
+    POST {"ids": [ID, ...], "fields"?, "filters"?} → FeatureCollection (sorğu sırası ilə)
+    + "missing": tapılmayan ID-lər. Seçilmiş / əvvəl yüklənmiş parsellərin yenilənməsi üçün.
+    """
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+    except Exception:
+        return HttpResponseBadRequest("Yanlış JSON.")
+    if not isinstance(payload, dict):
+        return HttpResponseBadRequest("JSON obyekt gözlənilirdi.")
+    try:
+        ids = parse_id_list(payload.get("ids"), numeric=True)
+        q = with_key_field(attr_query_from_payload(payload, TEKUIS_ATTRS, "t"), TEKUIS_ATTRS, "ID")
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    async def _produce():
+        features, missing = order_by_ids(await _tekuis_features_by_ids(ids, q), ids, "ID")
+        return JsonResponse({"type": "FeatureCollection", "features": features, "missing": missing})
+
+    return await coalesced(("tekuis", "ids", tuple(ids), q.digest), _produce)
 
 
 # --- YENİ: attach-lardan WKT toplamaq üçün köməkçi ---
@@ -486,10 +737,19 @@ def _collect_attach_wkts_for_meta(meta_id: int, req_crs: str = "auto") -> List[s
 
 # --- YENİ: TEKUIS cavabını WKT-lərdən yığan köməkçi ---
 
-def _tekuis_features_from_wkts(wkt_list: List[str], srid: int, buf_m: float, limit: Optional[int] = None) -> List[dict]:
+def _tekuis_features_from_wkts(
+    wkt_list: List[str],
+    srid: int,
+    buf_m: float,
+    limit: Optional[int] = None,
+    deadline=None,
+    start: int = 0,
+):
     """
     Verilən WKT siyahısı əsasında Oracle/TEKUIS-dən parselləri çəkir.
     Shapely üçün WKT-lərdə M/ZM ölçüsünü normallaşdırır və mümkün "tail"ları kəsir.
+    Qaytarır: (features, next_offset) — next_offset None deyilsə, deadline bitib və
+    wkt_list[next_offset:] hələ işlənməyib.
     """
     import re
 
@@ -538,15 +798,21 @@ def _tekuis_features_from_wkts(wkt_list: List[str], srid: int, buf_m: float, lim
     table = os.getenv("TEKUIS_TABLE", "M_G_PARSEL")
     max_features = int(os.getenv("TEKUIS_MAX_FEATURES", "20000"))
     row_limit = int(limit or max_features)
+    next_offset = None
 
     with _oracle_connect() as cn:
         with cn.cursor() as cur:
             CHUNK = 200
-            for start in range(0, len(wkt_list), CHUNK):
+            for offset in range(int(start), len(wkt_list), CHUNK):
                 if row_limit is not None and row_limit <= 0:
                     break
+                if deadline is not None:
+                    if deadline.expired():
+                        next_offset = offset
+                        break
+                    deadline.apply(cn)
 
-                chunk = wkt_list[start : start + CHUNK]
+                chunk = wkt_list[offset : offset + CHUNK]
                 bind_names = [f"w{i}" for i in range(len(chunk))]
                 try:
                     cur.setinputsizes(**{bn: oracledb.DB_TYPE_CLOB for bn in bind_names})
@@ -586,90 +852,103 @@ def _tekuis_features_from_wkts(wkt_list: List[str], srid: int, buf_m: float, lim
                 params = {bn: w for bn, w in zip(bind_names, chunk)}
                 params.update({"srid": int(srid), "bufm": float(buf_m), "row_limit": int(row_limit)})
 
+                mark = (len(features), set(seen_rids), row_limit)
                 try:
-                    cur.execute(sql, params)
-                except Exception:
-                    # Ehtiyat plan (envintersects olmadan)
-                    cur.execute(
-                        f"""
-                        WITH g_raw AS (
-{g_raw_sql}
-                        ),
-                        g AS (
-                            SELECT CASE WHEN :bufm > 0 THEN
-                                sde.st_transform(
-                                    sde.st_buffer(
-                                        sde.st_transform(sde.st_geomfromtext(wkt, :srid), 3857), :bufm
-                                    ),
-                                4326)
-                            ELSE sde.st_geomfromtext(wkt, :srid) END AS geom
-                            FROM g_raw
-                        ),
-                        ids AS (
-                            SELECT DISTINCT t.ROWID AS rid
-                              FROM {schema}.{table} t, g
-                             WHERE sde.st_intersects(t.SHAPE, g.geom) = 1
-                        ),
-                        lim AS (
-                            SELECT rid FROM ids WHERE ROWNUM <= :row_limit
+                    try:
+                        cur.execute(sql, params)
+                    except Exception as e:
+                        if deadline is not None and deadline.hit_by(e):
+                            raise
+                        # Ehtiyat plan (envintersects olmadan)
+                        cur.execute(
+                            f"""
+                            WITH g_raw AS (
+    {g_raw_sql}
+                            ),
+                            g AS (
+                                SELECT CASE WHEN :bufm > 0 THEN
+                                    sde.st_transform(
+                                        sde.st_buffer(
+                                            sde.st_transform(sde.st_geomfromtext(wkt, :srid), 3857), :bufm
+                                        ),
+                                    4326)
+                                ELSE sde.st_geomfromtext(wkt, :srid) END AS geom
+                                FROM g_raw
+                            ),
+                            ids AS (
+                                SELECT DISTINCT t.ROWID AS rid
+                                  FROM {schema}.{table} t, g
+                                 WHERE sde.st_intersects(t.SHAPE, g.geom) = 1
+                            ),
+                            lim AS (
+                                SELECT rid FROM ids WHERE ROWNUM <= :row_limit
+                            )
+                            SELECT t.ROWID AS rid, sde.st_astext(t.SHAPE) AS wkt
+                              FROM {schema}.{table} t
+                              JOIN lim ON t.ROWID = lim.rid
+                            """,
+                            params,
                         )
-                        SELECT t.ROWID AS rid, sde.st_astext(t.SHAPE) AS wkt
-                          FROM {schema}.{table} t
-                          JOIN lim ON t.ROWID = lim.rid
-                        """,
-                        params,
-                    )
 
-                for rid, wkt_lob in cur:
-                    rid_key = str(rid) if rid is not None else None
-                    if rid_key and rid_key in seen_rids:
-                        continue
-
-                    raw = wkt_lob.read() if hasattr(wkt_lob, "read") else wkt_lob
-                    w = _clean_wkt_text(raw)
-                    if not w:
-                        skipped_empty += 1
-                        continue
-                    if re.search(
-                        r"\b(CURVEPOLYGON|CIRCULARSTRING|COMPOUNDCURVE|ELLIPTICARC|MULTICURVE|MULTISURFACE)\b",
-                        w,
-                        flags=re.I,
-                    ):
-                        skipped_curved += 1
-                        continue
-
-                    # Tail kəs + M/ZM normallaşdır
-                    w2 = _normalize_wkt_remove_m_dims(_clip_to_first_geometry(w))
+                    for rid, wkt_lob in cur:
+                        rid_key = str(rid) if rid is not None else None
+                        if rid_key and rid_key in seen_rids:
+                            continue
+
+                        raw = wkt_lob.read() if hasattr(wkt_lob, "read") else wkt_lob
+                        w = _clean_wkt_text(raw)
+                        if not w:
+                            skipped_empty += 1
+                            continue
+                        if re.search(
+                            r"\b(CURVEPOLYGON|CIRCULARSTRING|COMPOUNDCURVE|ELLIPTICARC|MULTICURVE|MULTISURFACE)\b",
+                            w,
+                            flags=re.I,
+                        ):
+                            skipped_curved += 1
+                            continue
 
-                    try:
-                        geom = shapely_wkt.loads(w2)
-                    except Exception as e:
-                        skipped_parse += 1
-                        if logged_parse_examples < 3:
-                            head = (w[:280] + "…") if len(w) > 280 else w
-                            print(f"[TEKUIS][ATTACH][parse_error] sample WKT head:\n{head}\n---\n{e}\n")
-                            logged_parse_examples += 1
-                        continue
-
-                    features.append({"type": "Feature", "geometry": mapping(geom), "properties": {}})
-                    if rid_key:
-                        seen_rids.add(rid_key)
-
-                    if row_limit is not None:
-                        row_limit -= 1
-                        if row_limit <= 0:
-                            break
+                        # Tail kəs + M/ZM normallaşdır
+                        w2 = _normalize_wkt_remove_m_dims(_clip_to_first_geometry(w))
+
+                        try:
+                            geom = shapely_wkt.loads(w2)
+                        except Exception as e:
+                            skipped_parse += 1
+                            if logged_parse_examples < 3:
+                                head = (w[:280] + "…") if len(w) > 280 else w
+                                print(f"[TEKUIS][ATTACH][parse_error] sample WKT head:\n{head}\n---\n{e}\n")
+                                logged_parse_examples += 1
+                            continue
+
+                        features.append({"type": "Feature", "geometry": mapping(geom), "properties": {}})
+                        if rid_key:
+                            seen_rids.add(rid_key)
+
+                        if row_limit is not None:
+                            row_limit -= 1
+                            if row_limit <= 0:
+                                break
+                except oracledb.DatabaseError as e:
+                    if deadline is None or not deadline.hit_by(e):
+                        raise
+                    # yarımçıq chunk atılır — davam sorğusu onu yenidən işləyəcək
+                    del features[mark[0]:]
+                    seen_rids, row_limit = mark[1], mark[2]
+                    next_offset = offset
+                    break
 
     skipped_total = skipped_empty + skipped_curved + skipped_parse
     print(
         f"[TEKUIS][ATTACH] returned={len(features)} unique_rids={len(seen_rids)} "
         f"skipped_total={skipped_total} (empty={skipped_empty}, curved={skipped_curved}, parse={skipped_parse}) "
-        f"srid={srid} buf_m={buf_m}"
+        f"srid={srid} buf_m={buf_m} next_offset={next_offset}"
     )
-    return features
+    return features, next_offset
 
 
 @require_GET
+@admit("batch")
 def tekuis_parcels_by_attach_ticket(request):
     """
     GET parametrlər:
@@ -677,6 +956,8 @@ def tekuis_parcels_by_attach_ticket(request):
       - srid:   opsional (default .env TEKUIS_SRID və ya 4326)
       - buffer_m (və ya buf): opsional, nöqtələr üçün axtarış radiusu (metr)
       - limit:  opsional, qaytarılacaq maksimum parsel sayı (default .env TEKUIS_MAX_FEATURES)
+      - budget_ms: opsional, vaxt büdcəsi (default PARCELS_BUDGET_MS["tekuis_attach"])
+      - continuation: opsional, əvvəlki qismən cavabın tokeni
     """
     ticket = (request.GET.get("ticket") or "").strip()
     if not ticket:
@@ -697,9 +978,21 @@ def tekuis_parcels_by_attach_ticket(request):
         print(f"[TEKUIS][ATTACH] no geometries found for meta_id={meta_id}")
         return JsonResponse({"type": "FeatureCollection", "features": []}, safe=False)
 
+    deadline = Deadline.for_endpoint("tekuis_attach", request.GET.get("budget_ms"))
+    digest = wkt_list_digest(wkt_list)
+    token = (request.GET.get("continuation") or "").strip()
+    try:
+        start = int(read_continuation(token, "tekuis_attach", digest).get("tekuis") or 0) if token else 0
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
     # TEKUIS parsellərini çək
-    features = _tekuis_features_from_wkts(wkt_list, srid=srid, buf_m=buf_m, limit=limit)
-    return JsonResponse({"type": "FeatureCollection", "features": features}, safe=False)
+    features, next_offset = _tekuis_features_from_wkts(
+        wkt_list, srid=srid, buf_m=buf_m, limit=limit, deadline=deadline, start=start
+    )
+    out = {"type": "FeatureCollection", "features": features}
+    out.update(continuation_fields("tekuis_attach", digest, {"tekuis": next_offset}, len(wkt_list)))
+    return JsonResponse(out, safe=False)
 
 
 def _prop_ci(props: dict, key: str):
@@ -784,8 +1077,12 @@ def _insert_tekuis_rows(
     saved = 0
     skipped = 0
 
-    for f in features or []:
-        geom = f.get("geometry") or {}
+    features = features or []
+    # dəqiqlik şəbəkəsi (TEKUIS_PRECISION_GRID) bütün geometriyalara bir çağırışla
+    geoms = precision.snap_geojson([f.get("geometry") for f in features])
+
+    for f, geom in zip(features, geoms):
+        geom = geom or {}
         gtype = (geom.get("type") or "").lower()
         if "polygon" not in gtype:  # yalnız (Multi)Polygon saxlayırıq
             skipped += 1
@@ -923,7 +1220,58 @@ def _meta_id_from_request(request):
     return int(zlib.crc32(ticket.encode("utf-8")) & 0x7FFFFFFF)
 
 
+def _validation_thresholds(data: Optional[dict] = None):
+    """(min_overlap_sqm, min_gap_sqm): body-də verilibsə o, yoxsa settings — validate və save eyni."""
+    data = data or {}
+    base = getattr(settings, "TEKUIS_VALIDATION_MIN_AREA_SQM", 1.0)
+    min_ov = data.get("min_overlap_sqm")
+    min_ga = data.get("min_gap_sqm")
+    if min_ov is None:
+        min_ov = getattr(settings, "TEKUIS_VALIDATION_MIN_OVERLAP_SQM", base)
+    if min_ga is None:
+        min_ga = getattr(settings, "TEKUIS_VALIDATION_MIN_GAP_SQM", base)
+    return float(min_ov), float(min_ga)
+
+
+def _issue_key(obj):
+    """Overlap/gap açarı: key/hash varsa o, yoxsa topoKey (frontend ilə eyni)."""
+    if isinstance(obj, dict) and (obj.get("key") or obj.get("hash")):
+        return str(obj.get("key") or obj.get("hash"))
+    return _topo_key_py(obj)
+
+
+def _collect_ignored_keys(payload_ignored: dict):
+    """ignored-ları müxtəlif formatlarda dəstəklə → (overlap açarları, gap açarları)."""
+    ov = (
+        payload_ignored.get("overlap_keys")
+        or payload_ignored.get("overlaps")
+        or payload_ignored.get("overlap_hashes")
+        or payload_ignored.get("ignored_overlap_keys")
+        or []
+    )
+    gp = (
+        payload_ignored.get("gap_keys")
+        or payload_ignored.get("gaps")
+        or payload_ignored.get("gap_hashes")
+        or payload_ignored.get("ignored_gap_keys")
+        or []
+    )
+    return set(map(str, ov)), set(map(str, gp))
+
+
+def _validation_token_for(res: dict, gj: dict, meta_id: int, min_ov: float, min_ga: float) -> str:
+    return validation_token.issue(
+        meta_id,
+        validation_cache.input_hash(gj),
+        min_ov,
+        min_ga,
+        [_issue_key(o) for o in res.get("overlaps") or []],
+        [_issue_key(g) for g in res.get("gaps") or []],
+    )
+
+
 @csrf_exempt
+@admit("batch")
 def validate_tekuis_parcels(request):
     if request.method != "POST":
         return JsonResponse({"ok": False, "error": "POST only"}, status=405)
@@ -940,8 +1288,7 @@ def validate_tekuis_parcels(request):
     # ⬅️ meta_id-ni həmişə eyni qaydada götür (CRC32 və ya header/query)
     meta_id = _meta_id_from_request(request)
 
-    min_overlap = data.get("min_overlap_sqm")
-    min_gap = data.get("min_gap_sqm")
+    min_overlap, min_gap = _validation_thresholds(data)
 
     # Dissolve olunmuş kimi görünürmü? (tək Polygon/MultiPolygon gəlibsə)
     feats = (gj or {}).get("features", [])
@@ -949,12 +1296,87 @@ def validate_tekuis_parcels(request):
 
     res = validate_tekuis(gj, meta_id, min_overlap_sqm=min_overlap, min_gap_sqm=min_gap)
 
-    out = {"ok": True, "validation": res}
+    out = {"ok": True, "validation": res, "validation_token": _validation_token_for(res, gj, meta_id, min_overlap, min_gap)}
     if looks_dissolved:
         out["warning"] = "features_look_dissolved"  # Fronta göstərə bilərsən
     return JsonResponse(out)
 
 
+@csrf_exempt
+@require_valid_ticket
+@admit("batch")
+def tekuis_validate_session_start(request):
+    """Tam yoxlama + inkremental sessiya (validation_session.start); sessiya ticket-in fk_metadata-sı üzrədir."""
+    if request.method != "POST":
+        return JsonResponse({"ok": False, "error": "POST only"}, status=405)
+
+    data = _json_body(request)
+    gj = data.get("geojson") or (data if "features" in data else None)
+    if not gj:
+        return JsonResponse({"ok": False, "error": "geojson is required"}, status=422)
+
+    meta_id = getattr(request, "fk_metadata", None)
+    if meta_id is None:
+        return JsonResponse({"ok": False, "error": "unauthorized"}, status=401)
+    min_ov, min_ga = _validation_thresholds(data)
+    out = validation_session.start(meta_id, gj, min_ov, min_ga)
+    return JsonResponse({"ok": True, **out})
+
+
+@csrf_exempt
+@require_valid_ticket
+@admit("interactive")
+def tekuis_validate_session_delta(request):
+    """
+    Body: {version, changed: [Feature], added: [Feature], removed: [açar]}
+    Cavab: {version, stats, added: {overlaps, gaps}, removed: {overlaps, gaps}, assigned}.
+    Sessiya yoxdursa 410 + "restart": true – klient session/ ilə tam FC göndərməlidir.
+    """
+    if request.method != "POST":
+        return JsonResponse({"ok": False, "error": "POST only"}, status=405)
+
+    data = _json_body(request)
+    upsert = list(data.get("changed") or []) + list(data.get("added") or [])
+    removed = list(data.get("removed") or [])
+    meta_id = getattr(request, "fk_metadata", None)
+    if meta_id is None:
+        return JsonResponse({"ok": False, "error": "unauthorized"}, status=401)
+    try:
+        out = validation_session.apply(meta_id, upsert, removed, data.get("version"))
+    except validation_session.SessionError as e:
+        return JsonResponse(
+            {"ok": False, "code": e.code, "error": str(e), "restart": e.code == "NO_SESSION"}, status=e.status
+        )
+    except (TypeError, ValueError) as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=400)
+    return JsonResponse({"ok": True, **out})
+
+
+def _ignore_items(payload: dict) -> list:
+    """
+    {"hash", "geom"} (tək) və ya {"gaps": [{"hash", "geom"}, ...]} / {"hashes": [...]} (toplu)
+    → [(hash, geom), ...].
+    """
+    items = []
+    if payload.get("hash"):
+        items.append((str(payload["hash"]).strip(), payload.get("geom")))
+    for g in payload.get("gaps") or []:
+        if isinstance(g, dict) and g.get("hash"):
+            items.append((str(g["hash"]).strip(), g.get("geom")))
+    for h in payload.get("hashes") or []:
+        if h:
+            items.append((str(h).strip(), None))
+    return [(h, g) for h, g in items if h]
+
+
+def _ignore_gaps_safe(meta_id, items):
+    try:
+        return ignore_gaps(int(meta_id), items)
+    except Exception as e:
+        print(f"[TEKUIS][IGNORE] meta_id={meta_id} n={len(items)} failed: {e}")
+        return None
+
+
 @csrf_exempt
 def ignore_tekuis_gap(request):
     if request.method != "POST":
@@ -962,17 +1384,18 @@ def ignore_tekuis_gap(request):
 
     data = _json_body(request)
     meta_id = _meta_id_from_request(request)
-    h = data.get("hash")
-    geom = data.get("geom")
-    if not h:
+    items = _ignore_items(data)
+    if not items:
         return JsonResponse({"ok": False, "error": "hash required"}, status=400)
 
-    ok = ignore_gap(meta_id, h, geom)
-    return JsonResponse({"ok": bool(ok)}, status=200 if ok else 500)
+    inserted = _ignore_gaps_safe(meta_id, items)
+    ok = inserted is not None
+    return JsonResponse({"ok": ok, "inserted": inserted}, status=200 if ok else 500)
 
 
 @csrf_exempt
 @require_valid_ticket
+@admit("batch")
 def tekuis_validate_view(request):
     if request.method != "POST":
         return HttpResponseBadRequest("POST gözlənirdi.")
@@ -992,19 +1415,15 @@ def tekuis_validate_view(request):
         return JsonResponse({"ok": False, "error": "meta_id yoxdur"}, status=400)
 
     # ayarlardan hədləri götür
-    min_ov = float(
-        getattr(settings, "TEKUIS_VALIDATION_MIN_OVERLAP_SQM", getattr(settings, "TEKUIS_VALIDATION_MIN_AREA_SQM", 1.0))
-    )
-    min_ga = float(
-        getattr(settings, "TEKUIS_VALIDATION_MIN_GAP_SQM", getattr(settings, "TEKUIS_VALIDATION_MIN_AREA_SQM", 1.0))
-    )
+    min_ov, min_ga = _validation_thresholds()
 
     res = validate_tekuis(geojson, int(meta_id), min_overlap_sqm=min_ov, min_gap_sqm=min_ga)
 
     has_err = res.get("stats", {}).get("overlap_count", 0) > 0 or res.get("stats", {}).get("gap_count", 0) > 0
 
     status = 422 if has_err else 200
-    return JsonResponse({"ok": not has_err, "validation": res}, status=status)
+    token = _validation_token_for(res, geojson, int(meta_id), min_ov, min_ga)
+    return JsonResponse({"ok": not has_err, "validation": res, "validation_token": token}, status=status)
 
 
 @csrf_exempt
@@ -1020,16 +1439,17 @@ def tekuis_validate_ignore_gap_view(request):
     meta_id = payload.get("meta_id")
     if meta_id is None:
         meta_id = getattr(request, "fk_metadata", None)
-    h = (payload.get("hash") or "").strip()
-    if not (meta_id and h):
+    items = _ignore_items(payload)
+    if not (meta_id and items):
         return HttpResponseBadRequest("meta_id və hash tələb olunur.")
 
-    ok = ignore_gap(int(meta_id), h, geom_geojson=payload.get("geom"))
-    return JsonResponse({"ok": bool(ok)})
+    inserted = _ignore_gaps_safe(meta_id, items)
+    return JsonResponse({"ok": inserted is not None, "inserted": inserted})
 
 
 @csrf_exempt
 @require_valid_ticket
+@admit("batch")
 def save_tekuis_parcels(request):
     if request.method != "POST":
         return JsonResponse({"ok": False, "error": "POST only"}, status=405)
@@ -1082,45 +1502,26 @@ def save_tekuis_parcels(request):
     if not original_features:
         return JsonResponse({"ok": False, "error": "Boş original FeatureCollection"}, status=400)
 
-    skip_validation = bool(data.get("skip_validation", False))
-    if not skip_validation:
-        min_ov = float(
-            getattr(settings, "TEKUIS_VALIDATION_MIN_OVERLAP_SQM", getattr(settings, "TEKUIS_VALIDATION_MIN_AREA_SQM", 1.0))
-        )
-        min_ga = float(
-            getattr(settings, "TEKUIS_VALIDATION_MIN_GAP_SQM", getattr(settings, "TEKUIS_VALIDATION_MIN_AREA_SQM", 1.0))
-        )
+    # klientin "skip_validation" bayrağı nəzərə alınmır: yoxlamanı yalnız bu FC üçün verilmiş
+    # etibarlı validation_token qısaldır
+    if data.get("skip_validation"):
+        print(f"[TEKUIS][SAVE] meta_id={meta_id} skip_validation ignored")
+    min_ov, min_ga = _validation_thresholds()
+    ignored_overlap_keys, ignored_gap_keys = _collect_ignored_keys(data.get("ignored") or {})
+
+    # validate-in imzalı token-i məhz bu FC üçündürsə overlay təkrarlanmır (yalnız hash);
+    # token-dəki bütün problemlər ignore edilməyibsə tam validasiya (422 detalları üçün)
+    token_keys = validation_token.verify(data.get("validation_token"), fc, int(meta_id), min_ov, min_ga)
+    token_clean = token_keys is not None and not (
+        token_keys[0] - ignored_overlap_keys or token_keys[1] - ignored_gap_keys
+    )
 
+    if not token_clean:
+        # validate view ilə eyni hədlər → az öncə yoxlanmış FC-nin nəticəsi cache-dən gəlir
         v = validate_tekuis(fc, int(meta_id), min_overlap_sqm=min_ov, min_gap_sqm=min_ga)
 
-        # ignored-ları müxtəlif formatlarda dəstəklə
-        def _collect_ignored_keys(payload_ignored: dict):
-            ov = (
-                payload_ignored.get("overlap_keys")
-                or payload_ignored.get("overlaps")
-                or payload_ignored.get("overlap_hashes")
-                or payload_ignored.get("ignored_overlap_keys")
-                or []
-            )
-            gp = (
-                payload_ignored.get("gap_keys")
-                or payload_ignored.get("gaps")
-                or payload_ignored.get("gap_hashes")
-                or payload_ignored.get("ignored_gap_keys")
-                or []
-            )
-            return set(map(str, ov)), set(map(str, gp))
-
-        ignored = data.get("ignored") or {}
-        ignored_overlap_keys, ignored_gap_keys = _collect_ignored_keys(ignored)
-
-        def _eff_key(obj):
-            if isinstance(obj, dict) and (obj.get("key") or obj.get("hash")):
-                return str(obj.get("key") or obj.get("hash"))
-            return _topo_key_py(obj)
-
-        effective_overlaps = [o for o in (v.get("overlaps") or []) if _eff_key(o) not in ignored_overlap_keys]
-        effective_gaps = [g for g in (v.get("gaps") or []) if _eff_key(g) not in ignored_gap_keys]
+        effective_overlaps = [o for o in (v.get("overlaps") or []) if _issue_key(o) not in ignored_overlap_keys]
+        effective_gaps = [g for g in (v.get("gaps") or []) if _issue_key(g) not in ignored_gap_keys]
 
         if effective_overlaps or effective_gaps:
             return JsonResponse({"ok": False, "validation": v}, status=422)
@@ -1224,6 +1625,8 @@ __all__ = [
     "tekuis_parcels_by_bbox",
     "tekuis_parcels_by_geom",
     "tekuis_validate_ignore_gap_view",
+    "tekuis_validate_session_delta",
+    "tekuis_validate_session_start",
     "tekuis_validate_view",
     "validate_tekuis_parcels",
 ]
\ No newline at end of file
@@ -9,6 +9,7 @@ import shapefile  # pyshp
 from django.http import HttpResponseBadRequest, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 
+from corrections import reproject
 from .auth import require_valid_ticket
 from .geo_utils import (
     _build_transformer_for_points,
@@ -155,7 +156,8 @@ def upload_points(request):
         crs_idx = _find_crs_column(header)
         default_transformer = _build_transformer_for_points(posted_crs_choice)
 
-        features = []
+        # sətirlər əvvəlcə oxunur, nöqtələr transformer üzrə qruplarla bir dəfə çevrilir
+        parsed = []
         for r in body:
             if len(r) <= max(x_idx, y_idx):
                 continue
@@ -170,12 +172,14 @@ def upload_points(request):
                 code = _canonize_crs_value(r[crs_idx])
                 if code:
                     row_transformer = _build_transformer_for_points(code)
+            parsed.append((r, x, y, row_transformer))
 
-            if row_transformer:
-                lon, lat = row_transformer.transform(x, y)
-            else:
-                lon, lat = x, y
+        lons, lats = reproject.transform_grouped(
+            [p[1] for p in parsed], [p[2] for p in parsed], [p[3] for p in parsed]
+        )
 
+        features = []
+        for (r, _x, _y, _tr), lon, lat in zip(parsed, lons.tolist(), lats.tolist()):
             if not (-180 <= lon <= 180 and -90 <= lat <= 90):
                 continue
 
@@ -76,6 +76,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'corrections.breakers.CircuitOpenMiddleware',
 ]
 
 ROOT_URLCONF = 'crrs.urls'
@@ -140,8 +141,134 @@ NODE_REDEEM_EXP_SKEW_SEC = env("NODE_REDEEM_EXP_SKEW_SEC", "15", cast=int)  # ki
 NODE_REDEEM_BEARER       = env("NODE_REDEEM_BEARER", "")               # lazım deyilsə boş qalsın
 
 
+# ======================
+# Oracle async (TEKUIS / NECAS) bağlantıları
+# ======================
+# ASGI_DEPLOY=1 – uvicorn/daphne (bir uzunömürlü event loop): async Oracle pool və ortaq
+# httpx klienti. WSGI-də hər async view öz loop-unda işləyir → proses üzrə sinxron Oracle
+# pool (thread körpüsü ilə) və requests.Session istifadə olunur.
+ASGI_DEPLOY           = env_bool("ASGI_DEPLOY", False)
+ORACLE_ASYNC_POOL     = env_bool("ORACLE_ASYNC_POOL", ASGI_DEPLOY)
+# Pool ölçüləri (həm async, həm sinxron pool üçün, proses başına)
+ORACLE_ASYNC_POOL_MIN = env("ORACLE_ASYNC_POOL_MIN", "1", cast=int)
+ORACLE_ASYNC_POOL_MAX = env("ORACLE_ASYNC_POOL_MAX", "16", cast=int)
+# Hər Oracle round-trip üçün yuxarı hədd (ms); 0 → limitsiz
+ORACLE_CALL_TIMEOUT_MS = env("ORACLE_CALL_TIMEOUT_MS", "60000", cast=int)
+# BBOX extent-ləri bu torda (dərəcə) xaricə yuvarlaqlaşdırılır → eyni sorğular birləşir; 0 → söndür
+PARCELS_BBOX_SNAP_DEG  = env("PARCELS_BBOX_SNAP_DEG", "0.00001", cast=float)
+# By-geom / attach sorğuları üçün vaxt büdcəsi (ms); bitəndə qismən nəticə + continuation tokeni
+PARCELS_BUDGET_MS = {
+    "tekuis_geom": 20000,
+    "necas_geom": 20000,
+    "parcels_geom": 20000,
+    "tekuis_attach": 25000,
+}
+# Klientin budget_ms parametri bu həddi keçə bilməz
+PARCELS_BUDGET_MAX_MS = env("PARCELS_BUDGET_MAX_MS", "60000", cast=int)
+# BBOX endpoint-lərinin səhifə ölçüsü (limit verilməyəndə) və serverin icazə verdiyi maksimum
+PARCELS_PAGE_SIZE = env("PARCELS_PAGE_SIZE", "2000", cast=int)
+PARCELS_PAGE_MAX  = env("PARCELS_PAGE_MAX", "5000", cast=int)
+# ?zoom / ?resolution ilə sadələşdirmə: bu zoom-dan böyükdə tam detal; tolerans = piksel × PX
+PARCELS_SIMPLIFY_MAX_ZOOM = env("PARCELS_SIMPLIFY_MAX_ZOOM", "16", cast=int)
+PARCELS_SIMPLIFY_PX       = env("PARCELS_SIMPLIFY_PX", "0.5", cast=float)
+PARCELS_SIMPLIFY_CACHE_S  = env("PARCELS_SIMPLIFY_CACHE_S", "300", cast=int)
+# ?agg=grid: xana ölçüsü (piksel, zoom/resolution verildikdə) və extent başına maksimum xana sayı
+PARCELS_GRID_PX        = env("PARCELS_GRID_PX", "64", cast=int)
+PARCELS_GRID_MAX_CELLS = env("PARCELS_GRID_MAX_CELLS", "10000", cast=int)
+PARCELS_HAVE_MAX_RANGES = env("PARCELS_HAVE_MAX_RANGES", "20000", cast=int)  # ?have= ID aralıqları
+PARCELS_BY_ID_MAX       = env("PARCELS_BY_ID_MAX", "5000", cast=int)       # by-ids sorğusunda ən çox ID
+
+# İki fazalı oxuma: əvvəl (ROWID, ORA_ROWSCN), sonra yalnız cache-də olmayan geometriyalar
+PARCELS_TWO_PHASE     = env_bool("PARCELS_TWO_PHASE", True)
+PARCELS_GEOM_CACHE_S  = env("PARCELS_GEOM_CACHE_S", "21600", cast=int)
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    # TEKUİS parsel geometriyaları (WKB + atributlar) – corrections.feature_cache.
+    # Ölçü: 30-80 təpəli parsel ~0.9-1.7 KB (pickle) → default 30000 ≈ 50 MB/worker.
+    # PARCELS_GEOM_CACHE_REDIS verilərsə worker-lər arası ortaq Redis cache (redis paketi lazımdır).
+    "parcel_geoms": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": env("PARCELS_GEOM_CACHE_REDIS", ""),
+        "KEY_PREFIX": "parcel_geoms",
+    } if env("PARCELS_GEOM_CACHE_REDIS", "") else {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "parcel_geoms",
+        "OPTIONS": {"MAX_ENTRIES": env("PARCELS_GEOM_CACHE_MAX", "30000", cast=int)},
+    },
+    # TEKUİS validasiya nəticələri (məzmun hash-i ilə) – corrections.validation_cache.
+    # validate və save fərqli worker-lərə düşə bilər → ortaq DB cache cədvəli (migrasiya 0002).
+    "validation": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "tekuis_validation_cache",
+        "OPTIONS": {"MAX_ENTRIES": env("TEKUIS_VALIDATION_CACHE_MAX", "2000", cast=int), "CULL_FREQUENCY": 10},
+    },
+    # İnkremental validasiya sessiyaları – corrections.validation_session. Bütün worker-lər
+    # arasında ortaq olmalıdır (start bir worker-də, delta digərində) → DB cache cədvəli
+    # (migrasiya 0003). Limit aşılanda köhnə sessiyalar silinir; klient NO_SESSION alıb
+    # sessiyanı yenidən başladır.
+    "validation_sessions": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "tekuis_validation_session_cache",
+        "OPTIONS": {"MAX_ENTRIES": env("TEKUIS_VALIDATION_SESSION_MAX", "2000", cast=int), "CULL_FREQUENCY": 10},
+    },
+}
+
+
+# ======================
+# Qəbul nəzarəti (admission control) – worker başına limitlər
+# ======================
+ADMISSION_CLASSES = {
+    # limit: eyni anda icra, queue: gözləmə növbəsi, wait_s: növbədə max gözləmə, retry_after: 503/429 başlığı
+    "interactive": {
+        "limit": env("ADMISSION_INTERACTIVE_LIMIT", "32", cast=int),
+        "queue": env("ADMISSION_INTERACTIVE_QUEUE", "64", cast=int),
+        "wait_s": env("ADMISSION_INTERACTIVE_WAIT_S", "2", cast=float),
+        "retry_after": 1,
+    },
+    "batch": {
+        "limit": env("ADMISSION_BATCH_LIMIT", "4", cast=int),
+        "queue": env("ADMISSION_BATCH_QUEUE", "8", cast=int),
+        "wait_s": env("ADMISSION_BATCH_WAIT_S", "30", cast=float),
+        "retry_after": 10,
+    },
+}
+ADMISSION_PER_USER         = env("ADMISSION_PER_USER", "6", cast=int)      # 0 → limitsiz
+ADMISSION_PER_IP           = env("ADMISSION_PER_IP", "24", cast=int)       # kimliksiz sorğular; 0 → limitsiz
+# X-Forwarded-For yalnız REMOTE_ADDR bu siyahıdadırsa nəzərə alınır (IP və ya CIDR, vergüllə)
+ADMISSION_TRUSTED_PROXIES  = env_list("ADMISSION_TRUSTED_PROXIES", "")
+ADMISSION_PER_TICKET       = env("ADMISSION_PER_TICKET", "4", cast=int)    # 0 → limitsiz
+ADMISSION_HEAVY_BODY_BYTES = env("ADMISSION_HEAVY_BODY_BYTES", str(256 * 1024), cast=int)  # by-geom → batch
+
+# ======================
+# Circuit breaker-lər (oracle_tekuis, oracle_necas, mssql, smb, node)
+# ======================
+# Default-ları üstələmək üçün: {"node": {"open_s": 30, "slow_call_s": 3}, ...}
+# Açarlar: window_s, min_calls, failure_rate, slow_call_s, slow_rate, open_s, half_open_calls
+CIRCUIT_BREAKERS = {}
+
+
 TEKUIS_VALIDATION_MIN_OVERLAP_SQM = 0.25   # çox xırda sliver-lər itməsin deyirsənsə 0.01 də verə bilərsən
 TEKUIS_VALIDATION_MIN_GAP_SQM     = 5.0
+# "overlay" – unary_union + cüt-cüt intersection; "coverage" – GEOS coverage əməliyyatları
+TEKUIS_VALIDATION_ENGINE          = env("TEKUIS_VALIDATION_ENGINE", "overlay")
+# Bölmələrlə paralel validasiya: açıq bayraq (default söndürülüb), proses sayı, minimum parsel sayı, tile ölçüsü
+TEKUIS_VALIDATION_PARTITIONED     = env_bool("TEKUIS_VALIDATION_PARTITIONED", False)
+TEKUIS_VALIDATION_WORKERS         = int(env("TEKUIS_VALIDATION_WORKERS", "0"))
+TEKUIS_VALIDATION_PARTITION_MIN   = int(env("TEKUIS_VALIDATION_PARTITION_MIN", "3000"))
+TEKUIS_VALIDATION_TILE_PARCELS    = int(env("TEKUIS_VALIDATION_TILE_PARCELS", "1500"))
+# Validasiya nəticə cache-inin TTL-i (san.); 0 → söndürülüb
+TEKUIS_VALIDATION_CACHE_S         = int(env("TEKUIS_VALIDATION_CACHE_S", "1800"))
+# Validasiya token-inin ömrü (san.) – save bu müddətdə validasiyanı təkrarlamır
+TEKUIS_VALIDATION_TOKEN_MAX_AGE_S = int(env("TEKUIS_VALIDATION_TOKEN_MAX_AGE_S", "3600"))
+# İnkremental validasiya sessiyasının ömrü (san., son dəyişiklikdən)
+TEKUIS_VALIDATION_SESSION_S       = int(env("TEKUIS_VALIDATION_SESSION_S", "3600"))
+# PostGIS validasiya rejimi: feature sayı / təpə həcmi bu hədləri keçəndə (0 → həmin hədd söndürülüb).
+# Avtomatik seçim yalnız default baza PostGIS-li olduqda (tekuis_validation_db.available).
+TEKUIS_VALIDATION_DB_MIN_FEATURES = int(env("TEKUIS_VALIDATION_DB_MIN_FEATURES", "20000"))
+TEKUIS_VALIDATION_DB_MIN_VERTICES = int(env("TEKUIS_VALIDATION_DB_MIN_VERTICES", "2000000"))
+# Girişdə dəqiqlik şəbəkəsi (validasiya + saxlama): "1e-7deg" / "0.01m"; boş → söndürülüb
+TEKUIS_PRECISION_GRID             = env("TEKUIS_PRECISION_GRID", "")
 
 
 # ======================
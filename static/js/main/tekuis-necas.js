@@ -33,6 +33,40 @@ window.TekuisNecas.create = function createTekuisNecas({
     ? getPageTicket
     : () => window.PAGE_TICKET || null;
 
+  // BBOX sorğuları üçün tab açarı: server eyni açarla köhnə sorğunu dayandırır (409)
+  const bboxViewKey = (window.crypto?.randomUUID?.() || `${Date.now()}-${Math.random()}`);
+  let bboxSeq = 0;
+  function bboxViewHeaders(){
+    return { 'Accept':'application/json', 'X-View-Key': bboxViewKey, 'X-View-Seq': String(++bboxSeq) };
+  }
+
+  // BBOX cavabı səhifələnir (limit/cursor). Ən çox BBOX_MAX_PAGES səhifə yığılır; qalanı varsa
+  // (has_more) fc.truncated=true və bildiriş — böyük extent bütövlükdə endirilmir.
+  // Eyni mənbə üçün yeni extent sorğusu başlayanda köhnə səhifələmə dayanır.
+  const BBOX_MAX_PAGES = 3;
+  const bboxPaging = { tekuis: 0, necas: 0 };
+  async function fetchBboxAllPages(kind, baseUrl, maxPages = BBOX_MAX_PAGES){
+    const gen = ++bboxPaging[kind];
+    let url = baseUrl;
+    let fc = null;
+    let pages = 0;
+    while (url) {
+      const r = await fetch(url, { headers: bboxViewHeaders() });
+      if (r.status === 409 || gen !== bboxPaging[kind]) return null;
+      if (!r.ok) throw new Error(r.statusText);
+      const page = await r.json();
+      if (fc) fc.features.push(...(page.features || []));
+      else fc = page;
+      url = page.next ? `${baseUrl}&cursor=${encodeURIComponent(page.next)}` : null;
+      if (url && ++pages >= maxPages) {
+        fc.truncated = true;
+        window.showToast?.('Ərazi çox böyükdür: yalnız ilk parsellər göstərilir. Xəritəni yaxınlaşdırın.');
+        break;
+      }
+    }
+    return fc;
+  }
+
   const getTekuisCountSafe = typeof getTekuisCount === 'function'
     ? getTekuisCount
     : () => localState.tekuisCount;
@@ -165,9 +199,8 @@ window.TekuisNecas.create = function createTekuisNecas({
     if (!extent3857) return;
     const [minx,miny,maxx,maxy] = ol.proj.transformExtent(extent3857, 'EPSG:3857', 'EPSG:4326');
     const url = `/api/tekuis/parcels/by-bbox/?minx=${minx}&miny=${miny}&maxx=${maxx}&maxy=${maxy}`;
-    return fetch(url, { headers:{'Accept':'application/json'} })
-      .then(r => r.ok ? r.json() : Promise.reject(r.statusText))
-      .then(showTekuis)
+    return fetchBboxAllPages('tekuis', url)
+      .then(fc => fc && showTekuis(fc))
       .catch(err => console.error('TEKUİS BBOX error:', err));
   }
 
@@ -298,9 +331,8 @@ window.TekuisNecas.create = function createTekuisNecas({
     if (!extent3857) return;
     const [minx,miny,maxx,maxy] = ol.proj.transformExtent(extent3857, 'EPSG:3857', 'EPSG:4326');
     const url = `/api/necas/parcels/by-bbox/?minx=${minx}&miny=${miny}&maxx=${maxx}&maxy=${maxy}`;
-    fetch(url, { headers:{'Accept':'application/json'} })
-      .then(r => r.ok ? r.json() : Promise.reject(r.statusText))
-      .then(showNecas)
+    fetchBboxAllPages('necas', url)
+      .then(fc => fc && showNecas(fc))
       .catch(err => console.error('NECAS BBOX error:', err));
   }
 
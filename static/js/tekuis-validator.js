@@ -8,6 +8,8 @@
   // API yollarınızı öz proyektinizə görə düzəldin:
   const API = {
     validate: "/api/tekuis/validate",
+    session: "/api/tekuis/validate/session/",
+    sessionDelta: "/api/tekuis/validate/session/delta/",
     ignoreGap: "/api/tekuis/validate/ignore-gap", // (istəyə görə) @require_valid_ticket
     save: "/save-tekuis-parcels/"
   };
@@ -298,6 +300,120 @@
     return await resp.json();
   }
 
+  /* =========================================================
+     İNKREMENTAL SERVER SESSİYASI (session/ + session/delta/)
+     ========================================================= */
+  // Server açarı ilə eyni: feature.id, yoxsa properties.ID / properties.id
+  function featureKey(f) {
+    let k = f && f.id;
+    if (k == null) {
+      const p = (f && f.properties) || {};
+      k = p.ID != null ? p.ID : p.id;
+    }
+    return k != null && String(k) !== "" ? String(k) : null;
+  }
+
+  // {key → geometriya JSON}; açarsız və ya təkrarlanan açar varsa null (delta mümkün deyil)
+  function keyedGeoms(fc) {
+    const feats = (fc && fc.type === "FeatureCollection" && fc.features) || null;
+    if (!feats) return null;
+    const out = new Map();
+    for (const f of feats) {
+      const k = featureKey(f);
+      if (k == null || out.has(k)) return null;
+      out.set(k, JSON.stringify(f.geometry || null));
+    }
+    return out;
+  }
+
+  async function postJson(url, body, { ticket, metaId }) {
+    const headers = { "Content-Type": "application/json", Accept: "application/json" };
+    if (ticket) headers["X-Ticket"] = String(ticket);
+    if (Number.isFinite(+metaId)) headers["X-Meta-Id"] = String(+metaId);
+    const resp = await fetch(url, { method: "POST", headers, body: JSON.stringify(body) });
+    const data = await resp.json().catch(() => null);
+    return { status: resp.status, ok: resp.ok, data };
+  }
+
+  function sessionApply(sess, out) {
+    const r = out.removed || {};
+    (r.overlaps || []).forEach((id) => sess.overlaps.delete(id));
+    (r.gaps || []).forEach((h) => sess.gaps.delete(h));
+    const a = out.added || {};
+    (a.overlaps || []).forEach((it) => sess.overlaps.set(it.id, it));
+    (a.gaps || []).forEach((it) => sess.gaps.set(it.hash, it));
+    sess.version = out.version;
+    sess.stats = out.stats || {};
+  }
+
+  function sessionResult(sess) {
+    return {
+      ok: true,
+      validation: {
+        stats: { ...sess.stats },
+        overlaps: [...sess.overlaps.values()],
+        gaps: [...sess.gaps.values()]
+      }
+    };
+  }
+
+  /**
+   * Serverə yalnız dəyişən feature-ləri göndər. Sessiya yoxdursa/köhnədirsə (410/409) tam FC ilə
+   * yenidən başlanır; açarsız FC-lərdə adi tam validate-ə düşür.
+   * Qeyd: sessiya cavabında validation_token yoxdur – save tam yoxlama edəcək.
+   */
+  async function validateIncremental(holder, { geojson, ticket, metaId }) {
+    const geoms = keyedGeoms(geojson);
+    if (!geoms) {
+      holder.session = null;
+      return validateOnServer({ geojson, ticket, metaId });
+    }
+    const auth = { ticket, metaId };
+    let sess = holder.session;
+
+    if (sess && sess.ticket === (ticket || "")) {
+      const changed = [], added = [], removed = [];
+      for (const f of geojson.features) {
+        const k = featureKey(f);
+        if (!sess.sent.has(k)) added.push(f);
+        else if (sess.sent.get(k) !== geoms.get(k)) changed.push(f);
+      }
+      for (const k of sess.sent.keys()) if (!geoms.has(k)) removed.push(k);
+      if (!changed.length && !added.length && !removed.length) return sessionResult(sess);
+
+      const r = await postJson(
+        API.sessionDelta,
+        { version: sess.version, changed, added, removed },
+        auth
+      );
+      if (r.ok && r.data && r.data.ok) {
+        sessionApply(sess, r.data);
+        sess.sent = geoms;
+        return sessionResult(sess);
+      }
+      if (r.status !== 409 && r.status !== 410) {
+        throw new Error((r.data && r.data.error) || "HTTP " + r.status);
+      }
+    }
+
+    const r = await postJson(API.session, { geojson }, auth);
+    if (!r.ok || !r.data || !r.data.ok) {
+      holder.session = null;
+      throw new Error((r.data && r.data.error) || "HTTP " + r.status);
+    }
+    sess = {
+      ticket: ticket || "",
+      sent: geoms,
+      overlaps: new Map(),
+      gaps: new Map(),
+      version: 0,
+      stats: {}
+    };
+    sessionApply(sess, r.data);
+    holder.session = sess;
+    return sessionResult(sess);
+  }
+
   /* =========================================================
      PUBLİK API
      ========================================================= */
@@ -317,6 +433,7 @@
         overlay,
         ticket,
         metaId,
+        session: null, // inkremental server sessiyası (validateIncremental)
 
         /* Parametrlər */
         setTicket(t) {
@@ -367,7 +484,7 @@
             return { ok: true, validation };
           } catch (e) {
             try {
-              const data = await validateOnServer({
+              const data = await validateIncremental(this, {
                 geojson,
                 ticket: this.ticket,
                 metaId: this.metaId
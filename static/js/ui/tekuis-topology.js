@@ -530,6 +530,7 @@ async function validateTekuisBothKinds(featureCollection){
     let allOverlaps = [];
     let allGaps = [];
     let stats = {};
+    let token = null;   // server validasiyası olubsa imzalı token (save-də overlay təkrarlanmır)
     
     // 1) Sadəcə overlap yoxlaması üçün konfiqurasiya
     try {
@@ -540,6 +541,7 @@ async function validateTekuisBothKinds(featureCollection){
       });
       const vOv = normalizeValidation(resOverlap?.validation);
       allOverlaps = vOv.overlaps || [];
+      token = resOverlap?.validation_token || token;
       stats = { ...stats, ...vOv.stats };
     } catch(e) {
       console.warn('Overlap yoxlaması xətası:', e);
@@ -554,6 +556,7 @@ async function validateTekuisBothKinds(featureCollection){
       });
       const vGap = normalizeValidation(resGap?.validation);
       allGaps = vGap.gaps || [];
+      token = resGap?.validation_token || token;
       stats = { ...stats, ...vGap.stats };
     } catch(e) {
       console.warn('Gap yoxlaması xətası:', e);
@@ -574,7 +577,7 @@ async function validateTekuisBothKinds(featureCollection){
       gaps: allGaps.length
     });
 
-    return { ok:true, validation: merged };
+    return { ok:true, validation: merged, validation_token: token };
   }catch(e){
     console.warn('validateTekuisBothKinds ümumi xətası:', e);
     return { ok:false, validation:{ stats:{}, overlaps:[], gaps:[] }, error: e?.message || 'validate error' };
@@ -607,7 +610,7 @@ function resolveOriginalTekuis({ fallbackFc } = {}){
 
 
 // --- Serverdə yadda saxla ---------------------------------------------------
-async function saveTekuisOnServer(featureCollection, { ignored, skipValidation, originalGeojson } = {}) {
+async function saveTekuisOnServer(featureCollection, { ignored, validationToken, originalGeojson } = {}) {
   // Lokal header-lar
   const headers = { 'Content-Type': 'application/json', 'Accept': 'application/json' };
 
@@ -628,8 +631,8 @@ async function saveTekuisOnServer(featureCollection, { ignored, skipValidation,
   const body = { geojson: featureCollection, original_geojson: originalFc, ticket };
   if (Number.isFinite(metaInt)) body.meta_id = metaInt;
 
-  // Eyni geometriyadırsa serverdə də validasiyanı ötür
-  if (skipValidation) body.skip_validation = true;
+  // Eyni geometriya üçün validate-in imzalı token-i: server overlay-i təkrarlamır
+  if (validationToken) body.validation_token = validationToken;
 
   // İstifadəçinin “sayılmır” seçimi
   if (ignored && (
@@ -745,6 +748,7 @@ async function tryValidateAndSaveTekuis(){
   const curHash = fcHash(fc);
 
   let validationResult = null;
+  let validationToken = null;
   let shouldSkipValidation = false;
   
 // 1) Əgər _topoLastOk varsa və hash eynidir → validasiya SKIP et
@@ -752,6 +756,7 @@ async function tryValidateAndSaveTekuis(){
     console.debug('✅ Topo skip: eyni geometriya, əvvəlki yoxlama OK idi');
     shouldSkipValidation = true;
     validationResult = window._lastTopoValidation || { stats: {}, overlaps: [], gaps: [] };
+    validationToken = window._topoLastOk.token || null;
     
     // ✅ YENİ: Skip olunduqda da effektiv sayı yenilə (ignore dəyişə biləcəyi üçün)
     const eff = computeEffective(validationResult);
@@ -768,6 +773,7 @@ async function tryValidateAndSaveTekuis(){
   if (!shouldSkipValidation) {
     const res = await validateTekuisLocal(fc);
     validationResult = res?.validation || {};
+    validationToken = res?.validation_token || null;
     window._lastTopoValidation = validationResult;
     
     const eff = computeEffective(validationResult);
@@ -779,7 +785,7 @@ async function tryValidateAndSaveTekuis(){
     }
     
     // Xəta yoxdur → hash saxla
-    window._topoLastOk = { hash: curHash, ts: Date.now(), eff };
+    window._topoLastOk = { hash: curHash, ts: Date.now(), eff, token: validationToken };
   }
 
   // ===== TƏSDIQ =====
@@ -800,7 +806,7 @@ async function tryValidateAndSaveTekuis(){
   try {
     const s = await saveTekuisOnServer(fc, {
       ignored: ignoredPayload,
-      skipValidation: shouldSkipValidation,
+      validationToken,
       originalGeojson: originalFc
     });
 